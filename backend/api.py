@@ -16,6 +16,7 @@ from pydantic import BaseModel
 
 from src.simulation import SimulationEngine, SimulationConfig, SimulationState
 from src.client import ClientMode
+from src.scheduler import available_schedulers
 
 
 engine: Optional[SimulationEngine] = None
@@ -29,7 +30,7 @@ async def lifespan(app: FastAPI):
     global engine, main_loop
     
     main_loop = asyncio.get_running_loop()
-    engine = SimulationEngine()
+    engine = SimulationEngine(loop=main_loop)
     
     def on_metrics_update(metrics):
         try:
@@ -69,8 +70,13 @@ class SimulationStartRequest(BaseModel):
     high_count: int = 200
     medium_count: int = 500
     low_count: int = 1000
+    flows: int = 1
     simulate_congestion: bool = True
     congestion_level: float = 0.3
+    header_version: int = 1
+    scheduler: Optional[str] = None
+    drop_hopeless: bool = False
+    use_asyncio: bool = False
 
 
 class SimulationResponse(BaseModel):
@@ -94,21 +100,35 @@ async def start_simulation(request: SimulationStartRequest):
     except ValueError:
         mode = ClientMode.DTP
     
-    config = SimulationConfig(
-        mode=mode,
-        critical_count=request.critical_count,
-        high_count=request.high_count,
-        medium_count=request.medium_count,
-        low_count=request.low_count,
-        simulate_congestion=request.simulate_congestion,
-        congestion_level=request.congestion_level
-    )
+    if request.scheduler is not None and request.scheduler not in available_schedulers():
+        raise HTTPException(status_code=400, detail=f"Unknown scheduler: {request.scheduler}")
+    if request.flows < 1:
+        raise HTTPException(status_code=400, detail=f"flows must be positive: {request.flows}")
+    
+    try:
+        config = SimulationConfig(
+            mode=mode,
+            critical_count=request.critical_count,
+            high_count=request.high_count,
+            medium_count=request.medium_count,
+            low_count=request.low_count,
+            flows=request.flows,
+            simulate_congestion=request.simulate_congestion,
+            congestion_level=request.congestion_level,
+            header_version=request.header_version,
+            scheduler=request.scheduler,
+            drop_hopeless=request.drop_hopeless,
+            use_asyncio=request.use_asyncio
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     threading.Thread(target=engine.start, args=(config,), daemon=True).start()
     
     return SimulationResponse(
         status="started",
         message=f"Simulation started in {mode.value} mode"
+                + (f" with {request.scheduler} scheduler" if request.scheduler else "")
     )
 
 
@@ -177,6 +197,11 @@ async def get_results():
     return engine.get_results()
 
 
+@app.get("/schedulers")
+async def list_schedulers():
+    return {"schedulers": available_schedulers()}
+
+
 @app.get("/comparison")
 async def get_comparison():
     global engine
@@ -0,0 +1,99 @@
+"""
+DTP asyncio Sender Benchmark
+Many logical senders feeding one scheduler and one drain: a thread per
+sender with a blocking dequeue, versus a coroutine per sender with
+AsyncScheduler.get() on a single event loop. Reports packets/s and the
+peak number of OS threads used.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.protocol import DTPPacket, Priority
+from src.scheduler import DTPScheduler
+from src.async_client import AsyncScheduler
+
+SENDERS = [100, 1000, 5000]
+PACKETS_PER_SENDER = 10
+
+
+def make_packets(base: int) -> list:
+    return [DTPPacket.create_data(b'', Priority((base + i) % 4), (base + i) % 65536, deadline_ms=60_000)
+            for i in range(PACKETS_PER_SENDER)]
+
+
+def run_threads(senders: int) -> dict:
+    scheduler = DTPScheduler(queue_size=senders * PACKETS_PER_SENDER)
+    total = senders * PACKETS_PER_SENDER
+    batches = [make_packets(s * PACKETS_PER_SENDER) for s in range(senders)]
+    go = threading.Event()
+
+    def produce(packets):
+        go.wait()   # every sender is alive at once, as long-lived senders would be
+        for packet in packets:
+            scheduler.enqueue(packet)
+            time.sleep(0)   # yield, as a sender between messages would
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=produce, args=(b,)) for b in batches]
+    for thread in threads:
+        thread.start()
+    peak = threading.active_count()
+    go.set()
+    received = 0
+    while received < total:
+        if scheduler.dequeue(timeout=0.05) is not None:
+            received += 1
+    for thread in threads:
+        thread.join()
+    return {'pps': total / (time.perf_counter() - start), 'threads': peak}
+
+
+def run_coroutines(senders: int) -> dict:
+    total = senders * PACKETS_PER_SENDER
+    batches = [make_packets(s * PACKETS_PER_SENDER) for s in range(senders)]
+
+    async def scenario():
+        scheduler = AsyncScheduler(DTPScheduler(queue_size=total))
+        go = asyncio.Event()
+
+        async def produce(packets):
+            await go.wait()
+            for packet in packets:
+                scheduler.put(packet)
+                await asyncio.sleep(0)
+
+        start = time.perf_counter()
+        producers = [asyncio.ensure_future(produce(b)) for b in batches]
+        await asyncio.sleep(0)
+        peak = threading.active_count()
+        go.set()
+        for _ in range(total):
+            await scheduler.get()
+        await asyncio.gather(*producers)
+        return {'pps': total / (time.perf_counter() - start), 'threads': peak}
+
+    return asyncio.run(scenario())
+
+
+def run_async_client_benchmark() -> dict:
+    return {senders: {'threads': run_threads(senders), 'asyncio': run_coroutines(senders)}
+            for senders in SENDERS}
+
+
+if __name__ == "__main__":
+    results = run_async_client_benchmark()
+
+    print(f"\n{'='*66}")
+    print(f"  DTP Logical Senders: threads vs asyncio ({PACKETS_PER_SENDER} packets each)")
+    print(f"{'='*66}")
+    print(f"\n{'Senders':>8} {'Thread pkt/s':>14} {'OS threads':>11} {'Async pkt/s':>14} {'OS threads':>11}")
+    print("-" * 62)
+    for senders, r in results.items():
+        print(f"{senders:>8} {r['threads']['pps']:>14,.0f} {r['threads']['threads']:>11} "
+              f"{r['asyncio']['pps']:>14,.0f} {r['asyncio']['threads']:>11}")
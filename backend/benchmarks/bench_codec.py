@@ -0,0 +1,91 @@
+"""
+DTP Header Codec Benchmark
+Compares the precompiled pack_into/unpack_from codec against the
+original format-string pack/unpack path (packets/sec).
+"""
+
+import sys
+import os
+import struct
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.protocol import (
+    DTPPacket, DTPHeader, Priority, PacketType,
+    DTP_HEADER_SIZE, DTP_MAGIC, DTP_MAX_DATAGRAM
+)
+
+N_PACKETS = 200_000
+
+
+def legacy_serialize(packet: DTPPacket) -> bytes:
+    """Original encode path: re-parses the format and concatenates."""
+    h = packet.header
+    return struct.pack(
+        '>HBBBBHIQHH', DTP_MAGIC, h.version, h.packet_type, h.priority, h.flags,
+        h.sequence, h.timestamp, h.deadline, h.payload_length, h.batch_id
+    ) + packet.payload
+
+
+def legacy_deserialize(data: bytes) -> DTPPacket:
+    """Original decode path: slices the header, builds enums via constructors."""
+    magic, version, ptype, priority, flags, seq, ts, deadline, plen, batch = struct.unpack(
+        '>HBBBBHIQHH', data[:DTP_HEADER_SIZE]
+    )
+    if magic != DTP_MAGIC:
+        raise ValueError(f"Invalid magic: {magic:#x}")
+    header = DTPHeader(
+        version=version, packet_type=PacketType(ptype), priority=Priority(priority),
+        flags=flags, sequence=seq, timestamp=ts, deadline=deadline,
+        payload_length=plen, batch_id=batch
+    )
+    return DTPPacket(header, data[DTP_HEADER_SIZE:DTP_HEADER_SIZE + plen])
+
+
+def _rate(fn, n: int) -> float:
+    start = time.perf_counter()
+    fn(n)
+    return n / (time.perf_counter() - start)
+
+
+def run_codec_benchmark(n: int = N_PACKETS, payload_bytes: int = 64) -> dict:
+    packet = DTPPacket.create_data(b'x' * payload_bytes, Priority.HIGH, sequence=7)
+    data = packet.serialize()
+    buffer = bytearray(DTP_MAX_DATAGRAM)
+    view = memoryview(buffer)
+    size = packet.serialize_into(buffer)
+
+    def enc_legacy(k):
+        for _ in range(k):
+            legacy_serialize(packet)
+
+    def enc_new(k):
+        for _ in range(k):
+            packet.serialize_into(buffer)
+
+    def dec_legacy(k):
+        for _ in range(k):
+            legacy_deserialize(data)
+
+    def dec_new(k):
+        frame = view[:size]
+        for _ in range(k):
+            DTPPacket.deserialize(frame)
+
+    return {
+        'encode': (_rate(enc_legacy, n), _rate(enc_new, n)),
+        'decode': (_rate(dec_legacy, n), _rate(dec_new, n)),
+    }
+
+
+if __name__ == "__main__":
+    results = run_codec_benchmark()
+
+    print(f"\n{'='*60}")
+    print(f"  DTP Header Codec ({N_PACKETS} packets, 64B payload)")
+    print(f"{'='*60}")
+    print(f"\n{'Path':<10} {'Legacy pkt/s':>16} {'New pkt/s':>16} {'Speedup':>10}")
+    print("-" * 56)
+    for name, (legacy, new) in results.items():
+        print(f"{name:<10} {legacy:>16,.0f} {new:>16,.0f} {new / legacy:>9.2f}x")
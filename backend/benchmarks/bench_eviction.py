@@ -0,0 +1,95 @@
+"""
+DTP Overflow Eviction Benchmark
+Enqueue cost under sustained overload (queue permanently full, every
+enqueue evicts) for queue capacities from 1k to 1M, comparing the indexed
+eviction heap in DTPScheduler with the previous linear scan + heapify.
+"""
+
+import sys
+import os
+import heapq
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.protocol import DTPPacket, Priority
+from src.scheduler import DTPScheduler, QueueEntry, absolute_deadline
+
+CAPACITIES = [1_000, 10_000, 100_000, 1_000_000]
+OVERLOAD_OPS = 20_000
+# The linear baseline is O(n) per op; cap its total work so 1M stays runnable
+LINEAR_BUDGET = 20_000_000
+PRIORITIES = [Priority.CRITICAL, Priority.HIGH, Priority.MEDIUM]
+
+
+class LinearEvictionScheduler:
+    """The pre-index queue: one global heap, overflow scans for the lowest priority then heapifies."""
+
+    def __init__(self, queue_size: int, clock=None):
+        self._queue = []
+        self._max_size = queue_size
+        self._order = 0
+
+    def enqueue(self, packet: DTPPacket) -> bool:
+        header = packet.header
+        if len(self._queue) >= self._max_size:
+            lowest_idx, lowest_pri = -1, -1
+            for i, entry in enumerate(self._queue):
+                pri = entry.packet.header.priority.value
+                if pri > lowest_pri:
+                    lowest_pri, lowest_idx = pri, i
+            del self._queue[lowest_idx]
+            heapq.heapify(self._queue)
+        key = (header.priority.value, absolute_deadline(header), self._order)
+        heapq.heappush(self._queue, QueueEntry(sort_key=key, packet=packet, enqueue_time=0))
+        self._order += 1
+        return True
+
+
+def make_packets(n: int, seed: int) -> list:
+    random.seed(seed)
+    packets = []
+    for i in range(n):
+        priority = random.choice(PRIORITIES)
+        packets.append(DTPPacket.create_data(b'', priority, i % 65536,
+                                             deadline_ms=random.randint(100, 10_000)))
+    return packets
+
+
+def measure(scheduler_cls, capacity: int, ops: int, seed: int = 42) -> float:
+    """Mean enqueue time in microseconds once the queue is full."""
+    scheduler = scheduler_cls(queue_size=capacity, clock=lambda: 0)
+    for packet in make_packets(capacity, seed):
+        scheduler.enqueue(packet)
+
+    overload = make_packets(ops, seed + 1)
+    start = time.perf_counter()
+    for packet in overload:
+        scheduler.enqueue(packet)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def run_eviction_benchmark(capacities=CAPACITIES) -> dict:
+    results = {}
+    for capacity in capacities:
+        linear_ops = max(10, min(OVERLOAD_OPS, LINEAR_BUDGET // capacity))
+        results[capacity] = {
+            'indexed_us': measure(DTPScheduler, capacity, OVERLOAD_OPS),
+            'linear_us': measure(LinearEvictionScheduler, capacity, linear_ops),
+            'linear_ops': linear_ops,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    results = run_eviction_benchmark()
+
+    print(f"\n{'='*66}")
+    print(f"  DTP Scheduler: enqueue cost with a full queue (every op evicts)")
+    print(f"{'='*66}")
+    print(f"\n{'Capacity':>10} {'Indexed us/op':>14} {'Linear us/op':>14} {'Speedup':>9} {'Linear ops':>11}")
+    print("-" * 62)
+    for capacity, r in results.items():
+        print(f"{capacity:>10} {r['indexed_us']:>14.2f} {r['linear_us']:>14.1f} "
+              f"{r['linear_us'] / r['indexed_us']:>8.0f}x {r['linear_ops']:>11}")
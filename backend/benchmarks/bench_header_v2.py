@@ -0,0 +1,76 @@
+"""
+DTP Compact Header (v2) Benchmark
+Goodput (payload bytes / bytes on the wire incl. IPv4+UDP) for small
+payloads with the fixed 24-byte v1 header versus the varint v2 header,
+plus encode/decode cost per packet.
+"""
+
+import sys
+import os
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.protocol import (
+    DTPPacket, Priority, DTP_VERSION, DTP_VERSION_COMPACT
+)
+
+IP_UDP_OVERHEAD = 28
+PAYLOAD_SIZES = [4, 8, 16, 32, 64, 128, 256]
+N_PACKETS = 20_000
+
+
+def make_packets(n: int, payload_size: int, version: int, seed: int = 42) -> list:
+    random.seed(seed)
+    packets = []
+    for i in range(n):
+        priority = random.choice(list(Priority))
+        packet = DTPPacket.create_data(b'x' * payload_size, priority, sequence=i % 65536)
+        packet.header.version = version
+        packets.append(packet)
+    return packets
+
+
+def run_header_benchmark(n: int = N_PACKETS) -> dict:
+    results = {}
+    for size in PAYLOAD_SIZES:
+        row = {}
+        for version in (DTP_VERSION, DTP_VERSION_COMPACT):
+            packets = make_packets(n, size, version)
+
+            start = time.perf_counter()
+            wire = [p.serialize() for p in packets]
+            encode_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for data in wire:
+                DTPPacket.deserialize(data)
+            decode_s = time.perf_counter() - start
+
+            on_wire = sum(len(d) + IP_UDP_OVERHEAD for d in wire)
+            row[version] = {
+                'header': sum(len(d) for d in wire) / n - size,
+                'goodput': size * n / on_wire,
+                'encode_us': encode_s / n * 1e6,
+                'decode_us': decode_s / n * 1e6,
+            }
+        results[size] = row
+    return results
+
+
+if __name__ == "__main__":
+    results = run_header_benchmark()
+
+    print(f"\n{'='*78}")
+    print(f"  DTP Header v1 vs v2 ({N_PACKETS} packets per size, mixed priorities)")
+    print(f"{'='*78}")
+    print(f"\n{'Payload':>8} {'Hdr v1':>7} {'Hdr v2':>7} {'Goodput v1':>11} {'Goodput v2':>11} "
+          f"{'Gain':>7} {'Enc v1/v2 us':>14} {'Dec v1/v2 us':>14}")
+    print("-" * 86)
+    for size, row in results.items():
+        v1, v2 = row[DTP_VERSION], row[DTP_VERSION_COMPACT]
+        gain = (v2['goodput'] / v1['goodput'] - 1) * 100
+        print(f"{size:>7}B {v1['header']:>7.1f} {v2['header']:>7.1f} "
+              f"{v1['goodput'] * 100:>10.1f}% {v2['goodput'] * 100:>10.1f}% {gain:>+6.1f}% "
+              f"{v1['encode_us']:>6.2f}/{v2['encode_us']:<6.2f} {v1['decode_us']:>6.2f}/{v2['decode_us']:<6.2f}")
@@ -0,0 +1,104 @@
+"""
+DTP Sender Wakeup Benchmark
+Idle CPU and enqueue-to-dequeue latency of a sender thread that polls the
+scheduler with a 1 ms sleep (the previous sender loop) versus one that
+blocks in dequeue(timeout=...) and is woken by the enqueue.
+"""
+
+import sys
+import os
+import random
+import threading
+import time
+from statistics import mean, median, quantiles
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.protocol import DTPPacket, Priority
+from src.scheduler import DTPScheduler
+
+IDLE_S = 2.0
+N_PACKETS = 500
+MAX_GAP_MS = 5.0
+
+
+def polling_consumer(scheduler, stop, on_packet):
+    while not stop.is_set():
+        packet = scheduler.dequeue()
+        if packet:
+            on_packet(packet)
+        else:
+            time.sleep(0.001)
+
+
+def blocking_consumer(scheduler, stop, on_packet):
+    while not stop.is_set():
+        packet = scheduler.dequeue(timeout=0.05)
+        if packet:
+            on_packet(packet)
+
+
+def measure_idle_cpu(consumer) -> float:
+    """CPU seconds burned per wall second by a consumer on an empty queue."""
+    scheduler = DTPScheduler()
+    stop = threading.Event()
+    thread = threading.Thread(target=consumer, args=(scheduler, stop, lambda p: None))
+
+    start = time.process_time()
+    thread.start()
+    time.sleep(IDLE_S)
+    stop.set()
+    thread.join()
+    return (time.process_time() - start) / IDLE_S
+
+
+def measure_latency(consumer, seed: int = 42) -> list:
+    """Enqueue-to-dequeue latency (us) of sparse CRITICAL packets."""
+    random.seed(seed)
+    scheduler = DTPScheduler()
+    stop = threading.Event()
+    enqueued_at = {}
+    latencies = []
+
+    def on_packet(packet):
+        latencies.append((time.perf_counter_ns() - enqueued_at[packet.header.sequence]) / 1000)
+
+    thread = threading.Thread(target=consumer, args=(scheduler, stop, on_packet))
+    thread.start()
+    for seq in range(N_PACKETS):
+        time.sleep(random.uniform(0, MAX_GAP_MS) / 1000)
+        packet = DTPPacket.create_data(b'', Priority.CRITICAL, seq)
+        enqueued_at[seq] = time.perf_counter_ns()
+        scheduler.enqueue(packet)
+
+    while len(latencies) < N_PACKETS:
+        time.sleep(0.01)
+    stop.set()
+    thread.join()
+    return latencies
+
+
+def run_sender_benchmark() -> dict:
+    results = {}
+    for name, consumer in (('poll 1ms', polling_consumer), ('blocking', blocking_consumer)):
+        latencies = measure_latency(consumer)
+        results[name] = {
+            'idle_cpu': measure_idle_cpu(consumer),
+            'mean_us': mean(latencies),
+            'p50_us': median(latencies),
+            'p99_us': quantiles(latencies, n=100)[98],
+        }
+    return results
+
+
+if __name__ == "__main__":
+    results = run_sender_benchmark()
+
+    print(f"\n{'='*66}")
+    print(f"  DTP Sender: polling vs condition-variable wakeup")
+    print(f"{'='*66}")
+    print(f"\n{'Sender':<10} {'Idle CPU':>9} {'Mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    print("-" * 54)
+    for name, r in results.items():
+        print(f"{name:<10} {r['idle_cpu'] * 100:>8.2f}% {r['mean_us']:>10.1f} "
+              f"{r['p50_us']:>10.1f} {r['p99_us']:>10.1f}")
@@ -0,0 +1,104 @@
+"""
+DTP Sharded Scheduler Benchmark
+Packets per second through a single DTPScheduler versus a ShardedScheduler
+with 1, 2, 4 and 8 producer threads feeding one sender thread, and the
+aggregate rate of 1, 2, 4 and 8 worker processes that each own a
+scheduler (shared-nothing sharding, not limited by the GIL but by cores).
+"""
+
+import sys
+import os
+import threading
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.protocol import DTPPacket, Priority
+from src.scheduler import DTPScheduler
+from src.sharding import ShardedScheduler
+
+PRODUCERS = [1, 2, 4, 8]
+PACKETS = 40_000
+SHARDS = 8
+CHUNK = 16
+
+
+def make_packets(n: int, offset: int = 0) -> list:
+    # Long deadline: measure queue throughput, not expiry
+    return [DTPPacket.create_data(b'', Priority(i % 4), (offset + i) % 65536, deadline_ms=60_000)
+            for i in range(n)]
+
+
+def run_threads(scheduler, producers: int) -> float:
+    """Packets/s through `scheduler` with `producers` threads and one sender."""
+    per_producer = PACKETS // producers
+    batches = [make_packets(per_producer, p * per_producer) for p in range(producers)]
+    total = per_producer * producers
+    received = [0]
+    done = threading.Event()
+
+    def produce(packets):
+        for i in range(0, len(packets), CHUNK):
+            scheduler.enqueue_many(packets[i:i + CHUNK])
+
+    def consume():
+        while not (done.is_set() and scheduler.queue_size == 0):
+            received[0] += len(scheduler.dequeue_batch(64, timeout=0.05))
+
+    threads = [threading.Thread(target=produce, args=(b,)) for b in batches]
+    sender = threading.Thread(target=consume)
+    start = time.perf_counter()
+    sender.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    sender.join()
+    assert received[0] == total, f"lost {total - received[0]} packets"
+    return total / (time.perf_counter() - start)
+
+
+def process_worker(n: int) -> int:
+    """One process owning one scheduler: enqueue and drain `n` packets."""
+    scheduler = DTPScheduler(queue_size=n)
+    packets = make_packets(n)
+    for i in range(0, n, CHUNK):
+        scheduler.enqueue_many(packets[i:i + CHUNK])
+    drained = 0
+    while drained < n:
+        drained += len(scheduler.dequeue_batch(64))
+    return drained
+
+
+def run_processes(workers: int) -> float:
+    """Aggregate packets/s of `workers` processes splitting PACKETS between them."""
+    with Pool(workers) as pool:
+        pool.map(process_worker, [1] * workers)   # warm up the pool
+        start = time.perf_counter()
+        total = sum(pool.map(process_worker, [PACKETS // workers] * workers))
+        return total / (time.perf_counter() - start)
+
+
+def run_sharded_benchmark() -> dict:
+    results = {}
+    for producers in PRODUCERS:
+        results[producers] = {
+            'single': run_threads(DTPScheduler(queue_size=PACKETS), producers),
+            'sharded': run_threads(ShardedScheduler(num_shards=SHARDS, queue_size=PACKETS), producers),
+            'processes': run_processes(producers),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    results = run_sharded_benchmark()
+
+    print(f"\n{'='*66}")
+    print(f"  DTP Scheduler Throughput (pkt/s, {PACKETS} packets, {os.cpu_count()} CPUs)")
+    print(f"{'='*66}")
+    print(f"\n{'Producers':>10} {'Single lock':>14} {f'Sharded x{SHARDS}':>14} {'Processes':>14}")
+    print("-" * 56)
+    for producers, r in results.items():
+        print(f"{producers:>10} {r['single']:>14,.0f} {r['sharded']:>14,.0f} {r['processes']:>14,.0f}")
@@ -19,12 +19,15 @@ from src.protocol import (
     DTPPacket, Priority, PacketType, Flags, now_ms,
     reset_reference_time, get_priority_emoji
 )
-from src.scheduler import DTPScheduler, SimpleScheduler
+from src.scheduler import create_scheduler, available_schedulers
 from src.metrics import MetricsCollector
 from src.logger import ExperimentLogger, ExperimentConfig
 
 TEST_PORT_BASE = 8020
 
+# Baseline names used by the comparison test, mapped to registered schedulers
+SCHEDULER_ALIASES = {'DTP': 'priority', 'FIFO': 'fifo'}
+
 
 def run_scheduler_baseline_test(
     scheduler_type: str = "DTP",
@@ -63,10 +66,7 @@ def run_scheduler_baseline_test(
     logger.log_config(config)
     
     # Create scheduler
-    if scheduler_type == "DTP":
-        scheduler = DTPScheduler(queue_size=1000)
-    else:
-        scheduler = SimpleScheduler(queue_size=1000)
+    scheduler = create_scheduler(SCHEDULER_ALIASES.get(scheduler_type, scheduler_type), queue_size=1000)
     
     metrics = MetricsCollector()
     
@@ -259,5 +259,43 @@ def run_comparison_test():
     return {'fifo': fifo_all_results, 'dtp': dtp_all_results}
 
 
+def on_time_pct(results: Dict, priority: str) -> float:
+    stats = results['by_priority'].get(priority, {})
+    recv = stats.get('received', 0)
+    return (stats.get('on_time', 0) / recv * 100) if recv > 0 else 0
+
+
+def run_scheduler_sweep(n_runs: int = 3, total_packets: int = 200, seed: int = 42):
+    """Run the baseline test for every registered scheduler and compare on-time rates."""
+    print("\n" + "="*70)
+    print("  Scheduler Policy Sweep")
+    print("="*70)
+    
+    priority_order = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+    averages = {}
+    
+    for name in available_schedulers():
+        print(f"\nRunning {name} ({n_runs} runs)...")
+        runs = [run_scheduler_baseline_test(scheduler_type=name, total_packets=total_packets, seed=seed)
+                for _ in range(n_runs)]
+        averages[name] = {pri: mean(on_time_pct(r, pri) for r in runs) for pri in priority_order}
+    
+    print("\n" + "="*70)
+    print(f"  Sweep Summary (Average of {n_runs} runs, {total_packets} packets)")
+    print("="*70)
+    
+    print(f"\n{'Scheduler':<12}" + "".join(f"{pri:>12}" for pri in priority_order))
+    print("-" * 60)
+    for name, row in averages.items():
+        print(f"{name:<12}" + "".join(f"{row[pri]:>11.1f}%" for pri in priority_order))
+    
+    print("\n" + "="*70)
+    
+    return averages
+
+
 if __name__ == "__main__":
-    run_comparison_test()
+    if "--sweep" in sys.argv:
+        run_scheduler_sweep()
+    else:
+        run_comparison_test()
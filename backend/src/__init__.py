@@ -1,21 +1,47 @@
 """DTP - Deadline-aware Transport Protocol Backend Module."""
 
 from .protocol import (
-    DTPPacket, DTPHeader, Priority, PacketType, Flags,
+    DTPPacket, DTPPacketView, DTPHeader, Priority, PacketType, Flags,
     now_ms, get_current_time_ms, reset_reference_time,
-    DTP_VERSION, DTP_HEADER_SIZE, DTP_DEFAULT_PORT, DTP_MAGIC,
-    get_priority_emoji
+    DTP_VERSION, DTP_VERSION_COMPACT, DTP_MAX_VERSION, DTP_HEADER_SIZE, DTP_DEFAULT_PORT, DTP_MAGIC, DTP_MAX_DATAGRAM,
+    DTP_RECV_BUFFER_SIZE, DTP_DEFAULT_MTU, HEADER_STRUCT, get_priority_emoji, iter_batch_frames
 )
 
-from .scheduler import DTPScheduler, SimpleScheduler, QueueEntry
+from .timebase import (
+    monotonic_ns, precise_ms, coarse_now_ms
+)
+
+from .sequence import (
+    SequenceTracker, FlowSequenceRegistry, serial_diff, serial_lt, sequence_bits
+)
+
+from .fragmentation import fragment_packet, ReassemblyBuffer, FRAGMENT_STRUCT
+
+from .scheduler import (
+    DTPScheduler, SimpleScheduler, QueueEntry, OrderingMode, priority_class,
+    Scheduler, register_scheduler, create_scheduler, available_schedulers
+)
+
+from .sharding import ShardedScheduler
+
+from .flow_queue import FlowScheduler
+
+from .async_client import AsyncScheduler, AsyncDTPClient
 
 from .metrics import MetricsCollector
 
+from .compression import (
+    PayloadCompressor, compress_payload, decompress_payload, PRESET_DICTIONARIES,
+    build_dictionary, set_preset_dictionaries
+)
+
 from .rate_control import (
     TokenBucket, AdmissionController, CongestionController, Pacer,
-    TokenBucketConfig
+    TokenBucketConfig, DelayEstimator
 )
 
+from .aqm import CoDel, CoDelConfig
+
 from .clock_sync import (
     ClockSyncClient, ClockSyncServer, ClockSyncResult,
     sync_with_server, set_global_clock_offset, get_global_clock_offset,
@@ -29,14 +55,24 @@ from .logger import (
 
 __version__ = "1.0.0"
 __all__ = [
-    'DTPPacket', 'DTPHeader', 'Priority', 'PacketType', 'Flags',
+    'DTPPacket', 'DTPPacketView', 'DTPHeader', 'Priority', 'PacketType', 'Flags',
     'now_ms', 'get_current_time_ms', 'reset_reference_time',
-    'DTP_VERSION', 'DTP_HEADER_SIZE', 'DTP_DEFAULT_PORT', 'DTP_MAGIC',
-    'get_priority_emoji',
-    'DTPScheduler', 'SimpleScheduler', 'QueueEntry',
+    'DTP_VERSION', 'DTP_VERSION_COMPACT', 'DTP_MAX_VERSION', 'DTP_HEADER_SIZE', 'DTP_DEFAULT_PORT', 'DTP_MAGIC', 'DTP_MAX_DATAGRAM',
+    'DTP_RECV_BUFFER_SIZE', 'DTP_DEFAULT_MTU', 'HEADER_STRUCT', 'get_priority_emoji', 'iter_batch_frames',
+    'monotonic_ns', 'precise_ms', 'coarse_now_ms',
+    'SequenceTracker', 'FlowSequenceRegistry', 'serial_diff', 'serial_lt', 'sequence_bits',
+    'fragment_packet', 'ReassemblyBuffer', 'FRAGMENT_STRUCT',
+    'DTPScheduler', 'SimpleScheduler', 'QueueEntry', 'OrderingMode', 'priority_class',
+    'Scheduler', 'register_scheduler', 'create_scheduler', 'available_schedulers',
+    'ShardedScheduler',
+    'FlowScheduler',
+    'AsyncScheduler', 'AsyncDTPClient',
     'MetricsCollector',
+    'PayloadCompressor', 'compress_payload', 'decompress_payload', 'PRESET_DICTIONARIES',
+    'build_dictionary', 'set_preset_dictionaries',
     'TokenBucket', 'AdmissionController', 'CongestionController', 'Pacer',
-    'TokenBucketConfig',
+    'TokenBucketConfig', 'DelayEstimator',
+    'CoDel', 'CoDelConfig',
     'ClockSyncClient', 'ClockSyncServer', 'ClockSyncResult',
     'sync_with_server', 'set_global_clock_offset', 'get_global_clock_offset',
     'adjust_remote_timestamp',
@@ -0,0 +1,120 @@
+"""
+DTP Active Queue Management
+
+CoDel (Nichols & Jacobson, RFC 8289) applied per scheduler class:
+1. Each dequeued packet's sojourn time (dequeue time - enqueue time) is
+   compared with a target delay
+2. Once sojourn has stayed above target for a whole interval, the class
+   enters the dropping state and drops a head packet
+3. While it stays above target, drops are spaced interval / sqrt(count)
+   apart, so the drop rate rises until the standing queue drains
+
+Unlike a hard queue cap, this reacts to persistent delay rather than to
+queue length, so bursts pass but a standing queue does not.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CoDelConfig:
+    """Configuration for one CoDel-managed class"""
+    target_ms: float = 5.0      # Acceptable standing queue delay
+    interval_ms: float = 100.0  # Window the delay must persist over before dropping
+
+
+class CoDel:
+    """
+    CoDel drop decision for one queue.
+
+    Usage:
+        codel = CoDel(CoDelConfig(target_ms=20, interval_ms=200))
+        if codel.should_drop(now - entry.enqueue_time, now, backlog):
+            drop(entry)
+    """
+
+    def __init__(self, config: Optional[CoDelConfig] = None):
+        """
+        Args:
+            config: Target and interval (defaults to 5 ms / 100 ms)
+        """
+        self.config = config or CoDelConfig()
+        if self.config.target_ms <= 0 or self.config.interval_ms <= 0:
+            raise ValueError(f"CoDel target and interval must be positive: {self.config}")
+        self.reset()
+
+        # Statistics
+        self.drops = 0
+
+    def reset(self):
+        """Forget the delay history (e.g. after the queue was cleared)."""
+        self._first_above: Optional[float] = None
+        self._dropping = False
+        self._drop_next = 0.0
+        self._count = 0
+        self._last_count = 0
+
+    def _control_law(self, t: float) -> float:
+        return t + self.config.interval_ms / math.sqrt(self._count)
+
+    def _ok_to_drop(self, sojourn_ms: float, now: float, backlog: int) -> bool:
+        # Never drop the last packet: a single packet is not a standing queue
+        if sojourn_ms < self.config.target_ms or backlog <= 1:
+            self._first_above = None
+            return False
+        if self._first_above is None:
+            self._first_above = now + self.config.interval_ms
+            return False
+        return now >= self._first_above
+
+    def should_drop(self, sojourn_ms: float, now: float, backlog: int) -> bool:
+        """
+        Decide the fate of the head packet about to be dequeued.
+
+        Args:
+            sojourn_ms: Time the packet spent queued
+            now: Current time in ms
+            backlog: Packets in the queue, including this one
+
+        Returns:
+            True if the packet should be dropped
+        """
+        ok_to_drop = self._ok_to_drop(sojourn_ms, now, backlog)
+
+        if self._dropping:
+            if not ok_to_drop:
+                self._dropping = False
+                return False
+            if now < self._drop_next:
+                return False
+            self._count += 1
+            self._drop_next = self._control_law(self._drop_next)
+            self.drops += 1
+            return True
+
+        if not ok_to_drop:
+            return False
+
+        # Enter the dropping state; resume the previous drop rate if it ended recently
+        self._dropping = True
+        delta = self._count - self._last_count
+        recent = now - self._drop_next < 16 * self.config.interval_ms
+        self._count = delta if delta > 1 and recent else 1
+        self._last_count = self._count
+        self._drop_next = self._control_law(now)
+        self.drops += 1
+        return True
+
+    @property
+    def dropping(self) -> bool:
+        return self._dropping
+
+    def get_stats(self) -> dict:
+        return {
+            'target_ms': self.config.target_ms,
+            'interval_ms': self.config.interval_ms,
+            'drops': self.drops,
+            'dropping': self._dropping,
+        }
@@ -0,0 +1,329 @@
+"""
+DTP asyncio Client
+
+Single-threaded counterpart of DTPClient for use inside an event loop
+(e.g. FastAPI's):
+1. AsyncScheduler wraps any registered Scheduler so a sender can
+   `await scheduler.get()` instead of blocking a thread on a condition
+2. The socket is a datagram endpoint from loop.create_datagram_endpoint;
+   responses arrive as protocol callbacks, not from a receive thread
+3. Generation, pacing and batch flushes are timers on the loop
+   (loop.call_at on absolute times, so sleeps do not accumulate drift)
+
+Many logical senders are just coroutines calling send(); they share the
+client's scheduler and sender task without a thread each.
+"""
+
+import asyncio
+from collections import deque
+from typing import Deque, Hashable, List, Optional
+
+from .protocol import DTPPacket, DTP_VERSION, now_ms
+from .scheduler import Scheduler, create_scheduler
+from .client import DTPClientBase, TrafficProfile, SEND_QUANTUM_S, CONGESTION_HOLD_S
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+async def sleep_until(when: float):
+    """Sleep until loop time `when` (absolute, loop.time() clock) via loop.call_at."""
+    loop = asyncio.get_running_loop()
+    if when <= loop.time():
+        await asyncio.sleep(0)   # still yield, so busy senders take turns
+        return
+    waiter = loop.create_future()
+    handle = loop.call_at(when, _wake, waiter)
+    try:
+        await waiter
+    finally:
+        handle.cancel()
+
+
+class AsyncScheduler:
+    """
+    Awaitable front end for a Scheduler, used from a single event loop.
+
+    Usage:
+        scheduler = AsyncScheduler(create_scheduler('priority'))
+        scheduler.put(packet)
+        packet = await scheduler.get()
+    """
+
+    def __init__(self, scheduler: Optional[Scheduler] = None):
+        """
+        Args:
+            scheduler: Queue doing the actual scheduling (default: 'priority')
+        """
+        self.scheduler = scheduler if scheduler is not None else create_scheduler('priority')
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._closed = False
+
+    def put(self, packet: DTPPacket, flow: Optional[Hashable] = None) -> bool:
+        accepted = self.scheduler.enqueue(packet, flow)
+        if accepted:
+            self._wake(1)
+        return accepted
+
+    def put_many(self, packets: List[DTPPacket], flow: Optional[Hashable] = None) -> int:
+        accepted = self.scheduler.enqueue_many(packets, flow)
+        self._wake(accepted)
+        return accepted
+
+    def _wake(self, count: int):
+        while count > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                count -= 1
+
+    async def _wait(self):
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Woken and cancelled at once: hand the wakeup to the next getter
+            if waiter.done() and not waiter.cancelled():
+                self._wake(1)
+            raise
+
+    async def get(self) -> Optional[DTPPacket]:
+        """Next packet in scheduling order; None once closed and drained."""
+        while True:
+            packet = self.scheduler.dequeue()
+            if packet is not None or self._closed:
+                return packet
+            await self._wait()
+
+    async def get_batch(self, max_n: int, max_bytes: Optional[int] = None) -> List[DTPPacket]:
+        """Up to `max_n` packets (see Scheduler.dequeue_batch); [] once closed and drained."""
+        while True:
+            batch = self.scheduler.dequeue_batch(max_n, max_bytes)
+            if batch or self._closed:
+                return batch
+            await self._wait()
+
+    def close(self):
+        """Let getters drain what is queued, then return None / [] instead of waiting."""
+        self._closed = True
+        self._wake(len(self._waiters))
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def queue_size(self) -> int:
+        return self.scheduler.queue_size
+
+    @property
+    def send_rate(self) -> float:
+        return self.scheduler.send_rate
+
+    def get_stats(self) -> dict:
+        return self.scheduler.get_stats()
+
+
+class _ClientProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client: 'AsyncDTPClient'):
+        self._client = client
+
+    def datagram_received(self, data: bytes, addr):
+        self._client._handle_response(data)
+
+    def error_received(self, exc: Exception):
+        pass   # e.g. ICMP port unreachable before the server is up
+
+
+class AsyncDTPClient(DTPClientBase):
+    """
+    DTPClient on an asyncio event loop.
+
+    Usage:
+        client = AsyncDTPClient(port=4433)
+        await client.start()
+        client.send(packet)                   # from any coroutine on the loop
+        await client.run_simulation(profile)  # or generate the test traffic
+        client.stop()
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._resumed: Optional[asyncio.Event] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._simulation: Optional[asyncio.Task] = None
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._congestion_timer: Optional[asyncio.TimerHandle] = None
+
+    def set_scheduler(self, name: str):
+        """Switch to the scheduling policy registered as `name`, behind an AsyncScheduler."""
+        super().set_scheduler(name)
+        self.scheduler = AsyncScheduler(self._scheduler)
+
+    async def start(self):
+        if self._running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._version_negotiated = asyncio.Event()
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _ClientProtocol(self), remote_addr=(self.host, self.port)
+        )
+        self._running = True
+        self._sender = self._loop.create_task(self._sender_loop())
+
+        # The HELLO round trip is also the first delay sample
+        if self.max_version > DTP_VERSION or self.drop_hopeless:
+            await self.negotiate_version()
+
+    async def negotiate_version(self, timeout: float = 0.5) -> int:
+        """Offer max_version to the server; stays on v1 without an answer (see DTPClient)."""
+        self._version_negotiated.clear()
+        self._hello_sent_at = now_ms()
+        self._transport.sendto(DTPPacket.create_hello(self.max_version).serialize())
+        try:
+            await asyncio.wait_for(self._version_negotiated.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._wire_version
+
+    def stop(self):
+        """Close the socket and drop what is still queued; call on the client's loop."""
+        self._running = False
+        self.scheduler.close()
+        self._scheduler.clear()
+        for task in (self._simulation, self._sender):
+            if task is not None:
+                task.cancel()
+        for timer in (self._flush_timer, self._congestion_timer):
+            if timer is not None:
+                timer.cancel()
+        self._flush_timer = self._congestion_timer = None
+        if self._resumed is not None:
+            self._resumed.set()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def send(self, packet: DTPPacket, flow: Optional[Hashable] = None) -> bool:
+        """Queue `packet` on `flow` for the sender task; returns False if the scheduler refused it."""
+        return self.scheduler.put(packet, flow)
+
+    def run_simulation(self, profile: Optional[TrafficProfile] = None) -> asyncio.Task:
+        """Generate the profile's traffic in a task; await it to wait for the run to finish."""
+        if profile:
+            self._profile = profile
+
+        self._packets_to_send = self._profile.total_packets
+        self._simulation = self._loop.create_task(self._simulate())
+        return self._simulation
+
+    async def _simulate(self):
+        generation_schedule = self._generation_schedule()
+
+        start = self._loop.time()
+        packet_index = 0
+        while packet_index < len(generation_schedule) and self._running:
+            current_time = (self._loop.time() - start) * 1000
+            due = []
+            while packet_index < len(generation_schedule):
+                scheduled_time, priority, flow = generation_schedule[packet_index]
+                if scheduled_time > current_time:
+                    break
+                packet = self._make_packet(priority)
+                due.append((packet, flow))
+                self.metrics.record_sent(packet)
+                packet_index += 1
+
+            for flow, packets in self._group_by_flow(due).items():
+                self.scheduler.put_many(packets, flow)
+            if packet_index < len(generation_schedule):
+                await sleep_until(start + generation_schedule[packet_index][0] / 1000.0)
+
+        # Let the sender drain the queue, then stop it
+        self.scheduler.close()
+        if self._sender is not None:
+            await self._sender
+
+    async def _sender_loop(self):
+        scheduler = self.scheduler
+        next_slot = self._loop.time()
+        paced = self._datagrams_sent
+        while True:
+            await self._resumed.wait()
+            send_rate = scheduler.send_rate
+            batch = await scheduler.get_batch(max(1, int(send_rate * SEND_QUANTUM_S)))
+            if not batch:
+                break
+
+            self._packets_sent += self._send_dequeued(batch)
+            if self._batching:
+                self._arm_flush()
+
+            # Pace on absolute slots by datagrams that went out, flush timers'
+            # included: a packet held for a batch takes no slot until its
+            # batch leaves, and then shares the batch's datagram
+            datagrams, paced = self._datagrams_sent - paced, self._datagrams_sent
+            if datagrams:
+                next_slot = max(next_slot, self._loop.time()) + datagrams / send_rate
+                await sleep_until(next_slot)
+
+        if self._batching and self._transport is not None:
+            self._packets_sent += self._send_batch(self._scheduler.flush_all())
+
+    def _arm_flush(self):
+        """Schedule the pending batch's flush, moving the timer earlier if it now is due sooner."""
+        delay = self._scheduler.batch_flush_delay()
+        if delay is None:
+            return
+        when = self._loop.time() + delay
+        if self._flush_timer is not None:
+            if self._flush_timer.when() <= when:
+                return
+            self._flush_timer.cancel()
+        self._flush_timer = self._loop.call_at(when, self._flush_due)
+
+    def _flush_due(self):
+        self._flush_timer = None
+        if self._transport is None:
+            return
+        self._packets_sent += self._send_batch(self._scheduler.flush_due_batch())
+        self._arm_flush()
+
+    def _transmit(self, datagram: memoryview):
+        if self._transport is None:
+            raise ConnectionError("client is stopped")
+        # The transport copies whatever it cannot send right away
+        self._transport.sendto(datagram)
+
+    def _hold_congestion(self):
+        # One timer, pushed back by each signal, instead of one per packet
+        if self._congestion_timer is not None:
+            self._congestion_timer.cancel()
+        self._congestion_timer = self._loop.call_later(CONGESTION_HOLD_S, self._clear_congestion)
+
+    def _clear_congestion(self):
+        self._congestion_timer = None
+        super()._clear_congestion()
+
+    def pause(self):
+        if self._resumed is not None:
+            self._resumed.clear()
+
+    def resume(self):
+        if self._resumed is not None:
+            self._resumed.set()
+
+    @property
+    def is_sending(self) -> bool:
+        return self._simulation is not None and not self._simulation.done()
+
+    def get_stats(self) -> dict:
+        return {**super().get_stats(), 'transport': 'asyncio'}
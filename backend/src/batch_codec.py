@@ -0,0 +1,169 @@
+"""
+DTP Batch Codec - Vectorized encode/decode of many DTP headers.
+
+Maps the 24-byte v1 header onto a big-endian NumPy structured dtype so
+N headers are packed, unpacked, magic-checked and expiry-checked in a
+single call. Used for capture analysis and for replaying experiment
+logs (logger.LogReader.get_headers).
+
+NumPy is optional: the rest of the package does not need it, and every
+function here raises ImportError when it is missing.
+"""
+
+from typing import Iterable, List, Optional, Sequence
+
+from .protocol import (
+    DTPPacket, DTPHeader, Priority, PacketType,
+    DTP_MAGIC, DTP_VERSION, DTP_HEADER_SIZE, now_ms
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+HEADER_FIELDS = [
+    ('magic', '>u2'),
+    ('version', 'u1'),
+    ('packet_type', 'u1'),
+    ('priority', 'u1'),
+    ('flags', 'u1'),
+    ('sequence', '>u2'),
+    ('timestamp', '>u4'),
+    ('deadline', '>u8'),
+    ('payload_length', '>u2'),
+    ('batch_id', '>u2'),
+]
+
+HEADER_DTYPE = np.dtype(HEADER_FIELDS) if np is not None else None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for the DTP batch codec")
+
+
+def make_headers(count: int,
+                 priority: int = Priority.MEDIUM,
+                 packet_type: int = PacketType.DATA) -> 'np.ndarray':
+    """Allocate `count` zeroed headers with magic/version/type/priority filled in."""
+    _require_numpy()
+    headers = np.zeros(count, dtype=HEADER_DTYPE)
+    headers['magic'] = DTP_MAGIC
+    headers['version'] = DTP_VERSION
+    headers['packet_type'] = packet_type
+    headers['priority'] = priority
+    return headers
+
+
+def encode_headers(headers: 'np.ndarray') -> bytes:
+    """Pack a structured array of headers into contiguous wire bytes."""
+    _require_numpy()
+    if headers.dtype != HEADER_DTYPE:
+        converted = np.zeros(headers.shape, dtype=HEADER_DTYPE)
+        for name in headers.dtype.names:
+            converted[name] = headers[name]
+        headers = converted
+    else:
+        headers = headers.copy()
+    headers['magic'] = DTP_MAGIC
+    return headers.tobytes()
+
+
+def decode_headers(buffer,
+                   count: Optional[int] = None,
+                   stride: int = DTP_HEADER_SIZE,
+                   offset: int = 0,
+                   validate: bool = True) -> 'np.ndarray':
+    """
+    Decode headers from a buffer without copying.
+
+    Args:
+        buffer: bytes-like object holding the records
+        count: Number of records (defaults to as many as fit)
+        stride: Bytes between record starts (header + fixed payload size)
+        offset: Byte offset of the first record
+        validate: Raise ValueError if any record has a bad magic
+
+    Returns:
+        Structured array view over `buffer` (read-only for bytes input)
+    """
+    _require_numpy()
+    if stride < DTP_HEADER_SIZE:
+        raise ValueError(f"Stride too short: {stride} < {DTP_HEADER_SIZE}")
+
+    available = memoryview(buffer).nbytes - offset
+    if available < 0:
+        raise ValueError(f"Offset beyond buffer: {offset}")
+    fit = (available - DTP_HEADER_SIZE) // stride + 1 if available >= DTP_HEADER_SIZE else 0
+    if count is None:
+        count = fit
+    elif count > fit:
+        raise ValueError(f"Buffer holds {fit} headers, {count} requested")
+
+    headers = np.ndarray(shape=(count,), dtype=HEADER_DTYPE,
+                         buffer=buffer, offset=offset, strides=(stride,))
+
+    if validate:
+        bad = int(np.count_nonzero(~magic_mask(headers)))
+        if bad:
+            raise ValueError(f"Invalid magic in {bad} of {count} headers")
+
+    return headers
+
+
+def magic_mask(headers: 'np.ndarray') -> 'np.ndarray':
+    """Boolean mask of records carrying the DTP magic."""
+    _require_numpy()
+    return headers['magic'] == DTP_MAGIC
+
+
+def expired_mask(headers: 'np.ndarray', now: Optional[int] = None) -> 'np.ndarray':
+    """Vectorized DTPHeader.is_expired(): True where elapsed > deadline."""
+    _require_numpy()
+    if now is None:
+        now = now_ms()
+    timestamps = headers['timestamp'].astype(np.int64)
+    elapsed = np.int64(now) - timestamps
+    deadlines = headers['deadline'].astype(np.int64)
+    return (timestamps != 0) & (elapsed > deadlines)
+
+
+def headers_from_packets(packets: Sequence[DTPPacket]) -> 'np.ndarray':
+    """Collect the headers of many packets into one structured array."""
+    _require_numpy()
+    rows = [
+        (DTP_MAGIC, h.version, h.packet_type, h.priority, h.flags, h.sequence,
+         h.timestamp, h.deadline, h.payload_length, h.batch_id)
+        for h in (p.header for p in packets)
+    ]
+    return np.array(rows, dtype=HEADER_DTYPE)
+
+
+def packets_from_headers(headers: 'np.ndarray',
+                         payloads: Optional[Iterable[bytes]] = None) -> List[DTPPacket]:
+    """Materialise DTPPacket objects from a structured array (e.g. for replay)."""
+    _require_numpy()
+    rows = headers.tolist()
+    if payloads is None:
+        payloads = [None] * len(rows)
+
+    packets = []
+    for row, payload in zip(rows, payloads):
+        _, version, ptype, priority, flags, seq, ts, deadline, plen, batch = row
+        if payload is not None:
+            plen = len(payload)
+        header = DTPHeader(
+            version=version,
+            packet_type=PacketType(ptype),
+            priority=Priority(priority),
+            flags=flags,
+            sequence=seq,
+            timestamp=ts,
+            deadline=deadline,
+            payload_length=plen,
+            batch_id=batch
+        )
+        packets.append(DTPPacket(header, payload or b''))
+    return packets
@@ -4,15 +4,43 @@ import socket
 import threading
 import time
 import random
-from typing import Optional, Callable
+from abc import ABC, abstractmethod
+from typing import Optional, Callable, Hashable
 from enum import Enum
 
 from .protocol import (
     DTPPacket, DTPHeader, Priority, PacketType, Flags,
-    DTP_DEFAULT_PORT, get_priority_emoji, get_current_time_ms, now_ms
+    DTP_DEFAULT_PORT, DTP_MAX_DATAGRAM, DTP_RECV_BUFFER_SIZE, DTP_DEFAULT_MTU, DTP_VERSION, get_priority_emoji, get_current_time_ms, now_ms
 )
-from .scheduler import DTPScheduler, SimpleScheduler
+from .scheduler import Scheduler, DTPScheduler, create_scheduler
 from .metrics import MetricsCollector
+from .compression import PayloadCompressor
+from .sequence import sequence_bits
+from .fragmentation import fragment_packet
+from .rate_control import DelayEstimator
+
+
+# The sender drains the scheduler in batches sized to this much send time,
+# instead of taking the scheduler lock once per packet.
+SEND_QUANTUM_S = 0.005
+
+# Idle sender blocks on the scheduler for at most this long, so it notices
+# the end of a run; an enqueue wakes it immediately.
+SENDER_IDLE_TIMEOUT_S = 0.05
+
+# Longest the generator sleeps before rechecking whether it was stopped.
+GENERATOR_MAX_SLEEP_S = 0.05
+
+# How long a CONGESTION signal holds the send rate down.
+CONGESTION_HOLD_S = 1.0
+
+# Send times kept for RELIABLE packets awaiting an ACK (RTT samples); the
+# oldest is forgotten beyond this.
+ACK_PENDING_MAX = 4096
+
+# With drop_hopeless, one packet in this many (bulk traffic excepted) is sent
+# RELIABLE so its ACK keeps the one-way delay estimate current.
+RTT_SAMPLE_INTERVAL = 16
 
 
 class ClientMode(Enum):
@@ -20,6 +48,13 @@ class ClientMode(Enum):
     UDP_RAW = "udp_raw"
 
 
+# Registered scheduler used by each mode unless one is named explicitly.
+MODE_SCHEDULERS = {
+    ClientMode.DTP: 'priority',
+    ClientMode.UDP_RAW: 'fifo',
+}
+
+
 class TrafficProfile:
     """Defines the traffic mix to generate."""
     
@@ -29,13 +64,19 @@ class TrafficProfile:
                  medium_count: int = 500,
                  low_count: int = 1000,
                  burst_size: int = 20,
-                 burst_interval_ms: int = 100):
+                 burst_interval_ms: int = 100,
+                 flows: int = 1):
+        if flows < 1:
+            raise ValueError(f"flows must be positive: {flows}")
         self.critical_count = critical_count
         self.high_count = high_count
         self.medium_count = medium_count
         self.low_count = low_count
         self.burst_size = burst_size
         self.burst_interval_ms = burst_interval_ms
+        # Application streams the packets are spread over; with more than
+        # one, per-flow schedulers ('fq', 'sharded') see them apart
+        self.flows = flows
     
     @property
     def total_packets(self) -> int:
@@ -51,29 +92,51 @@ class TrafficProfile:
         }
 
 
-class DTPClient:
-    """DTP Client that generates and sends traffic."""
+class DTPClientBase(ABC):
+    """
+    Packet handling shared by DTPClient (threads and a blocking socket) and
+    async_client.AsyncDTPClient (one event loop): scheduler selection,
+    packet generation, batching, fragmentation, response handling and
+    statistics. Subclasses provide `_transmit` and `_hold_congestion`.
+    """
     
     def __init__(self,
                  host: str = '127.0.0.1',
                  port: int = DTP_DEFAULT_PORT,
                  metrics: Optional[MetricsCollector] = None,
-                 mode: ClientMode = ClientMode.DTP):
+                 mode: ClientMode = ClientMode.DTP,
+                 mtu: int = DTP_DEFAULT_MTU,
+                 compressor: Optional[PayloadCompressor] = None,
+                 max_version: int = DTP_VERSION,
+                 scheduler: Optional[str] = None,
+                 drop_hopeless: bool = False):
         self.host = host
         self.port = port
         self.metrics = metrics or MetricsCollector()
         self.mode = mode
+        self.mtu = mtu
+        self.compressor = compressor
+        self.max_version = max_version
         
-        self._socket: Optional[socket.socket] = None
+        # Header version used on the wire; raised only after a HELLO exchange.
+        # Subclasses set an Event (threading or asyncio) that the answer sets.
+        self._wire_version = DTP_VERSION
+        self._version_negotiated = None
+        
+        self._send_buffer = bytearray(max(mtu, DTP_MAX_DATAGRAM))
+        self._send_view = memoryview(self._send_buffer)
         self._running = False
-        self._paused = False
-        self._send_thread: Optional[threading.Thread] = None
-        self._recv_thread: Optional[threading.Thread] = None
         
-        if mode == ClientMode.DTP:
-            self._scheduler = DTPScheduler()
-        else:
-            self._scheduler = SimpleScheduler()
+        # One-way delay from HELLO and ACK round trips; with drop_hopeless the
+        # scheduler drops packets whose remaining time is below it
+        self.delay_estimator = DelayEstimator()
+        self.drop_hopeless = drop_hopeless
+        self._hello_sent_at: Optional[int] = None
+        # Written by the sender, popped by the receiver (a thread in DTPClient)
+        self._ack_pending: dict = {}
+        self._ack_lock = threading.Lock()
+        
+        self.set_scheduler(scheduler or MODE_SCHEDULERS[mode])
         
         self._sequence = 0
         self._sequence_lock = threading.Lock()
@@ -84,13 +147,24 @@ class DTPClient:
         
         self._packets_sent = 0
         self._packets_to_send = 0
+        self._datagrams_sent = 0
+        self._fragmented_sent = 0
     
     def set_mode(self, mode: ClientMode):
         self.mode = mode
-        if mode == ClientMode.DTP:
-            self._scheduler = DTPScheduler()
-        else:
-            self._scheduler = SimpleScheduler()
+        self.set_scheduler(MODE_SCHEDULERS[mode])
+    
+    def set_scheduler(self, name: str):
+        """Switch to the scheduling policy registered as `name`."""
+        scheduler = create_scheduler(name)
+        if self.drop_hopeless:
+            if not hasattr(scheduler, 'set_one_way_delay'):
+                raise ValueError(f"drop_hopeless is not supported by the {name!r} scheduler")
+            scheduler.set_one_way_delay(self.delay_estimator)
+        self._scheduler: Scheduler = scheduler
+        self.scheduler_name = name
+        # Only DTPScheduler batches; FIFO stays a plain per-packet baseline
+        self._batching = isinstance(scheduler, DTPScheduler)
     
     def set_profile(self, profile: TrafficProfile):
         self._profile = profile
@@ -101,6 +175,221 @@ class DTPClient:
     def set_on_packet_sent(self, callback: Callable):
         self._on_packet_sent = callback
     
+    def _generation_schedule(self) -> list:
+        """(offset ms, priority, flow) of every packet in the profile, spread over the run."""
+        simulation_duration_ms = 2000
+        flows = self._profile.flows
+        generation_schedule = []
+        for priority, count in self._profile.get_counts().items():
+            for i in range(count):
+                time_offset = random.uniform(0, simulation_duration_ms)
+                flow = i % flows if flows > 1 else None
+                generation_schedule.append((time_offset, priority, flow))
+        
+        generation_schedule.sort(key=lambda x: x[0])
+        return generation_schedule
+    
+    def _make_packet(self, priority: Priority) -> DTPPacket:
+        seq = self._next_sequence()
+        payload = f"DTP-{priority.name}-{seq}".encode()
+        packet = DTPPacket.create_data(
+            payload=payload,
+            priority=priority,
+            sequence=seq,
+            deadline_ms=priority.get_default_deadline_ms()
+        )
+        
+        if priority == Priority.LOW:
+            packet.header.flags |= Flags.DROPPABLE
+        elif self.drop_hopeless and seq % RTT_SAMPLE_INTERVAL == 0:
+            packet.header.flags |= Flags.RELIABLE
+        return packet
+    
+    @staticmethod
+    def _group_by_flow(due: list) -> dict:
+        """Packets of the (packet, flow) pairs in `due`, keyed by flow in generation order."""
+        groups = {}
+        for packet, flow in due:
+            groups.setdefault(flow, []).append(packet)
+        return groups
+    
+    def _generate_traffic(self) -> list:
+        packets = []
+        counts = self._profile.get_counts()
+        
+        for priority, count in counts.items():
+            for i in range(count):
+                packets.append(self._make_packet(priority))
+        
+        random.shuffle(packets)
+        return packets
+    
+    def _send_dequeued(self, batch: list) -> int:
+        """Send packets taken from the scheduler, routing bulk ones through its batcher; returns how many left."""
+        sent = 0
+        for packet in batch:
+            if self._batching and self._is_batchable(packet):
+                sent += self._send_batch(self._scheduler.add_to_batch(packet))
+            else:
+                self._send_packet(packet)
+                sent += 1
+        return sent
+    
+    def _send_packet(self, packet: DTPPacket):
+        try:
+            if self.compressor:
+                self.compressor.compress_packet(packet)
+            packet.header.version = self._wire_version
+            self._send_datagram(packet)
+        except Exception:
+            return
+        self._packet_left(packet)
+    
+    def _packet_left(self, packet: DTPPacket):
+        """Account for a packet that actually left: await its ACK and report it."""
+        if packet.header.flags & Flags.RELIABLE:
+            self._track_ack(packet.header.sequence)
+        if self._on_packet_sent:
+            try:
+                self._on_packet_sent(packet)
+            except Exception:
+                pass
+    
+    @staticmethod
+    def _is_batchable(packet: DTPPacket) -> bool:
+        """Only bulk traffic trades latency for fewer datagrams."""
+        return packet.header.priority == Priority.LOW or bool(packet.header.flags & Flags.DROPPABLE)
+    
+    def _send_batch(self, batch: Optional[list]) -> int:
+        """Send a flushed batch packed into as few MTU-sized datagrams as possible; returns how many left."""
+        if not batch:
+            return 0
+        
+        for packet in batch:
+            if self.compressor:
+                self.compressor.compress_packet(packet)
+            packet.header.version = self._wire_version
+        
+        batch_id = batch[0].header.batch_id
+        sent = 0
+        for group in DTPPacket.batch_groups(batch, self.mtu):
+            try:
+                self._send_datagram(DTPPacket.pack_group(group, batch_id))
+            except Exception:
+                continue
+            # Only members of a datagram that went out are reported or await an ACK
+            for packet in group:
+                self._packet_left(packet)
+            sent += len(group)
+        return sent
+    
+    def _send_datagram(self, packet: DTPPacket):
+        """Put one packet on the wire, fragmenting it if it exceeds the MTU."""
+        fragments = fragment_packet(packet, self.mtu)
+        if len(fragments) > 1:
+            self._fragmented_sent += 1
+        
+        for fragment in fragments:
+            size = fragment.serialize_into(self._send_buffer)
+            self._transmit(self._send_view[:size])
+            self._datagrams_sent += 1
+    
+    @abstractmethod
+    def _transmit(self, datagram: memoryview):
+        """Send one encoded datagram to the server."""
+    
+    def _handle_response(self, data: bytes):
+        try:
+            packet = DTPPacket.deserialize(data)
+            
+            if packet.header.packet_type == PacketType.CONGESTION:
+                self._scheduler.set_congested(True)
+                
+                if self._on_congestion:
+                    self._on_congestion(True)
+                
+                self._hold_congestion()
+                
+            elif packet.header.packet_type == PacketType.HELLO:
+                if packet.payload:
+                    self._wire_version = min(packet.payload[0], self.max_version)
+                if self._hello_sent_at is not None:
+                    self.delay_estimator.observe_rtt(now_ms() - self._hello_sent_at)
+                    self._hello_sent_at = None
+                self._version_negotiated.set()
+                
+            elif packet.header.packet_type == PacketType.ACK:
+                with self._ack_lock:
+                    sent_at = self._ack_pending.pop(packet.header.sequence, None)
+                if sent_at is not None:
+                    self.delay_estimator.observe_rtt(now_ms() - sent_at)
+                
+        except Exception:
+            pass
+    
+    @abstractmethod
+    def _hold_congestion(self):
+        """Arrange for _clear_congestion to run CONGESTION_HOLD_S after a CONGESTION signal."""
+    
+    def _track_ack(self, sequence: int):
+        sent_at = now_ms()
+        with self._ack_lock:
+            if len(self._ack_pending) >= ACK_PENDING_MAX:
+                del self._ack_pending[next(iter(self._ack_pending))]
+            self._ack_pending[sequence] = sent_at
+    
+    def _clear_congestion(self):
+        self._scheduler.set_congested(False)
+        if self._on_congestion:
+            self._on_congestion(False)
+    
+    def _next_sequence(self) -> int:
+        """Next sequence number, wrapping at the negotiated header's field width."""
+        mask = (1 << sequence_bits(self._wire_version)) - 1
+        with self._sequence_lock:
+            seq = self._sequence & mask
+            self._sequence = (seq + 1) & mask
+            return seq
+    
+    @property
+    def progress(self) -> float:
+        if self._packets_to_send == 0:
+            return 0.0
+        return self._packets_sent / self._packets_to_send
+    
+    @property
+    def is_running(self) -> bool:
+        return self._running
+    
+    def get_stats(self) -> dict:
+        return {
+            'mode': self.mode.value,
+            'policy': self.scheduler_name,
+            'header_version': self._wire_version,
+            'sent': self._packets_sent,
+            'datagrams': self._datagrams_sent,
+            'fragmented': self._fragmented_sent,
+            'total': self._packets_to_send,
+            'progress': round(self.progress * 100, 1),
+            'queue_size': self._scheduler.queue_size,
+            'scheduler': self._scheduler.get_stats(),
+            'delay': self.delay_estimator.get_stats(),
+            'compression': self.compressor.get_stats() if self.compressor else None
+        }
+
+
+class DTPClient(DTPClientBase):
+    """DTP Client that generates and sends traffic."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._version_negotiated = threading.Event()
+        
+        self._socket: Optional[socket.socket] = None
+        self._paused = False
+        self._send_thread: Optional[threading.Thread] = None
+        self._recv_thread: Optional[threading.Thread] = None
+    
     def start(self):
         if self._running:
             return
@@ -112,6 +401,28 @@ class DTPClient:
         
         self._recv_thread = threading.Thread(target=self._receive_loop, daemon=True)
         self._recv_thread.start()
+        
+        # The HELLO round trip is also the first delay sample
+        if self.max_version > DTP_VERSION or self.drop_hopeless:
+            self.negotiate_version()
+    
+    def negotiate_version(self, timeout: float = 0.5) -> int:
+        """
+        Offer max_version to the server and wait for its answer.
+        
+        Stays on v1 if the server does not answer (e.g. an older peer that
+        ignores HELLO), so mixed deployments keep working.
+        """
+        self._version_negotiated.clear()
+        try:
+            hello = DTPPacket.create_hello(self.max_version)
+            self._hello_sent_at = now_ms()
+            self._socket.sendto(hello.serialize(), (self.host, self.port))
+        except Exception:
+            return self._wire_version
+        
+        self._version_negotiated.wait(timeout)
+        return self._wire_version
     
     def stop(self):
         self._running = False
@@ -136,156 +447,94 @@ class DTPClient:
         self._send_thread.start()
     
     def _simulation_loop(self):
-        counts = self._profile.get_counts()
-        simulation_duration_ms = 2000
-        
-        generation_schedule = []
-        for priority, count in counts.items():
-            for i in range(count):
-                time_offset = random.uniform(0, simulation_duration_ms)
-                generation_schedule.append((time_offset, priority))
-        
-        generation_schedule.sort(key=lambda x: x[0])
+        generation_schedule = self._generation_schedule()
         
         sender_running = threading.Event()
         sender_running.set()
         packets_sent_counter = [0]
         
         def sender_loop():
-            empty_streak = 0
-            while sender_running.is_set() or self._scheduler.queue_size > 0:
+            scheduler = self._scheduler
+            while sender_running.is_set() or scheduler.queue_size > 0:
                 if self._paused:
                     time.sleep(0.01)
                     continue
                 
-                packet = self._scheduler.dequeue()
-                if packet:
-                    self._send_packet(packet)
-                    packets_sent_counter[0] += 1
-                    empty_streak = 0
-                    
-                    delay = 1.0 / self._scheduler.send_rate
-                    time.sleep(delay)
-                else:
-                    empty_streak += 1
-                    if empty_streak > 100 and not sender_running.is_set():
-                        break
-                    time.sleep(0.001)
+                # Wake up for the pending batch's flush time, not only on enqueue
+                timeout = SENDER_IDLE_TIMEOUT_S
+                if self._batching:
+                    flush_delay = scheduler.batch_flush_delay()
+                    if flush_delay is not None:
+                        timeout = min(timeout, flush_delay)
+                
+                send_rate = scheduler.send_rate
+                batch = scheduler.dequeue_batch(
+                    max(1, int(send_rate * SEND_QUANTUM_S)), timeout=timeout
+                )
+                datagrams = self._datagrams_sent
+                packets_sent_counter[0] += self._send_dequeued(batch)
+                if self._batching:
+                    packets_sent_counter[0] += self._send_batch(scheduler.flush_due_batch())
+                
+                # Pace by datagrams that went out: a packet held for a batch
+                # takes no slot until its batch leaves, and then shares the
+                # batch's datagram
+                datagrams = self._datagrams_sent - datagrams
+                if datagrams:
+                    time.sleep(datagrams / send_rate)
+            
+            packets_sent_counter[0] += self._send_batch(scheduler.flush_all())
         
         sender_thread = threading.Thread(target=sender_loop, daemon=True)
         sender_thread.start()
         
         start_time = now_ms()
         packet_index = 0
-        seq = 0
         
         while packet_index < len(generation_schedule) and self._running:
             current_time = now_ms() - start_time
+            due = []
             
             while packet_index < len(generation_schedule):
-                scheduled_time, priority = generation_schedule[packet_index]
+                scheduled_time, priority, flow = generation_schedule[packet_index]
                 
                 if scheduled_time > current_time:
                     break
                 
-                payload = f"DTP-{priority.name}-{seq}".encode()
-                packet = DTPPacket.create_data(
-                    payload=payload,
-                    priority=priority,
-                    sequence=seq,
-                    deadline_ms=priority.get_default_deadline_ms()
-                )
-                
-                if priority == Priority.LOW:
-                    packet.header.flags |= Flags.DROPPABLE
-                
-                self._scheduler.enqueue(packet)
+                packet = self._make_packet(priority)
+                due.append((packet, flow))
                 self.metrics.record_sent(packet)
                 
-                seq += 1
                 packet_index += 1
             
-            time.sleep(0.001)
+            for flow, packets in self._group_by_flow(due).items():
+                self._scheduler.enqueue_many(packets, flow)
+            
+            # Sleep until the next packet is due rather than ticking every ms
+            if packet_index < len(generation_schedule):
+                wait_ms = generation_schedule[packet_index][0] - (now_ms() - start_time)
+                time.sleep(min(max(wait_ms, 0) / 1000.0, GENERATOR_MAX_SLEEP_S))
         
-        self._scheduler.flush_all()
         sender_running.clear()
         sender_thread.join(timeout=10.0)
         
         self._packets_sent = packets_sent_counter[0]
-
-    def _generate_traffic(self) -> list:
-        packets = []
-        counts = self._profile.get_counts()
-        
-        for priority, count in counts.items():
-            for i in range(count):
-                seq = self._next_sequence()
-                payload = f"DTP-{priority.name}-{seq}".encode()
-                
-                packet = DTPPacket.create_data(
-                    payload=payload,
-                    priority=priority,
-                    sequence=seq,
-                    deadline_ms=priority.get_default_deadline_ms()
-                )
-                
-                if priority == Priority.LOW:
-                    packet.header.flags |= Flags.DROPPABLE
-                
-                packets.append(packet)
-        
-        random.shuffle(packets)
-        return packets
     
-    def _send_packet(self, packet: DTPPacket):
-        try:
-            data = packet.serialize()
-            self._socket.sendto(data, (self.host, self.port))
-            
-            if self._on_packet_sent:
-                self._on_packet_sent(packet)
-                
-        except Exception as e:
-            pass
+    def _transmit(self, datagram: memoryview):
+        self._socket.sendto(datagram, (self.host, self.port))
     
     def _receive_loop(self):
         while self._running:
             try:
-                data, addr = self._socket.recvfrom(2048)
+                data, addr = self._socket.recvfrom(DTP_RECV_BUFFER_SIZE)
                 self._handle_response(data)
             except socket.timeout:
                 continue
             except Exception:
                 pass
     
-    def _handle_response(self, data: bytes):
-        try:
-            packet = DTPPacket.deserialize(data)
-            
-            if packet.header.packet_type == PacketType.CONGESTION:
-                self._scheduler.set_congested(True)
-                
-                if self._on_congestion:
-                    self._on_congestion(True)
-                
-                threading.Timer(1.0, self._clear_congestion).start()
-                
-            elif packet.header.packet_type == PacketType.ACK:
-                pass
-                
-        except Exception:
-            pass
-    
-    def _clear_congestion(self):
-        self._scheduler.set_congested(False)
-        if self._on_congestion:
-            self._on_congestion(False)
-    
-    def _next_sequence(self) -> int:
-        with self._sequence_lock:
-            seq = self._sequence
-            self._sequence = (self._sequence + 1) % 65536
-            return seq
+    def _hold_congestion(self):
+        threading.Timer(CONGESTION_HOLD_S, self._clear_congestion).start()
     
     def pause(self):
         self._paused = True
@@ -293,26 +542,6 @@ class DTPClient:
     def resume(self):
         self._paused = False
     
-    @property
-    def progress(self) -> float:
-        if self._packets_to_send == 0:
-            return 0.0
-        return self._packets_sent / self._packets_to_send
-    
-    @property
-    def is_running(self) -> bool:
-        return self._running
-    
     @property
     def is_sending(self) -> bool:
         return self._send_thread is not None and self._send_thread.is_alive()
-    
-    def get_stats(self) -> dict:
-        return {
-            'mode': self.mode.value,
-            'sent': self._packets_sent,
-            'total': self._packets_to_send,
-            'progress': round(self.progress * 100, 1),
-            'queue_size': self._scheduler.queue_size,
-            'scheduler': self._scheduler.get_stats()
-        }
@@ -0,0 +1,187 @@
+"""
+DTP Payload Compression
+
+Implements the COMPRESSED flag:
+1. zlib (raw deflate) with a preset dictionary shared by client and server
+2. One dictionary per priority class, trained on that class's payloads
+3. Size threshold: only payloads above it are tried, and the compressed
+   form is only used when it is actually smaller
+
+The built-in dictionaries are trained on the traffic generator's payloads,
+which are shorter than the default threshold and so are sent as they are.
+An application with larger, repetitive payloads (e.g. telemetry records)
+installs dictionaries trained on its own samples with
+set_preset_dictionaries, or passes them to PayloadCompressor and
+decompress_payload; a preset dictionary lets even ~100 B payloads
+compress, which plain zlib cannot do.
+"""
+
+import zlib
+import threading
+from typing import Dict, Iterable, Optional
+
+# Priority values (kept as ints: this module must not import protocol)
+_CRITICAL, _HIGH, _MEDIUM, _LOW = 0, 1, 2, 3
+
+DEFAULT_THRESHOLD = 64
+DEFAULT_LEVEL = 6
+MAX_DECOMPRESSED_SIZE = 0xFFFF  # payload_length is a 16-bit field
+_WBITS = -15                    # raw deflate: no zlib header/checksum on the wire
+
+
+def build_dictionary(samples: Iterable[str], max_size: int = 4096) -> bytes:
+    """
+    Build a preset dictionary from representative payload samples.
+
+    zlib favours matches near the end of the dictionary, so the most
+    common samples are placed last.
+    """
+    counts: Dict[str, int] = {}
+    for sample in samples:
+        counts[sample] = counts.get(sample, 0) + 1
+
+    ordered = sorted(counts, key=lambda s: counts[s])
+    data = ''.join(ordered).encode()
+    return data[-max_size:]
+
+
+# Names of the priority classes, as used in the traffic generator's payloads
+_PRIORITY_NAMES = {_CRITICAL: 'CRITICAL', _HIGH: 'HIGH', _MEDIUM: 'MEDIUM', _LOW: 'LOW'}
+
+# Trained on what client._make_packet sends: f"DTP-{priority.name}-{seq}"
+PRESET_DICTIONARIES: Dict[int, bytes] = {
+    priority: build_dictionary(f"DTP-{name}-{seq}" for seq in range(0, 65536, 257))
+    for priority, name in _PRIORITY_NAMES.items()
+}
+
+
+def set_preset_dictionaries(dictionaries: Dict[int, bytes]):
+    """
+    Replace the preset dictionaries used whenever none are passed explicitly,
+    on the sending and the receiving side alike (both ends must install the
+    same ones). Build them with build_dictionary from the application's own
+    payload samples.
+    """
+    PRESET_DICTIONARIES.clear()
+    PRESET_DICTIONARIES.update(dictionaries)
+
+
+def compress_payload(payload: bytes, priority: int,
+                     level: int = DEFAULT_LEVEL,
+                     dictionaries: Optional[Dict[int, bytes]] = None) -> bytes:
+    """Compress a payload with the preset dictionary of its priority class."""
+    dictionaries = dictionaries if dictionaries is not None else PRESET_DICTIONARIES
+    zdict = dictionaries.get(int(priority))
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS)
+    return compressor.compress(payload) + compressor.flush()
+
+
+def decompress_payload(data: bytes, priority: int,
+                       dictionaries: Optional[Dict[int, bytes]] = None,
+                       max_size: int = MAX_DECOMPRESSED_SIZE) -> bytes:
+    """
+    Decompress a COMPRESSED payload.
+
+    Raises:
+        ValueError: if the data is corrupt or inflates beyond max_size
+    """
+    dictionaries = dictionaries if dictionaries is not None else PRESET_DICTIONARIES
+    zdict = dictionaries.get(int(priority))
+    try:
+        if zdict:
+            decompressor = zlib.decompressobj(_WBITS, zdict=zdict)
+        else:
+            decompressor = zlib.decompressobj(_WBITS)
+        payload = decompressor.decompress(data, max_size)
+    except zlib.error as e:
+        raise ValueError(f"Invalid compressed payload: {e}") from None
+
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"Decompressed payload exceeds {max_size} bytes")
+    return payload
+
+
+class PayloadCompressor:
+    """
+    Sender-side compression policy.
+
+    Usage:
+        compressor = PayloadCompressor(threshold=64)
+        compressor.compress_packet(packet)  # rewrites packet if compression wins
+    """
+
+    def __init__(self,
+                 threshold: int = DEFAULT_THRESHOLD,
+                 level: int = DEFAULT_LEVEL,
+                 priorities: Iterable[int] = (_MEDIUM, _LOW),
+                 dictionaries: Optional[Dict[int, bytes]] = None):
+        """
+        Args:
+            threshold: Minimum payload size (bytes) worth trying
+            level: zlib compression level
+            priorities: Priority classes eligible for compression
+            dictionaries: Preset dictionaries per priority (must match the receiver)
+        """
+        self.threshold = threshold
+        self.level = level
+        self.priorities = frozenset(int(p) for p in priorities)
+        self._dictionaries = dictionaries if dictionaries is not None else PRESET_DICTIONARIES
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._stats = {
+            'attempted': 0,
+            'compressed': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+        }
+
+    def compress_packet(self, packet) -> bool:
+        """
+        Compress a packet's payload in place if that makes it smaller.
+
+        The caller's packet is modified: its payload is replaced by the
+        compressed bytes and its header gets payload_length updated and
+        Flags.COMPRESSED set, so it is the form to put on the wire. Copy the
+        packet first (DTPPacket.deserialize(packet.serialize())) if the
+        original payload is still needed; the client compresses just before
+        sending, after the packet was recorded in the metrics.
+
+        Returns:
+            True if the packet now carries a COMPRESSED payload
+        """
+        from .protocol import Flags
+
+        header = packet.header
+        payload = packet.payload
+        size = len(payload)
+
+        if (header.flags & Flags.COMPRESSED or size < self.threshold
+                or int(header.priority) not in self.priorities):
+            return False
+
+        compressed = compress_payload(payload, header.priority, self.level, self._dictionaries)
+        won = len(compressed) < size
+
+        with self._lock:
+            self._stats['attempted'] += 1
+            self._stats['bytes_in'] += size
+            self._stats['bytes_out'] += len(compressed) if won else size
+            if won:
+                self._stats['compressed'] += 1
+
+        if not won:
+            return False
+
+        packet.payload = compressed
+        header.payload_length = len(compressed)
+        header.flags |= Flags.COMPRESSED
+        return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            ratio = self._stats['bytes_out'] / self._stats['bytes_in'] if self._stats['bytes_in'] else 1.0
+            return {**self._stats, 'ratio': round(ratio, 3)}
@@ -0,0 +1,374 @@
+"""
+DTP Flow Queueing
+
+Per-flow queues inside each priority class, in the spirit of fq_codel:
+1. Every packet belongs to a flow: the `flow` passed to enqueue (e.g. a
+   destination tuple or application stream id), else `flow_key(packet)`
+2. Classes are served in strict priority; inside a class, backlogged flows
+   take turns by deficit round robin over bytes, so a flow sending many or
+   large packets cannot crowd out the others of the same class
+3. A flow holds at most `flow_limit` packets; past that only its own new
+   packets are refused. When the whole queue is full, the least urgent
+   non-empty class loses the newest packet of its fattest flow (the
+   newcomer itself when its flow ties for fattest)
+4. Flows with nothing queued keep their counters until `max_flows` is
+   exceeded, then the least recently used idle flows are forgotten; the
+   flow table never exceeds max_flows plus the number of backlogged flows
+
+Flow ids are local to the sender: nothing is added to the wire header.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional
+
+from .protocol import DTPPacket, Priority
+from .timebase import coarse_now_ms
+from .scheduler import DRR_QUANTUM_BYTES, absolute_deadline, priority_class, register_scheduler, _wait
+
+
+def single_flow(packet: DTPPacket) -> Hashable:
+    """Default flow key: every packet without an explicit flow shares one flow."""
+    return None
+
+
+class _Flow:
+    """Queues and counters of one flow."""
+
+    __slots__ = ('key', 'queues', 'deficits', 'in_ring', 'size', 'sent', 'dropped')
+
+    def __init__(self, key: Hashable, num_classes: int):
+        self.key = key
+        self.queues: List[Deque[DTPPacket]] = [deque() for _ in range(num_classes)]
+        self.deficits = [0] * num_classes
+        self.in_ring = [False] * num_classes
+        self.size = 0
+        self.sent = 0
+        self.dropped = 0
+
+
+class FlowScheduler:
+    """
+    Usage:
+        scheduler = FlowScheduler(flow_limit=100, max_flows=10_000)
+        scheduler.enqueue(packet, flow=(host, port))
+        packet = scheduler.dequeue(timeout=0.05)
+    """
+
+    def __init__(self, queue_size: int = 1000, flow_limit: Optional[int] = None,
+                 max_flows: int = 1024,
+                 flow_key: Callable[[DTPPacket], Hashable] = single_flow,
+                 clock: Callable[[], int] = coarse_now_ms,
+                 num_classes: int = len(Priority),
+                 classifier: Callable[[DTPPacket], int] = priority_class,
+                 quantum: int = DRR_QUANTUM_BYTES):
+        """
+        Args:
+            queue_size: Packets queued across all flows
+            flow_limit: Packets one flow may queue (default: queue_size)
+            max_flows: Flow entries kept once idle flows can be reclaimed
+            flow_key: Flow of a packet enqueued without an explicit `flow`
+            clock: Millisecond clock used for deadline checks
+            num_classes: Number of strict-priority classes (class 0 first)
+            classifier: Maps a packet to its class
+            quantum: Bytes a flow may send per round-robin turn
+        """
+        if queue_size < 1 or max_flows < 1 or quantum < 1:
+            raise ValueError(f"queue_size, max_flows and quantum must be positive: "
+                             f"{queue_size}, {max_flows}, {quantum}")
+        if flow_limit is not None and flow_limit < 1:
+            raise ValueError(f"flow_limit must be positive: {flow_limit}")
+
+        self._max_size = queue_size
+        self._flow_limit = flow_limit or queue_size
+        self._max_flows = max_flows
+        self._flow_key = flow_key
+        self._clock = clock
+        self._num_classes = num_classes
+        self._classifier = classifier
+        self._quantum = quantum
+
+        self._flows: Dict[Hashable, _Flow] = {}
+        self._idle: 'OrderedDict[Hashable, _Flow]' = OrderedDict()  # least recently used first
+        # Per class, the flows with packets of that class in round-robin order;
+        # a flow emptied by an eviction is only dropped when its turn comes
+        self._rings: List[Deque[_Flow]] = [deque() for _ in range(num_classes)]
+        # Per class, backlogged flows by packets queued in that class, to find
+        # the fattest in O(1)
+        self._by_size: List[Dict[int, Dict[Hashable, _Flow]]] = [{} for _ in range(num_classes)]
+        self._fattest_size = [0] * num_classes
+        self._class_sizes = [0] * num_classes
+        self._occupied = 0  # bit c set <=> class c holds packets
+        self._size = 0
+        self._bytes = 0
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._send_rate = 500.0
+        self._congested = False
+
+        self._stats = {
+            'enqueued': 0,
+            'dequeued': 0,
+            'dropped_full': 0,
+            'dropped_flow_limit': 0,
+            'dropped_expired': 0,
+            'flows_reclaimed': 0
+        }
+
+    def enqueue(self, packet: DTPPacket, flow: Optional[Hashable] = None) -> bool:
+        """Add packet to its flow's queue (flow defaults to flow_key(packet))."""
+        with self._lock:
+            accepted = self._enqueue_locked(packet, flow, self._clock())
+            if accepted:
+                self._not_empty.notify()
+            return accepted
+
+    def enqueue_many(self, packets: List[DTPPacket], flow: Optional[Hashable] = None) -> int:
+        """Add several packets under a single lock acquisition; returns how many were accepted."""
+        with self._lock:
+            now = self._clock()
+            accepted = 0
+            for packet in packets:
+                accepted += self._enqueue_locked(packet, flow, now)
+            if accepted:
+                self._not_empty.notify(accepted)
+            return accepted
+
+    def _enqueue_locked(self, packet: DTPPacket, key: Optional[Hashable], now: int) -> bool:
+        if now > absolute_deadline(packet.header):
+            self._stats['dropped_expired'] += 1
+            return False
+
+        if key is None:
+            key = self._flow_key(packet)
+        flow = self._flows.get(key)
+        if flow is None:
+            flow = self._flows[key] = _Flow(key, self._num_classes)
+            self._reclaim()
+        if flow.size >= self._flow_limit:
+            flow.dropped += 1
+            self._stats['dropped_flow_limit'] += 1
+            return False
+
+        cls = self._classifier(packet)
+        if not flow.in_ring[cls]:
+            flow.in_ring[cls] = True
+            flow.deficits[cls] = self._quantum
+            self._rings[cls].append(flow)
+        flow.queues[cls].append(packet)
+        if flow.size == 0:
+            self._idle.pop(key, None)
+        self._resize(flow, cls, 1)
+        self._class_sizes[cls] += 1
+        self._occupied |= 1 << cls
+        self._size += 1
+        self._bytes += packet.wire_size
+
+        if self._size > self._max_size and self._evict(flow, cls) is packet:
+            return False
+        self._stats['enqueued'] += 1
+        return True
+
+    def _resize(self, flow: _Flow, cls: int, delta: int):
+        """
+        Change `flow.size` by one after its class `cls` queue changed, keeping
+        that class's size buckets and largest size current.
+        """
+        flow.size += delta
+        buckets = self._by_size[cls]
+        new = len(flow.queues[cls])
+        old = new - delta
+        if old:
+            bucket = buckets[old]
+            del bucket[flow.key]
+            if not bucket:
+                del buckets[old]
+        if new:
+            buckets.setdefault(new, {})[flow.key] = flow
+        if new > self._fattest_size[cls]:
+            self._fattest_size[cls] = new
+        elif old == self._fattest_size[cls] and old not in buckets:
+            self._fattest_size[cls] = new
+
+    def _evict(self, incoming: _Flow, incoming_cls: int) -> DTPPacket:
+        """
+        Drop the newest packet of the fattest flow in the least urgent
+        non-empty class; on a tie the incoming packet's flow loses, so a
+        newcomer never displaces an equally placed packet.
+        """
+        cls = self._occupied.bit_length() - 1
+        fattest = self._fattest_size[cls]
+        if cls == incoming_cls and len(incoming.queues[cls]) == fattest:
+            victim = incoming
+        else:
+            victim = next(iter(self._by_size[cls][fattest].values()))
+        packet = victim.queues[cls].pop()
+        self._release(victim, cls, packet)
+        victim.dropped += 1
+        self._stats['dropped_full'] += 1
+        return packet
+
+    def _release(self, flow: _Flow, cls: int, packet: DTPPacket):
+        """Account for `packet` leaving `flow`; its queue is already updated."""
+        self._resize(flow, cls, -1)
+        self._class_sizes[cls] -= 1
+        if not self._class_sizes[cls]:
+            self._occupied &= ~(1 << cls)
+            self._clear_ring(cls)
+        self._size -= 1
+        self._bytes -= packet.wire_size
+        if flow.size == 0:
+            self._idle[flow.key] = flow
+            self._reclaim()
+
+    def _reclaim(self):
+        """Forget least recently used idle flows beyond max_flows."""
+        while len(self._flows) > self._max_flows and self._idle:
+            key, _ = self._idle.popitem(last=False)
+            del self._flows[key]
+            self._stats['flows_reclaimed'] += 1
+
+    def _clear_ring(self, cls: int):
+        ring = self._rings[cls]
+        for flow in ring:
+            flow.in_ring[cls] = False
+        ring.clear()
+
+    def _pop(self, flow: _Flow, cls: int) -> DTPPacket:
+        """Pop the head of `flow`, which is at the front of its class ring."""
+        queue = flow.queues[cls]
+        packet = queue.popleft()
+        if not queue:
+            self._rings[cls].popleft()
+            flow.in_ring[cls] = False
+        self._release(flow, cls, packet)
+        return packet
+
+    def _dequeue_locked(self, now: int, max_bytes: Optional[int] = None) -> Optional[DTPPacket]:
+        """Pop the next live packet, or None if empty or the next one exceeds `max_bytes`."""
+        while self._occupied:
+            cls = (self._occupied & -self._occupied).bit_length() - 1
+            ring = self._rings[cls]
+            flow = ring[0]
+            if not flow.queues[cls]:
+                ring.popleft()
+                flow.in_ring[cls] = False
+                continue
+            packet = flow.queues[cls][0]
+
+            if now > absolute_deadline(packet.header):
+                self._pop(flow, cls)
+                self._stats['dropped_expired'] += 1
+                continue
+            if flow.deficits[cls] <= 0:
+                # Turn used up: top up the credit and move to the back of the ring
+                flow.deficits[cls] += self._quantum
+                ring.rotate(-1)
+                continue
+            if max_bytes is not None and packet.wire_size > max_bytes:
+                return None
+
+            self._pop(flow, cls)
+            flow.deficits[cls] -= packet.wire_size
+            flow.sent += 1
+            self._stats['dequeued'] += 1
+            return packet
+
+        return None
+
+    def dequeue(self, timeout: float = 0.0, max_bytes: Optional[int] = None) -> Optional[DTPPacket]:
+        """Get next packet to send, blocking up to `timeout` seconds (see DTPScheduler.dequeue)."""
+        until = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                packet = self._dequeue_locked(self._clock(), max_bytes)
+                if packet is not None or self._occupied or not _wait(self._not_empty, until):
+                    return packet
+
+    def dequeue_batch(self, max_n: int, max_bytes: Optional[int] = None,
+                      timeout: float = 0.0) -> List[DTPPacket]:
+        """Get up to `max_n` packets under a single lock acquisition (see DTPScheduler.dequeue_batch)."""
+        until = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = self._clock()
+                batch: List[DTPPacket] = []
+                budget = max_bytes
+                while len(batch) < max_n:
+                    packet = self._dequeue_locked(now, budget if batch else None)
+                    if packet is None:
+                        break
+                    batch.append(packet)
+                    if budget is not None:
+                        budget -= packet.wire_size
+                if batch or not _wait(self._not_empty, until):
+                    return batch
+
+    def flow_stats(self, flow: Hashable) -> Optional[dict]:
+        """Counters of `flow`, or None if it was never seen or has been reclaimed."""
+        with self._lock:
+            state = self._flows.get(flow)
+            if state is None:
+                return None
+            return {'queued': state.size, 'sent': state.sent, 'dropped': state.dropped}
+
+    def set_congested(self, congested: bool):
+        self._congested = congested
+        if congested:
+            self._send_rate = max(50, self._send_rate * 0.5)
+        else:
+            self._send_rate = min(1000, self._send_rate * 1.2)
+
+    def flush_all(self) -> List[DTPPacket]:
+        """Nothing is held back for batching."""
+        return []
+
+    def clear(self):
+        with self._lock:
+            for flow in self._flows.values():
+                if flow.size:
+                    for queue in flow.queues:
+                        queue.clear()
+                    flow.size = 0
+                    self._idle[flow.key] = flow
+            for cls in range(self._num_classes):
+                self._clear_ring(cls)
+            self._by_size = [{} for _ in range(self._num_classes)]
+            self._fattest_size = [0] * self._num_classes
+            self._class_sizes = [0] * self._num_classes
+            self._occupied = 0
+            self._size = 0
+            self._bytes = 0
+            self._reclaim()
+            self._not_empty.notify_all()
+
+    @property
+    def queue_size(self) -> int:
+        with self._lock:
+            return self._size
+
+    @property
+    def send_rate(self) -> float:
+        return self._send_rate
+
+    @property
+    def is_congested(self) -> bool:
+        return self._congested
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'flows': len(self._flows),
+                'active_flows': len(self._flows) - len(self._idle),
+                'queue_size': self._size,
+                'queue_by_class': list(self._class_sizes),
+                'queue_bytes': self._bytes,
+                'send_rate': self._send_rate,
+                'congested': self._congested
+            }
+
+
+register_scheduler('fq', FlowScheduler)
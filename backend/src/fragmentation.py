@@ -0,0 +1,282 @@
+"""
+DTP Fragmentation
+
+Transparent fragmentation of messages larger than the MTU:
+1. Each fragment is a DATA packet with the FRAGMENT flag that repeats the
+   message header (sequence, priority, timestamp, deadline, flags) and
+   prefixes its payload with index, count and total message length
+2. Reassembly state is keyed by (flow, sequence) and bounded both in the
+   fragment bytes actually held and in number of partial messages; a
+   fragment whose count, total and length disagree is rejected
+3. A partial message is evicted as soon as its deadline passes; under memory
+   pressure the partial closest to its deadline is evicted first
+
+Compression is applied to the whole message before fragmenting, so a
+COMPRESSED message is inflated only once it is complete.
+"""
+
+import heapq
+import itertools
+import struct
+import threading
+from dataclasses import replace
+from typing import Dict, Hashable, List, Optional
+
+from .protocol import DTPPacket, DTPHeader, Flags, DTP_DEFAULT_MTU
+from .compression import decompress_payload
+from .timebase import coarse_now_ms
+
+# Fragment payload prefix: index, count, total message length.
+FRAGMENT_STRUCT = struct.Struct('>HHI')
+
+MAX_FRAGMENTS = 0xFFFF
+MAX_MESSAGE_SIZE = 4 * 1024 * 1024
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_MESSAGES = 1024
+
+
+def fragment_packet(packet: DTPPacket, mtu: int = DTP_DEFAULT_MTU) -> List[DTPPacket]:
+    """
+    Split a packet into FRAGMENT packets whose datagrams fit in `mtu` bytes.
+
+    Returns [packet] unchanged when it already fits.
+
+    Raises:
+        ValueError: if the MTU leaves no room for payload or the message
+            needs more than MAX_FRAGMENTS fragments
+    """
+    if packet.wire_size <= mtu:
+        return [packet]
+
+    payload = packet.payload
+    # payload_length=mtu gives an upper bound on the (v2 varint) header size
+    template = replace(packet.header, flags=packet.header.flags | Flags.FRAGMENT,
+                       payload_length=mtu)
+    chunk = mtu - template.encoded_size - FRAGMENT_STRUCT.size
+    if chunk <= 0:
+        raise ValueError(f"MTU too small to fragment: {mtu}")
+
+    count = -(-len(payload) // chunk)
+    if count > MAX_FRAGMENTS:
+        raise ValueError(f"Message needs {count} fragments (max {MAX_FRAGMENTS})")
+
+    total = len(payload)
+    fragments = []
+    for index in range(count):
+        body = FRAGMENT_STRUCT.pack(index, count, total) + payload[index * chunk:(index + 1) * chunk]
+        fragments.append(DTPPacket(replace(template, payload_length=len(body)), body))
+    return fragments
+
+
+def _chunk_size(index: int, count: int, total: int, length: int) -> Optional[int]:
+    """
+    Fragment size implied by one fragment of a message, or None when the
+    fragment cannot belong to what fragment_packet produces for (count, total).
+    """
+    if length <= 0:
+        return None
+    if index < count - 1:
+        chunk = length
+    elif count == 1:
+        chunk = total
+    else:
+        chunk, rest = divmod(total - length, count - 1)
+        if rest or chunk < length:
+            return None
+    if chunk <= 0 or -(-total // chunk) != count:
+        return None
+    return chunk
+
+
+class _PartialMessage:
+    __slots__ = ('header', 'count', 'total_length', 'chunk', 'fragments', 'stored', 'expires_at')
+
+    def __init__(self, header: DTPHeader, count: int, total_length: int, chunk: int):
+        self.header = header
+        self.count = count
+        self.total_length = total_length
+        self.chunk = chunk
+        self.fragments: Dict[int, bytes] = {}
+        self.stored = 0
+        self.expires_at = header.timestamp + header.deadline if header.timestamp else float('inf')
+
+
+class ReassemblyBuffer:
+    """
+    Receive-side reassembly of FRAGMENT packets.
+
+    Usage:
+        buffer = ReassemblyBuffer()
+        message = buffer.add(packet, flow=addr)  # DTPPacket once complete, else None
+    """
+
+    def __init__(self,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_messages: int = DEFAULT_MAX_MESSAGES,
+                 max_message_size: int = MAX_MESSAGE_SIZE):
+        """
+        Args:
+            max_bytes: Memory budget, counted as the fragment bytes actually held
+            max_messages: Maximum number of partial messages held at once
+            max_message_size: Largest message accepted (before decompression)
+        """
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self.max_message_size = max_message_size
+
+        self._partials: Dict[tuple, _PartialMessage] = {}
+        # Min-heap of (expires_at, order, key, partial); stale entries are skipped
+        self._deadlines: list = []
+        self._order = itertools.count()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._stats = {
+            'fragments': 0,
+            'completed': 0,
+            'expired': 0,
+            'evicted': 0,
+            'duplicates': 0,
+            'rejected': 0,
+        }
+
+    def add(self, packet, flow: Hashable = None) -> Optional[DTPPacket]:
+        """
+        Add one FRAGMENT packet (DTPPacket or DTPPacketView).
+
+        Returns:
+            The reassembled message once every fragment has arrived, else None
+
+        Raises:
+            ValueError: if the fragment prefix is malformed
+        """
+        header = packet.header
+        body = packet.payload
+        if len(body) < FRAGMENT_STRUCT.size:
+            raise ValueError(f"Fragment too short: {len(body)}")
+        index, count, total = FRAGMENT_STRUCT.unpack_from(body)
+        if index >= count:
+            raise ValueError(f"Invalid fragment index {index} of {count}")
+        length = len(body) - FRAGMENT_STRUCT.size
+        chunk = _chunk_size(index, count, total, length)
+
+        key = (flow, header.sequence)
+        now = coarse_now_ms()
+
+        with self._lock:
+            self._stats['fragments'] += 1
+            self._evict_expired(now)
+
+            if chunk is None:
+                self._stats['rejected'] += 1
+                return None
+
+            partial = self._partials.get(key)
+            if partial is not None and (partial.count != count or partial.total_length != total
+                                        or partial.chunk != chunk):
+                # Sequence reused (wrapped) for a different message
+                self._discard(key, partial)
+                partial = None
+
+            if partial is None:
+                if header.is_expired():
+                    self._stats['expired'] += 1
+                    return None
+                if total > self.max_message_size or total > self.max_bytes:
+                    self._stats['rejected'] += 1
+                    return None
+                self._make_room(length, new=True)
+                partial = _PartialMessage(header, count, total, chunk)
+                self._partials[key] = partial
+                heapq.heappush(self._deadlines, (partial.expires_at, next(self._order), key, partial))
+            elif index in partial.fragments:
+                self._stats['duplicates'] += 1
+                return None
+            else:
+                self._make_room(length, new=False)
+                if self._partials.get(key) is not partial:
+                    # Evicted to make room for its own fragment
+                    return None
+
+            partial.fragments[index] = bytes(body[FRAGMENT_STRUCT.size:])
+            partial.stored += length
+            self._bytes += length
+            if len(partial.fragments) < partial.count:
+                return None
+
+            self._discard(key, partial)
+            self._stats['completed'] += 1
+
+        return self._assemble(partial)
+
+    def _assemble(self, partial: _PartialMessage) -> DTPPacket:
+        payload = b''.join(partial.fragments[index] for index in range(partial.count))
+        if len(payload) != partial.total_length:
+            raise ValueError(f"Reassembled {len(payload)} bytes, expected {partial.total_length}")
+
+        flags = partial.header.flags & ~Flags.FRAGMENT
+        if flags & Flags.COMPRESSED:
+            payload = decompress_payload(payload, partial.header.priority, max_size=self.max_message_size)
+            flags &= ~Flags.COMPRESSED
+
+        header = replace(partial.header, flags=flags, payload_length=len(payload))
+        return DTPPacket(header, payload)
+
+    def _discard(self, key: tuple, partial: _PartialMessage):
+        del self._partials[key]
+        self._bytes -= partial.stored
+
+    def _make_room(self, size: int, new: bool):
+        """
+        Evict the partials closest to their deadline until `size` more bytes
+        (and, when `new`, one more partial message) fit.
+        """
+        while self._partials and ((new and len(self._partials) >= self.max_messages)
+                                  or self._bytes + size > self.max_bytes):
+            _, _, key, partial = heapq.heappop(self._deadlines)
+            if self._partials.get(key) is partial:
+                self._discard(key, partial)
+                self._stats['evicted'] += 1
+
+    def _evict_expired(self, now: int):
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] < now:
+            _, _, key, partial = heapq.heappop(deadlines)
+            if self._partials.get(key) is partial:
+                self._discard(key, partial)
+                self._stats['expired'] += 1
+
+        # Completed messages leave stale heap entries behind; compact occasionally
+        if len(deadlines) > 2 * len(self._partials) + 64:
+            self._deadlines = [entry for entry in deadlines if self._partials.get(entry[2]) is entry[3]]
+            heapq.heapify(self._deadlines)
+
+    def evict_expired(self) -> int:
+        """Drop every partial message whose deadline has passed; returns how many."""
+        with self._lock:
+            before = self._stats['expired']
+            self._evict_expired(coarse_now_ms())
+            return self._stats['expired'] - before
+
+    @property
+    def pending(self) -> int:
+        return len(self._partials)
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._bytes
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'pending': len(self._partials),
+                'pending_bytes': self._bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._partials.clear()
+            self._deadlines.clear()
+            self._bytes = 0
@@ -270,6 +270,44 @@ class LogReader:
     def get_events_by_type(self, event_type: str) -> List[dict]:
         return [e for e in self.iter_events() if e.get('type') == event_type]
     
+    def get_headers(self, event_type: str = 'sent'):
+        """
+        Load packet events as a DTP header structured array (requires numpy).
+        
+        For 'recv' events the send timestamp is reconstructed from the
+        logged latency (clamped at 0) and the deadline is taken from the
+        'sent' event with the same sequence; rows without one keep
+        deadline 0. Feed the result to batch_codec.packets_from_headers to
+        replay a run.
+        """
+        import numpy as np
+        from .batch_codec import make_headers
+        
+        events = self.get_events_by_type(event_type)
+        headers = make_headers(len(events))
+        if not events:
+            return headers
+        
+        sequences = np.fromiter((e.get('seq', 0) for e in events), np.int64, len(events)) & 0xFFFF
+        headers['sequence'] = sequences
+        headers['priority'] = np.fromiter((Priority[e.get('pri', 'MEDIUM')] for e in events),
+                                          np.uint8, len(events))
+        timestamps = np.fromiter((e.get('ts', 0) - (e.get('latency') or 0) for e in events),
+                                 np.float64, len(events))
+        headers['timestamp'] = np.maximum(timestamps, 0)
+        headers['batch_id'] = np.fromiter((e.get('batch', 0) for e in events), np.uint16, len(events))
+        
+        if event_type == 'sent':
+            headers['deadline'] = np.fromiter((e.get('deadline', 0) for e in events),
+                                              np.uint64, len(events))
+        else:
+            sent_deadlines = {e.get('seq', 0) & 0xFFFF: e.get('deadline', 0)
+                              for e in self.get_events_by_type('sent')}
+            headers['deadline'] = np.fromiter((sent_deadlines.get(seq, 0) for seq in sequences.tolist()),
+                                              np.uint64, len(events))
+        
+        return headers
+    
     def get_latencies_by_priority(self) -> Dict[str, List[int]]:
         latencies: Dict[str, List[int]] = {}
         
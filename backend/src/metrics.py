@@ -15,7 +15,8 @@ from typing import Dict, List, Optional, Deque
 from collections import deque, defaultdict
 from statistics import mean, median, stdev
 
-from .protocol import DTPPacket, Priority, get_current_time_ms, now_ms
+from .protocol import DTPPacket, Priority, get_current_time_ms
+from .timebase import now_ms, coarse_now_ms, NS_PER_MS
 
 
 @dataclass
@@ -26,7 +27,7 @@ class PacketMetric:
     send_time: int      # ms
     receive_time: int   # ms
     deadline: int       # ms
-    latency: int        # ms
+    latency: float      # ms (sub-ms resolution when available)
     on_time: bool
     batch_id: int = 0
     dropped: bool = False
@@ -41,7 +42,7 @@ class PriorityStats:
     dropped_packets: int = 0
     on_time_packets: int = 0
     late_packets: int = 0
-    latencies: List[int] = field(default_factory=list)
+    latencies: List[float] = field(default_factory=list)
     
     @property
     def delivery_rate(self) -> float:
@@ -141,7 +142,7 @@ class MetricsCollector:
     def record_sent(self, packet: DTPPacket):
         """Record that a packet was sent"""
         with self._lock:
-            self._stats[packet.header.priority].total_packets += 1
+            self._stats[packet.priority].total_packets += 1
     
     def record_received(self, packet: DTPPacket):
         """Record that a packet was received"""
@@ -149,15 +150,22 @@ class MetricsCollector:
         if packet.receive_time is None:
             packet.mark_received()
         
+        # Precise latency (float ms) from the ns clock, falling back to ms
+        latency_ns = packet.latency_ns
+        if latency_ns is not None:
+            latency = round(latency_ns / NS_PER_MS, 3)
+        else:
+            latency = packet.latency_ms
+        
         with self._lock:
-            priority = packet.header.priority
+            priority = packet.priority
             stats = self._stats[priority]
             
             stats.received_packets += 1
             
             # Only record valid latencies
-            if packet.latency_ms is not None and packet.latency_ms >= 0:
-                stats.latencies.append(packet.latency_ms)
+            if latency is not None and latency >= 0:
+                stats.latencies.append(latency)
             
             on_time = packet.is_on_time()
             if on_time:
@@ -167,24 +175,25 @@ class MetricsCollector:
             
             # Record metric
             metric = PacketMetric(
-                sequence=packet.header.sequence,
+                sequence=packet.sequence,
                 priority=priority,
-                send_time=packet.header.timestamp,
+                send_time=packet.timestamp,
                 receive_time=packet.receive_time or 0,
-                deadline=packet.header.deadline,
-                latency=packet.latency_ms or 0,
+                deadline=packet.deadline,
+                latency=latency or 0,
                 on_time=on_time,
-                batch_id=packet.header.batch_id
+                batch_id=packet.batch_id
             )
             self._recent_packets.append(metric)
             
             # Update latency history
-            elapsed = now_ms() - self._start_time
-            if packet.latency_ms is not None and packet.latency_ms >= 0:
-                self._latency_history[priority].append((elapsed, packet.latency_ms))
+            current_time = coarse_now_ms()
+            elapsed = current_time - self._start_time
+            if latency is not None and latency >= 0:
+                self._latency_history[priority].append((elapsed, latency))
             
             # Update throughput (using monotonic time)
-            self._throughput_window.append(now_ms())
+            self._throughput_window.append(current_time)
             self._update_throughput()
             
             # Add event for received packet (sample 1 in 10 to not flood)
@@ -193,24 +202,24 @@ class MetricsCollector:
                     'time': elapsed,
                     'type': 'received',
                     'priority': priority.name,
-                    'sequence': packet.header.sequence,
-                    'latency': packet.latency_ms,
+                    'sequence': packet.sequence,
+                    'latency': latency,
                     'on_time': on_time
                 })
     
     def record_dropped(self, packet: DTPPacket, reason: str = "expired"):
         """Record that a packet was dropped"""
         with self._lock:
-            priority = packet.header.priority
+            priority = packet.priority
             self._stats[priority].dropped_packets += 1
             
             # Log event (using monotonic time)
-            elapsed = now_ms() - self._start_time
+            elapsed = coarse_now_ms() - self._start_time
             self._events.append({
                 'time': elapsed,
                 'type': 'dropped',
                 'priority': priority.name,
-                'sequence': packet.header.sequence,
+                'sequence': packet.sequence,
                 'reason': reason
             })
     
@@ -225,7 +234,7 @@ class MetricsCollector:
     
     def _update_throughput(self):
         """Calculate current throughput"""
-        current_time = now_ms()
+        current_time = coarse_now_ms()
         if current_time - self._last_throughput_calc < 100:  # Update every 100ms
             return
         
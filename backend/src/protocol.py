@@ -1,22 +1,81 @@
 """DTP Protocol - Deadline-aware Transport Protocol packet format and utilities."""
 
 import struct
-import time
 from enum import IntEnum
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, replace
+from typing import Iterator, List, Optional
+
+from .compression import decompress_payload
+from .timebase import now_ms, coarse_now_ms, monotonic_ns, NS_PER_MS
 
 DTP_VERSION = 1
+DTP_VERSION_COMPACT = 2
+DTP_MAX_VERSION = DTP_VERSION_COMPACT
 DTP_HEADER_SIZE = 24
+DTP_COMPACT_HEADER_MIN_SIZE = 12
 DTP_DEFAULT_PORT = 4433
 DTP_MAGIC = 0xDEAD
+DTP_MAX_DATAGRAM = 2048
+DTP_RECV_BUFFER_SIZE = 65535  # largest UDP datagram; never truncate on receive
+DTP_DEFAULT_MTU = 1400
+
+# Precompiled header layout: magic, version, type, priority, flags,
+# sequence, timestamp, deadline, payload_length, batch_id.
+HEADER_STRUCT = struct.Struct('>HBBBBHIQHH')
+
+# v2 (compact) fixed prefix: magic, version, type<<4 | priority, flags, timestamp.
+# It is followed by varint sequence, deadline and payload_length, and a varint
+# batch_id only when BATCHED is set. Magic and version sit at the same offsets
+# as in v1, so receivers dispatch on byte 2.
+COMPACT_PREFIX_STRUCT = struct.Struct('>HBBBI')
+
+# Header + payload layouts keyed by payload length, so a frame is encoded
+# in a single pack_into call instead of pack + slice copy.
+_frame_structs: dict = {}
+
+
+def _frame_struct(payload_length: int) -> struct.Struct:
+    frame = _frame_structs.get(payload_length)
+    if frame is None:
+        frame = struct.Struct(f'>HBBBBHIQHH{payload_length}s')
+        if payload_length <= DTP_MAX_DATAGRAM:
+            _frame_structs[payload_length] = frame
+    return frame
+
 
 _reference_time_ms: int = 0
 
 
-def now_ms() -> int:
-    """Get current time in milliseconds (monotonic)."""
-    return int(time.monotonic() * 1000)
+def _varint_size(value: int) -> int:
+    return max(1, (value.bit_length() + 6) // 7)
+
+
+def _append_varint(out: bytearray, value: int):
+    """Append an unsigned LEB128 varint."""
+    if value < 0:
+        raise ValueError(f"Varint must be unsigned: {value}")
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buffer, offset: int) -> tuple:
+    """Read an unsigned LEB128 varint, return (value, next_offset)."""
+    value = 0
+    shift = 0
+    end = len(buffer)
+    while True:
+        if offset >= end:
+            raise ValueError("Truncated varint")
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+        if shift > 63:
+            raise ValueError("Varint too long")
 
 
 def get_current_time_ms() -> int:
@@ -52,6 +111,8 @@ class PacketType(IntEnum):
     NACK = 2
     CONGESTION = 3
     KEEPALIVE = 4
+    BATCH = 5
+    HELLO = 6
 
 
 class Flags(IntEnum):
@@ -61,6 +122,29 @@ class Flags(IntEnum):
     BATCHED = 0x04
     COMPRESSED = 0x08
     ENCRYPTED = 0x10
+    FRAGMENT = 0x20
+
+
+# Batch container payload: repeated [u16 length][serialized member packet].
+BATCH_LENGTH_STRUCT = struct.Struct('>H')
+
+# Fixed v1 field offsets used by DTPPacketView for on-demand field decoding.
+_OFF_TYPE = 3
+_OFF_PRIORITY = 4
+_OFF_FLAGS = 5
+_SEQ_STRUCT = struct.Struct('>H')
+_OFF_SEQUENCE = 6
+_TIMESTAMP_STRUCT = struct.Struct('>I')
+_OFF_TIMESTAMP = 8
+_DEADLINE_STRUCT = struct.Struct('>Q')
+_OFF_DEADLINE = 12
+_BATCH_ID_STRUCT = struct.Struct('>H')
+_OFF_BATCH_ID = 22
+_MAGIC_BYTES = DTP_MAGIC.to_bytes(2, 'big')
+
+# Index lookups are much cheaper than calling the enum constructor per packet.
+_PRIORITIES = tuple(Priority)
+_PACKET_TYPES = tuple(PacketType)
 
 
 def get_priority_emoji(priority: Priority) -> str:
@@ -73,7 +157,7 @@ def get_priority_emoji(priority: Priority) -> str:
     return emojis.get(priority, "⚪")
 
 
-@dataclass
+@dataclass(slots=True)
 class DTPHeader:
     """DTP packet header."""
     version: int = DTP_VERSION
@@ -87,8 +171,9 @@ class DTPHeader:
     batch_id: int = 0
     
     def pack(self) -> bytes:
-        return struct.pack(
-            '>HBBBBHIQHH',
+        if self.version == DTP_VERSION_COMPACT:
+            return self._pack_compact()
+        return HEADER_STRUCT.pack(
             DTP_MAGIC,
             self.version,
             self.packet_type,
@@ -101,50 +186,139 @@ class DTPHeader:
             self.batch_id
         )
     
+    def pack_into(self, buffer, offset: int = 0) -> int:
+        """Encode header into a writable buffer, return bytes written."""
+        if self.version == DTP_VERSION_COMPACT:
+            data = self._pack_compact()
+            buffer[offset:offset + len(data)] = data
+            return len(data)
+        HEADER_STRUCT.pack_into(
+            buffer, offset,
+            DTP_MAGIC,
+            self.version,
+            self.packet_type,
+            self.priority,
+            self.flags,
+            self.sequence,
+            self.timestamp,
+            self.deadline,
+            self.payload_length,
+            self.batch_id
+        )
+        return DTP_HEADER_SIZE
+    
+    def _pack_compact(self) -> bytes:
+        out = bytearray(COMPACT_PREFIX_STRUCT.pack(
+            DTP_MAGIC,
+            DTP_VERSION_COMPACT,
+            (self.packet_type << 4) | self.priority,
+            self.flags,
+            self.timestamp
+        ))
+        _append_varint(out, self.sequence)
+        _append_varint(out, self.deadline)
+        _append_varint(out, self.payload_length)
+        if self.flags & Flags.BATCHED:
+            _append_varint(out, self.batch_id)
+        return bytes(out)
+    
+    @property
+    def encoded_size(self) -> int:
+        """Bytes this header occupies on the wire."""
+        if self.version != DTP_VERSION_COMPACT:
+            return DTP_HEADER_SIZE
+        size = (COMPACT_PREFIX_STRUCT.size + _varint_size(self.sequence) +
+                _varint_size(self.deadline) + _varint_size(self.payload_length))
+        if self.flags & Flags.BATCHED:
+            size += _varint_size(self.batch_id)
+        return size
+    
     @classmethod
     def unpack(cls, data: bytes) -> 'DTPHeader':
-        if len(data) < DTP_HEADER_SIZE:
-            raise ValueError(f"Header too short: {len(data)} < {DTP_HEADER_SIZE}")
+        return cls.unpack_from(data)
+    
+    @classmethod
+    def decode_from(cls, buffer, offset: int = 0) -> tuple:
+        """Decode a v1 or v2 header, return (header, header_size)."""
+        if len(buffer) - offset > 2 and buffer[offset + 2] == DTP_VERSION_COMPACT:
+            return cls._unpack_compact_from(buffer, offset)
+        return cls.unpack_from(buffer, offset), DTP_HEADER_SIZE
+    
+    @classmethod
+    def _unpack_compact_from(cls, buffer, offset: int = 0) -> tuple:
+        if len(buffer) - offset < DTP_COMPACT_HEADER_MIN_SIZE:
+            raise ValueError(f"Header too short: {len(buffer) - offset} < {DTP_COMPACT_HEADER_MIN_SIZE}")
         
-        magic, version, ptype, priority, flags, seq, ts, deadline, plen, batch = struct.unpack(
-            '>HBBBBHIQHH', data[:DTP_HEADER_SIZE]
-        )
+        magic, version, type_pri, flags, ts = COMPACT_PREFIX_STRUCT.unpack_from(buffer, offset)
+        if magic != DTP_MAGIC:
+            raise ValueError(f"Invalid magic: {magic:#x}")
+        
+        try:
+            packet_type = _PACKET_TYPES[type_pri >> 4]
+            priority = _PRIORITIES[type_pri & 0x0F]
+        except IndexError:
+            raise ValueError(f"Invalid type/priority: {type_pri >> 4}/{type_pri & 0x0F}") from None
+        
+        pos = offset + COMPACT_PREFIX_STRUCT.size
+        seq, pos = _read_varint(buffer, pos)
+        deadline, pos = _read_varint(buffer, pos)
+        plen, pos = _read_varint(buffer, pos)
+        batch = 0
+        if flags & Flags.BATCHED:
+            batch, pos = _read_varint(buffer, pos)
+        
+        header = cls(version, packet_type, priority, flags, seq, ts, deadline, plen, batch)
+        return header, pos - offset
+    
+    @classmethod
+    def unpack_from(cls, buffer, offset: int = 0) -> 'DTPHeader':
+        """Decode header from any buffer (bytes, bytearray, memoryview) without slicing."""
+        size = len(buffer) - offset
+        if size > 2 and buffer[offset + 2] == DTP_VERSION_COMPACT:
+            return cls._unpack_compact_from(buffer, offset)[0]
+        if size < DTP_HEADER_SIZE:
+            raise ValueError(f"Header too short: {size} < {DTP_HEADER_SIZE}")
+        
+        magic, version, ptype, priority, flags, seq, ts, deadline, plen, batch = \
+            HEADER_STRUCT.unpack_from(buffer, offset)
         
         if magic != DTP_MAGIC:
             raise ValueError(f"Invalid magic: {magic:#x}")
         
-        return cls(
-            version=version,
-            packet_type=PacketType(ptype),
-            priority=Priority(priority),
-            flags=flags,
-            sequence=seq,
-            timestamp=ts,
-            deadline=deadline,
-            payload_length=plen,
-            batch_id=batch
-        )
+        try:
+            packet_type = _PACKET_TYPES[ptype]
+            priority = _PRIORITIES[priority]
+        except IndexError:
+            raise ValueError(f"Invalid type/priority: {ptype}/{priority}") from None
+        
+        # Positional construction: field order matches the dataclass definition.
+        return cls(version, packet_type, priority, flags, seq, ts, deadline, plen, batch)
     
     def is_expired(self) -> bool:
         if self.timestamp == 0:
             return False
-        elapsed = now_ms() - self.timestamp
+        elapsed = coarse_now_ms() - self.timestamp
         return elapsed > self.deadline
     
     def time_to_deadline(self) -> int:
         if self.timestamp == 0:
             return self.deadline
-        elapsed = now_ms() - self.timestamp
+        elapsed = coarse_now_ms() - self.timestamp
         return max(0, self.deadline - elapsed)
 
 
 class DTPPacket:
     """Complete DTP packet with header and payload."""
     
+    __slots__ = ('header', 'payload', '_received_at', '_created_ns', '_received_ns')
+    
     def __init__(self, header: DTPHeader, payload: bytes = b''):
         self.header = header
         self.payload = payload
         self._received_at: Optional[int] = None
+        # Local high-resolution stamps; the wire timestamp is whole ms only.
+        self._created_ns: Optional[int] = None
+        self._received_ns: Optional[int] = None
     
     @classmethod
     def create_data(cls, payload: bytes, priority: Priority = Priority.MEDIUM,
@@ -152,15 +326,18 @@ class DTPPacket:
         if deadline_ms is None:
             deadline_ms = priority.get_default_deadline_ms()
         
+        created_ns = monotonic_ns()
         header = DTPHeader(
             packet_type=PacketType.DATA,
             priority=priority,
             sequence=sequence,
-            timestamp=now_ms(),
+            timestamp=created_ns // NS_PER_MS,
             deadline=deadline_ms,
             payload_length=len(payload)
         )
-        return cls(header, payload)
+        packet = cls(header, payload)
+        packet._created_ns = created_ns
+        return packet
     
     @classmethod
     def create_ack(cls, sequence: int, priority: Priority = Priority.MEDIUM) -> 'DTPPacket':
@@ -184,17 +361,132 @@ class DTPPacket:
         payload = struct.pack('>f', level)
         return cls(header, payload)
     
+    @classmethod
+    def create_batch(cls, packets: List['DTPPacket'], batch_id: int = 0) -> 'DTPPacket':
+        """
+        Wrap several packets into one BATCH container datagram.
+        
+        The container carries the most urgent member priority and the
+        earliest member deadline; members keep their own headers and are
+        handled individually by the receiver.
+        """
+        payload = bytearray()
+        for packet in packets:
+            payload += BATCH_LENGTH_STRUCT.pack(packet.wire_size)
+            payload += packet.serialize()
+        
+        urgent = min(packets, key=lambda p: (p.header.priority, p.header.timestamp + p.header.deadline))
+        header = DTPHeader(
+            version=packets[0].header.version,
+            packet_type=PacketType.BATCH,
+            priority=urgent.header.priority,
+            flags=Flags.BATCHED,
+            sequence=len(packets),
+            timestamp=urgent.header.timestamp,
+            deadline=urgent.header.deadline,
+            payload_length=len(payload),
+            batch_id=batch_id
+        )
+        return cls(header, bytes(payload))
+    
+    @staticmethod
+    def batch_groups(packets: List['DTPPacket'],
+                     mtu: int = DTP_DEFAULT_MTU) -> List[List['DTPPacket']]:
+        """Split a flushed batch into runs of members that fit one `mtu`-byte datagram."""
+        groups: List[List[DTPPacket]] = []
+        group: List[DTPPacket] = []
+        size = DTP_HEADER_SIZE
+        
+        for packet in packets:
+            member_size = BATCH_LENGTH_STRUCT.size + packet.wire_size
+            if group and size + member_size > mtu:
+                groups.append(group)
+                group, size = [], DTP_HEADER_SIZE
+            group.append(packet)
+            size += member_size
+        if group:
+            groups.append(group)
+        
+        return groups
+    
+    @classmethod
+    def pack_group(cls, group: List['DTPPacket'], batch_id: int = 0) -> 'DTPPacket':
+        """The datagram for one group of batch_groups: a BATCH container, or the packet itself when alone."""
+        return group[0] if len(group) == 1 else cls.create_batch(group, batch_id)
+    
+    @classmethod
+    def pack_batches(cls, packets: List['DTPPacket'], batch_id: int = 0,
+                     mtu: int = DTP_DEFAULT_MTU) -> List['DTPPacket']:
+        """
+        Pack a flushed batch into as few datagrams as fit in `mtu` bytes.
+        
+        Runs of members that fit together become one BATCH container; a
+        member that would sit alone (or is larger than the budget) is sent
+        as a plain packet.
+        """
+        return [cls.pack_group(group, batch_id) for group in cls.batch_groups(packets, mtu)]
+    
+    @classmethod
+    def create_hello(cls, max_version: int = DTP_MAX_VERSION) -> 'DTPPacket':
+        """Version negotiation: always sent as v1 so any peer can parse it."""
+        header = DTPHeader(
+            packet_type=PacketType.HELLO,
+            priority=Priority.CRITICAL,
+            timestamp=now_ms(),
+            payload_length=1
+        )
+        return cls(header, bytes([max_version]))
+    
     def serialize(self) -> bytes:
         return self.header.pack() + self.payload
     
+    @property
+    def wire_size(self) -> int:
+        return self.header.encoded_size + len(self.payload)
+    
+    def serialize_into(self, buffer, offset: int = 0) -> int:
+        """Encode header and payload into a caller-owned buffer, return bytes written."""
+        h = self.header
+        payload = self.payload
+        if h.version == DTP_VERSION_COMPACT:
+            end = offset + h.pack_into(buffer, offset)
+            buffer[end:end + len(payload)] = payload
+            return end + len(payload) - offset
+        frame = _frame_structs.get(len(payload)) or _frame_struct(len(payload))
+        frame.pack_into(
+            buffer, offset,
+            DTP_MAGIC, h.version, h.packet_type, h.priority, h.flags, h.sequence,
+            h.timestamp, h.deadline, h.payload_length, h.batch_id, payload
+        )
+        return frame.size
+    
     @classmethod
-    def deserialize(cls, data: bytes) -> 'DTPPacket':
-        header = DTPHeader.unpack(data)
-        payload = data[DTP_HEADER_SIZE:DTP_HEADER_SIZE + header.payload_length]
+    def deserialize(cls, data) -> 'DTPPacket':
+        """Decode a datagram; accepts bytes or a memoryview over a receive buffer.
+        
+        The header is decoded in place, only the payload is copied out so the
+        caller may reuse its receive buffer. COMPRESSED payloads are inflated
+        and the flag cleared, so callers always see the original payload.
+        """
+        header, start = DTPHeader.decode_from(data)
+        end = start + header.payload_length
+        if isinstance(data, bytes):
+            payload = data[start:end]
+        else:
+            payload = bytes(memoryview(data)[start:end])
+        
+        # A fragment carries a slice of the compressed message; it is
+        # inflated only after reassembly.
+        if header.flags & Flags.COMPRESSED and not header.flags & Flags.FRAGMENT:
+            payload = decompress_payload(payload, header.priority)
+            header.flags &= ~Flags.COMPRESSED
+            header.payload_length = len(payload)
+        
         return cls(header, payload)
     
     def mark_received(self):
-        self._received_at = now_ms()
+        self._received_ns = monotonic_ns()
+        self._received_at = self._received_ns // NS_PER_MS
     
     @property
     def receive_time(self) -> Optional[int]:
@@ -207,6 +499,53 @@ class DTPPacket:
             return None
         return self._received_at - self.header.timestamp
     
+    @property
+    def latency_ns(self) -> Optional[int]:
+        """Sub-ms latency, only known when the packet was created in this process."""
+        if self._received_ns is None or self._created_ns is None:
+            return None
+        return self._received_ns - self._created_ns
+    
+    # Field accessors shared with DTPPacketView, so receive paths (e.g. a
+    # reassembled message) can take either type.
+    @property
+    def version(self) -> int:
+        return self.header.version
+    
+    @property
+    def priority(self) -> Priority:
+        return self.header.priority
+    
+    @property
+    def packet_type(self) -> PacketType:
+        return self.header.packet_type
+    
+    @property
+    def flags(self) -> int:
+        return self.header.flags
+    
+    @property
+    def sequence(self) -> int:
+        return self.header.sequence
+    
+    @property
+    def timestamp(self) -> int:
+        return self.header.timestamp
+    
+    @property
+    def deadline(self) -> int:
+        return self.header.deadline
+    
+    @property
+    def batch_id(self) -> int:
+        return self.header.batch_id
+    
+    def is_expired(self) -> bool:
+        return self.header.is_expired()
+    
+    def time_to_deadline(self) -> int:
+        return self.header.time_to_deadline()
+    
     def is_on_time(self) -> bool:
         lat = self.latency_ms
         if lat is None:
@@ -217,3 +556,175 @@ class DTPPacket:
         return (f"DTPPacket(seq={self.header.sequence}, "
                 f"pri={self.header.priority.name}, "
                 f"deadline={self.header.deadline}ms)")
+
+
+def iter_batch_frames(payload: bytes) -> Iterator[bytes]:
+    """Yield the serialized member packets of a BATCH container payload."""
+    offset = 0
+    end = len(payload)
+    while offset + BATCH_LENGTH_STRUCT.size <= end:
+        (length,) = BATCH_LENGTH_STRUCT.unpack_from(payload, offset)
+        offset += BATCH_LENGTH_STRUCT.size
+        if offset + length > end:
+            raise ValueError(f"Truncated batch member: {length} > {end - offset}")
+        yield payload[offset:offset + length]
+        offset += length
+
+
+class DTPPacketView:
+    """
+    Lazily-decoded packet backed by the raw datagram.
+    
+    Keeps the received bytes and decodes individual fields on access, so
+    paths that only look at priority/deadline (expiry checks, drops) never
+    build a DTPHeader. `header` and `payload` are materialised on first use
+    and cached; the rest of the DTPPacket surface is supported.
+    """
+    
+    __slots__ = ('_buffer', '_header', '_header_size', '_payload', '_received_at', '_received_ns')
+    
+    def __init__(self, data: bytes):
+        if len(data) < DTP_COMPACT_HEADER_MIN_SIZE:
+            raise ValueError(f"Header too short: {len(data)} < {DTP_COMPACT_HEADER_MIN_SIZE}")
+        if data[:2] != _MAGIC_BYTES:
+            raise ValueError(f"Invalid magic: {int.from_bytes(data[:2], 'big'):#x}")
+        self._buffer = data
+        self._header: Optional[DTPHeader] = None
+        self._header_size = DTP_HEADER_SIZE
+        self._payload: Optional[bytes] = None
+        self._received_at: Optional[int] = None
+        self._received_ns: Optional[int] = None
+        
+        # Field offsets are only fixed in v1; compact headers decode eagerly.
+        if data[2] != DTP_VERSION:
+            self._header, self._header_size = DTPHeader.decode_from(data)
+        elif len(data) < DTP_HEADER_SIZE:
+            raise ValueError(f"Header too short: {len(data)} < {DTP_HEADER_SIZE}")
+    
+    @classmethod
+    def from_buffer(cls, data) -> 'DTPPacketView':
+        """Build a view over a private copy of `data` (e.g. a reusable receive buffer)."""
+        return cls(bytes(data))
+    
+    @property
+    def header(self) -> DTPHeader:
+        if self._header is None:
+            self._header = DTPHeader.unpack_from(self._buffer)
+        return self._header
+    
+    @property
+    def payload(self) -> bytes:
+        """Original payload (inflated if it travelled COMPRESSED)."""
+        if self._payload is None:
+            header = self.header
+            start = self._header_size
+            payload = self._buffer[start:start + header.payload_length]
+            if header.flags & Flags.COMPRESSED and not header.flags & Flags.FRAGMENT:
+                payload = decompress_payload(payload, header.priority)
+            self._payload = payload
+        return self._payload
+    
+    @property
+    def version(self) -> int:
+        return self._buffer[2]
+    
+    @property
+    def priority(self) -> Priority:
+        if self._header is not None:
+            return self._header.priority
+        try:
+            return _PRIORITIES[self._buffer[_OFF_PRIORITY]]
+        except IndexError:
+            raise ValueError(f"Invalid priority: {self._buffer[_OFF_PRIORITY]}") from None
+    
+    @property
+    def packet_type(self) -> PacketType:
+        if self._header is not None:
+            return self._header.packet_type
+        return _PACKET_TYPES[self._buffer[_OFF_TYPE]]
+    
+    @property
+    def flags(self) -> int:
+        if self._header is not None:
+            return self._header.flags
+        return self._buffer[_OFF_FLAGS]
+    
+    @property
+    def sequence(self) -> int:
+        if self._header is not None:
+            return self._header.sequence
+        return _SEQ_STRUCT.unpack_from(self._buffer, _OFF_SEQUENCE)[0]
+    
+    @property
+    def timestamp(self) -> int:
+        if self._header is not None:
+            return self._header.timestamp
+        return _TIMESTAMP_STRUCT.unpack_from(self._buffer, _OFF_TIMESTAMP)[0]
+    
+    @property
+    def deadline(self) -> int:
+        if self._header is not None:
+            return self._header.deadline
+        return _DEADLINE_STRUCT.unpack_from(self._buffer, _OFF_DEADLINE)[0]
+    
+    @property
+    def batch_id(self) -> int:
+        if self._header is not None:
+            return self._header.batch_id
+        return _BATCH_ID_STRUCT.unpack_from(self._buffer, _OFF_BATCH_ID)[0]
+    
+    def is_expired(self) -> bool:
+        timestamp = self.timestamp
+        if timestamp == 0:
+            return False
+        return coarse_now_ms() - timestamp > self.deadline
+    
+    def time_to_deadline(self) -> int:
+        timestamp = self.timestamp
+        if timestamp == 0:
+            return self.deadline
+        return max(0, self.deadline - (coarse_now_ms() - timestamp))
+    
+    def to_packet(self) -> DTPPacket:
+        payload = self.payload
+        header = replace(self.header, flags=self.header.flags & ~Flags.COMPRESSED,
+                         payload_length=len(payload))
+        packet = DTPPacket(header, payload)
+        packet._received_at = self._received_at
+        packet._received_ns = self._received_ns
+        return packet
+    
+    def serialize(self) -> bytes:
+        """Wire bytes of the datagram as received."""
+        return self._buffer[:self._header_size + self.header.payload_length]
+    
+    def mark_received(self):
+        self._received_ns = monotonic_ns()
+        self._received_at = self._received_ns // NS_PER_MS
+    
+    @property
+    def receive_time(self) -> Optional[int]:
+        return self._received_at
+    
+    @property
+    def latency_ms(self) -> Optional[int]:
+        timestamp = self.timestamp
+        if self._received_at is None or timestamp == 0:
+            return None
+        return self._received_at - timestamp
+    
+    @property
+    def latency_ns(self) -> Optional[int]:
+        """Always None: a received datagram only carries a whole-ms send time."""
+        return None
+    
+    def is_on_time(self) -> bool:
+        lat = self.latency_ms
+        if lat is None:
+            return True
+        return lat <= self.deadline
+    
+    def __repr__(self):
+        return (f"DTPPacketView(seq={self.sequence}, "
+                f"pri={self.priority.name}, "
+                f"deadline={self.deadline}ms)")
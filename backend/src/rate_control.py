@@ -5,6 +5,7 @@ Implements:
 1. Token Bucket for admission control (limits CRITICAL/HIGH burst)
 2. Congestion control with multiplicative decrease on loss
 3. Pacing for smooth transmission
+4. One-way delay estimation, so schedulers can drop packets that cannot arrive in time
 
 This prevents:
 - DoS from CRITICAL traffic floods
@@ -18,7 +19,9 @@ from dataclasses import dataclass, field
 from typing import Dict, Optional, Callable
 from collections import defaultdict
 
-from .protocol import Priority, now_ms
+from .protocol import Priority
+from .timebase import now_ms, coarse_now_ms, precise_ms, monotonic_ns
+from .clock_sync import ClockSyncResult
 
 
 @dataclass
@@ -57,7 +60,7 @@ class TokenBucket:
         self.rate = rate
         self.burst = burst
         self._tokens = initial if initial is not None else burst
-        self._last_update = now_ms()
+        self._last_update_ns = monotonic_ns()
         self._lock = threading.Lock()
         
         # Statistics
@@ -65,15 +68,15 @@ class TokenBucket:
         self._total_rejected = 0
     
     def _refill(self):
-        """Refill tokens based on elapsed time"""
-        current_time = now_ms()
-        elapsed_ms = current_time - self._last_update
+        """Refill tokens based on elapsed time (ns resolution, no sub-ms loss)"""
+        current_time = monotonic_ns()
+        elapsed_ns = current_time - self._last_update_ns
         
-        if elapsed_ms > 0:
+        if elapsed_ns > 0:
             # Add tokens based on elapsed time
-            new_tokens = (elapsed_ms / 1000.0) * self.rate
+            new_tokens = (elapsed_ns / 1e9) * self.rate
             self._tokens = min(self.burst, self._tokens + new_tokens)
-            self._last_update = current_time
+            self._last_update_ns = current_time
     
     def consume(self, tokens: int = 1) -> bool:
         """
@@ -144,7 +147,7 @@ class TokenBucket:
         """Reset bucket to full"""
         with self._lock:
             self._tokens = self.burst
-            self._last_update = now_ms()
+            self._last_update_ns = monotonic_ns()
 
 
 class AdmissionController:
@@ -283,7 +286,7 @@ class CongestionController:
         self._sent_count = 0
         self._ack_count = 0
         self._loss_count = 0
-        self._window_start = now_ms()
+        self._window_start = coarse_now_ms()
         self._window_size_ms = 1000  # 1 second window
         
         # State
@@ -349,7 +352,7 @@ class CongestionController:
         """Called on RTO timeout (major congestion signal)"""
         with self._lock:
             # More aggressive decrease on timeout
-            current_time = now_ms()
+            current_time = coarse_now_ms()
             if current_time - self._last_decrease_time > self._decrease_cooldown_ms:
                 self._current_rate = max(
                     self.min_rate,
@@ -370,7 +373,7 @@ class CongestionController:
     
     def _check_and_decrease(self):
         """Check loss rate and apply multiplicative decrease if needed"""
-        current_time = now_ms()
+        current_time = coarse_now_ms()
         
         # Check window
         if current_time - self._window_start >= self._window_size_ms:
@@ -469,13 +472,13 @@ class Pacer:
             Actual wait time in milliseconds
         """
         with self._lock:
-            current_time = now_ms()
+            current_time = precise_ms()
             time_since_last = current_time - self._last_send_time
             
             if time_since_last < self._interval_ms:
                 wait_ms = self._interval_ms - time_since_last
                 time.sleep(wait_ms / 1000.0)
-                self._last_send_time = now_ms()
+                self._last_send_time = precise_ms()
                 return wait_ms
             else:
                 self._last_send_time = current_time
@@ -490,3 +493,61 @@ class Pacer:
     @property
     def rate(self) -> float:
         return self._rate
+
+
+class DelayEstimator:
+    """
+    Online one-way delay estimate from round-trip samples.
+    
+    Round trips (ACKs, HELLO, clock sync) are smoothed as in TCP's SRTT
+    (RFC 6298, gain 1/8); the one-way delay is taken as half the smoothed
+    round trip. Reads as 0 until the first sample.
+    
+    Usage:
+        estimator = DelayEstimator()
+        estimator.observe_rtt(now - sent_at)
+        scheduler = DTPScheduler(one_way_delay=estimator)
+    """
+    
+    def __init__(self, gain: float = 0.125):
+        """
+        Args:
+            gain: Weight of each new sample in the smoothed round trip
+        """
+        if not 0 < gain <= 1:
+            raise ValueError(f"gain must be in (0, 1]: {gain}")
+        self.gain = gain
+        self._srtt_ms: Optional[float] = None
+        self._samples = 0
+    
+    def observe_rtt(self, rtt_ms: float):
+        """Fold one round-trip sample (ms) into the estimate; negative samples are ignored."""
+        if rtt_ms < 0:
+            return
+        if self._srtt_ms is None:
+            self._srtt_ms = float(rtt_ms)
+        else:
+            self._srtt_ms += self.gain * (rtt_ms - self._srtt_ms)
+        self._samples += 1
+    
+    def observe_sync(self, result: ClockSyncResult):
+        """Seed from a clock synchronization, whose median round trip is one sample."""
+        self.observe_rtt(result.rtt_ms)
+    
+    @property
+    def one_way_ms(self) -> float:
+        return 0.0 if self._srtt_ms is None else self._srtt_ms / 2
+    
+    def __call__(self) -> float:
+        return self.one_way_ms
+    
+    def get_stats(self) -> dict:
+        return {
+            'srtt_ms': self._srtt_ms,
+            'one_way_ms': self.one_way_ms,
+            'samples': self._samples,
+        }
+    
+    def reset(self):
+        self._srtt_ms = None
+        self._samples = 0
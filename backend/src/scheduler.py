@@ -3,18 +3,73 @@
 import threading
 import heapq
 import time
-from typing import Optional, List, Dict
+from enum import Enum
+from collections import deque
+from typing import Callable, Deque, Hashable, Optional, List, Dict, Sequence, Tuple, Protocol, runtime_checkable
 from dataclasses import dataclass, field
 
-from .protocol import DTPPacket, Priority, Flags, now_ms
+from .protocol import DTPPacket, Priority, Flags, DTP_DEFAULT_MTU
+from .timebase import coarse_now_ms
+from .timing_wheel import TimingWheel
+from .aqm import CoDel, CoDelConfig
 
 
-@dataclass(order=True)
+class OrderingMode(Enum):
+    """Queue ordering used by DTPScheduler."""
+    PRIORITY_EDF = "priority_edf"   # strict priority, earliest absolute deadline within a class
+    EDF = "edf"                     # earliest absolute deadline across all classes
+    LEGACY_SLACK = "legacy_slack"   # original key: priority, then -time_to_deadline at enqueue
+    DRR = "drr"                     # deficit round robin across classes, EDF within a class
+    LLF = "llf"                     # least laxity: deadline minus estimated transmit time, across classes
+
+
+# DRR credit granted per unit of class weight on each round; at least one
+# full-MTU packet so every visit to a backlogged class sends something.
+DRR_QUANTUM_BYTES = DTP_DEFAULT_MTU
+
+# A pending batch is flushed at least this long before its most urgent
+# packet's deadline.
+BATCH_DEADLINE_GUARD_MS = 10
+
+
+# Packets without a timestamp never expire; they sort after every deadline.
+_NO_DEADLINE = float('inf')
+
+
+def absolute_deadline(header) -> float:
+    """Absolute deadline (ms, sender clock) of a header: timestamp + deadline."""
+    if header.timestamp == 0:
+        return _NO_DEADLINE
+    return header.timestamp + header.deadline
+
+
+@dataclass(order=True, slots=True)
 class QueueEntry:
     """Entry in the priority queue."""
     sort_key: tuple = field(compare=True)
     packet: DTPPacket = field(compare=False)
     enqueue_time: int = field(compare=False)
+    removed: bool = field(default=False, compare=False)
+    queue_class: int = field(default=0, compare=False)
+    size: int = field(default=0, compare=False)
+
+
+def _is_removed(entry: QueueEntry) -> bool:
+    return entry.removed
+
+
+def _wait(condition: threading.Condition, until: float) -> bool:
+    """Wait on `condition` (lock held) until notified or `until` (monotonic s); False once past it."""
+    remaining = until - time.monotonic()
+    if remaining <= 0:
+        return False
+    condition.wait(remaining)
+    return True
+
+
+def priority_class(packet: DTPPacket) -> int:
+    """Default classifier: one scheduling class per Priority value."""
+    return packet.header.priority.value
 
 
 class DTPScheduler:
@@ -23,19 +78,123 @@ class DTPScheduler:
     
     Packets are scheduled based on:
     1. Priority (CRITICAL > HIGH > MEDIUM > LOW)
-    2. Time to deadline (urgent packets first)
+    2. Absolute deadline, timestamp + deadline (urgent packets first)
     3. Arrival order (FIFO within same urgency)
+    
+    The key is fixed at enqueue but never goes stale: an absolute deadline
+    orders the same way at any later time. OrderingMode.EDF drops step 1 and
+    orders every class by deadline alone; OrderingMode.LLF does the same with
+    the deadline less the estimated transmit time at the send rate at
+    enqueue; OrderingMode.LEGACY_SLACK keeps the original
+    (priority, -time_to_deadline) key for comparison.
+    
+    Each class has its own deadline heap and a bitmap records which classes
+    hold live packets, so picking the next class is a lowest-set-bit lookup.
+    `classifier` maps a packet to one of `num_classes` classes (class 0 is
+    served first); the default uses the Priority value.
+    
+    When full, the latest-deadline packet of the lowest non-empty class is
+    evicted in O(log n) through a per-class eviction heap over the same
+    entries; entries leaving either heap are tombstoned (`removed`) and
+    skipped by the other. Besides the `queue_size` packet cap, `max_bytes`
+    and `class_max_bytes` bound queued wire bytes overall and per class;
+    a large packet may evict several smaller ones, but only ones it
+    outranks, otherwise it is rejected and nothing is evicted.
+    
+    With `proactive_expiry`, a timing wheel indexes every packet by deadline
+    and removes it the moment the deadline passes, so dead packets neither
+    hold capacity nor count towards queue_size.
+    
+    In DRR mode classes are served by deficit round robin instead of strict
+    priority: each round visits the backlogged classes in class order, and a
+    visited class earns `weights[c]` quanta of DRR_QUANTUM_BYTES and sends
+    head packets while its credit lasts. With
+    every class backlogged, class c gets weights[c] / sum(weights) of the
+    bytes sent, and waits at most one round of the other classes' quanta
+    between services, so no class starves. Weights default to
+    num_classes - c (4:3:2:1 for the four priorities).
+    
+    With `feasibility_admission`, enqueue rejects a packet whose estimated
+    completion (the queued packets that would be sent before it plus its
+    own transmit time, at the current send rate) already falls after its
+    deadline, instead of letting it occupy the queue until it expires.
+    Packets ahead are bounded from the per-class counts in O(classes): a
+    class whose head sorts after the packet contributes none, any other
+    class all of its packets, which is exact when the packet sorts last in
+    its class (the usual case with per-priority deadlines).
+    
+    `aqm` maps classes to a CoDelConfig; those classes drop head packets at
+    dequeue once their sojourn time stays above the target for an interval,
+    so a standing queue cannot build up behind the hard `queue_size` cap.
+    
+    `one_way_delay` returns the current one-way delay estimate in ms (e.g.
+    a rate_control.DelayEstimator); when set, dequeue drops a packet whose
+    time to deadline is below it, since it would arrive late anyway.
     """
     
-    def __init__(self, queue_size: int = 1000, batch_size: int = 10, batch_timeout_ms: int = 50):
-        self._queue: List[QueueEntry] = []
+    def __init__(self, queue_size: int = 1000, batch_size: int = 10, batch_timeout_ms: int = 50,
+                 ordering: OrderingMode = OrderingMode.PRIORITY_EDF,
+                 clock: Callable[[], int] = coarse_now_ms,
+                 num_classes: int = len(Priority),
+                 classifier: Callable[[DTPPacket], int] = priority_class,
+                 proactive_expiry: bool = True,
+                 weights: Optional[Sequence[int]] = None,
+                 feasibility_admission: bool = False,
+                 aqm: Optional[Dict[int, CoDelConfig]] = None,
+                 max_bytes: Optional[int] = None,
+                 class_max_bytes: Optional[Dict[int, int]] = None,
+                 one_way_delay: Optional[Callable[[], float]] = None):
+        if num_classes < 1:
+            raise ValueError(f"num_classes must be positive: {num_classes}")
+        if weights is None:
+            weights = [num_classes - cls for cls in range(num_classes)]
+        if len(weights) != num_classes or any(w <= 0 for w in weights):
+            raise ValueError(f"weights must be {num_classes} positive values: {list(weights)}")
+        
+        self._num_classes = num_classes
+        self._classifier = classifier
+        self._queues: List[List[QueueEntry]] = [[] for _ in range(num_classes)]
+        self._victims: List[List[tuple]] = [[] for _ in range(num_classes)]  # latest deadline on top
+        self._class_sizes = [0] * num_classes
+        self._class_bytes = [0] * num_classes
+        self._occupied = 0  # bit c set <=> class c holds live packets
+        self._size = 0
+        self._bytes = 0
+        self._max_bytes = max_bytes
+        self._class_max_bytes: List[Optional[int]] = [None] * num_classes
+        for cls, limit in (class_max_bytes or {}).items():
+            if not 0 <= cls < num_classes:
+                raise ValueError(f"Byte budget class {cls} out of range for {num_classes} classes")
+            self._class_max_bytes[cls] = limit
         self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
         self._max_size = queue_size
+        self._ordering = ordering
+        self._clock = clock
+        self._wheel = TimingWheel(start_tick=clock()) if proactive_expiry else None
+        self._feasibility_admission = feasibility_admission
+        self._one_way_delay = one_way_delay
+        self._aqm: List[Optional[CoDel]] = [None] * num_classes
+        for cls, config in (aqm or {}).items():
+            if not 0 <= cls < num_classes:
+                raise ValueError(f"AQM class {cls} out of range for {num_classes} classes")
+            self._aqm[cls] = CoDel(config)
+        
+        # DRR state: class being visited and the credit of each class
+        self._weights = list(weights)
+        self._quanta = [w * DRR_QUANTUM_BYTES for w in weights]
+        self._deficits = [0] * num_classes
+        self._credited = [False] * num_classes  # quantum already granted this visit
+        self._drr_class = 0
         
         self._batch_size = batch_size
         self._batch_timeout_ms = batch_timeout_ms
         self._current_batch: List[DTPPacket] = []
         self._batch_start_time: Optional[int] = None
+        self._batch_flush_at: Optional[float] = None
+        self._batch_target = batch_size
+        self._batch_gap_ms: Optional[float] = None  # EWMA of time between add_to_batch calls
+        self._last_batch_arrival: Optional[int] = None
         self._batch_id = 0
         
         self._send_rate = 500.0
@@ -46,97 +205,502 @@ class DTPScheduler:
             'dequeued': 0,
             'dropped_full': 0,
             'dropped_expired': 0,
+            'rejected_infeasible': 0,
+            'dropped_aqm': 0,
+            'dropped_hopeless': 0,
             'batches_sent': 0
         }
+        self._expired_by_priority = {p.name: 0 for p in Priority}
         self._enqueue_order = 0
+        self._on_head: Optional[Callable[[Optional[tuple]], None]] = None
     
-    def enqueue(self, packet: DTPPacket) -> bool:
-        """Add packet to scheduler queue."""
+    def enqueue(self, packet: DTPPacket, flow: Optional[Hashable] = None) -> bool:
+        """Add packet to scheduler queue; `flow` is ignored (one queue per class)."""
         with self._lock:
-            if len(self._queue) >= self._max_size:
-                if packet.header.priority == Priority.LOW and packet.header.flags & Flags.DROPPABLE:
-                    self._stats['dropped_full'] += 1
-                    return False
-                self._drop_lowest_priority()
-            
-            ttd = packet.header.time_to_deadline()
-            sort_key = (
-                packet.header.priority.value,
-                -ttd,
-                self._enqueue_order
-            )
-            
-            entry = QueueEntry(
-                sort_key=sort_key,
-                packet=packet,
-                enqueue_time=now_ms()
-            )
-            
-            heapq.heappush(self._queue, entry)
-            self._enqueue_order += 1
-            self._stats['enqueued'] += 1
-            
+            now = self._clock()
+            self._expire(now)
+            accepted = self._enqueue_locked(packet, now)
+            if accepted:
+                self._not_empty.notify()
+            self._publish_head()
+            return accepted
+    
+    def enqueue_many(self, packets: List[DTPPacket], flow: Optional[Hashable] = None) -> int:
+        """Add several packets under a single lock acquisition; returns how many were accepted."""
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            accepted = 0
+            for packet in packets:
+                accepted += self._enqueue_locked(packet, now)
+            if accepted:
+                self._not_empty.notify(accepted)
+            self._publish_head()
+            return accepted
+    
+    def fill(self, packets: List[DTPPacket]) -> Tuple[int, int]:
+        """
+        Enqueue packets in order until the next one no longer fits, evicting
+        nothing.
+        
+        Returns:
+            (taken, accepted): packets consumed from the front of `packets`,
+            including ones dropped as expired or infeasible, and how many of
+            those were queued
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            taken = accepted = 0
+            for packet in packets:
+                if self._over_budget(self._classify(packet), packet.wire_size):
+                    break
+                accepted += self._enqueue_locked(packet, now)
+                taken += 1
+            if accepted:
+                self._not_empty.notify(accepted)
+            self._publish_head()
+            return taken, accepted
+    
+    def _enqueue_locked(self, packet: DTPPacket, now: int) -> bool:
+        header = packet.header
+        cls = self._classify(packet)
+        deadline = absolute_deadline(header)
+        if now > deadline:
+            self._record_expired(packet)
+            return False
+        sort_key = self._sort_key(packet, deadline)
+        if self._feasibility_admission and not self._feasible(packet, cls, sort_key, deadline, now):
+            self._stats['rejected_infeasible'] += 1
+            return False
+        victim_key = (-deadline, -self._enqueue_order)
+        size = packet.wire_size
+        
+        if self._over_budget(cls, size):
+            if header.priority == Priority.LOW and header.flags & Flags.DROPPABLE:
+                self._stats['dropped_full'] += 1
+                return False
+            if not self._make_room(cls, victim_key, size):
+                self._stats['dropped_full'] += 1
+                return False
+        
+        entry = QueueEntry(
+            sort_key=sort_key,
+            packet=packet,
+            enqueue_time=now,
+            queue_class=cls,
+            size=size
+        )
+        
+        heapq.heappush(self._queues[cls], entry)
+        heapq.heappush(self._victims[cls], (victim_key, entry))
+        if self._wheel is not None and deadline != _NO_DEADLINE:
+            self._wheel.schedule(entry, deadline + 1)
+        self._class_sizes[cls] += 1
+        self._class_bytes[cls] += size
+        self._occupied |= 1 << cls
+        self._size += 1
+        self._bytes += size
+        self._enqueue_order += 1
+        self._stats['enqueued'] += 1
+        
+        return True
+    
+    def _feasible(self, packet: DTPPacket, cls: int, sort_key: tuple, deadline: float, now: int) -> bool:
+        """Whether `packet` can still be sent by `deadline` behind the packets served before it."""
+        if deadline == _NO_DEADLINE:
             return True
+        # Within its class only entries ordered before it are ahead
+        ahead = self._ahead_in_class(cls, sort_key)
+        if self._ordering in (OrderingMode.PRIORITY_EDF, OrderingMode.LEGACY_SLACK):
+            # Every more urgent class is served first
+            ahead += sum(self._class_sizes[:cls])
+        elif self._ordering in (OrderingMode.EDF, OrderingMode.LLF):
+            # Classes interleave by key: earlier keys of other classes go first
+            bound = (sort_key[0], _NO_DEADLINE)
+            ahead += sum(self._ahead_in_class(c, bound) for c in range(self._num_classes) if c != cls)
+        return now + ahead * 1000.0 / self._send_rate + self._transmit_ms(packet) <= deadline
+    
+    def _ahead_in_class(self, cls: int, key: tuple) -> int:
+        """Upper bound on the packets of `cls` ordered before `key`: none if its head sorts after it, else all."""
+        queue = self._queues[cls]
+        if not self._class_sizes[cls] or queue[0].sort_key > key:
+            return 0
+        return self._class_sizes[cls]
     
-    def dequeue(self) -> Optional[DTPPacket]:
-        """Get next packet to send."""
+    def _classify(self, packet: DTPPacket) -> int:
+        cls = self._classifier(packet)
+        if not 0 <= cls < self._num_classes:
+            raise ValueError(f"Class {cls} out of range for {self._num_classes} classes")
+        return cls
+    
+    def _sort_key(self, packet: DTPPacket, deadline: float) -> tuple:
+        """Order within a class."""
+        if self._ordering == OrderingMode.LLF:
+            return (deadline - self._transmit_ms(packet), self._enqueue_order)
+        if self._ordering != OrderingMode.LEGACY_SLACK:
+            return (deadline, self._enqueue_order)
+        
+        header = packet.header
+        ttd = header.deadline
+        if header.timestamp:
+            ttd = max(0, header.deadline - (self._clock() - header.timestamp))
+        return (-ttd, self._enqueue_order)
+    
+    def _transmit_ms(self, packet: DTPPacket) -> float:
+        """Estimated time to put `packet` on the wire at the current send rate."""
+        datagrams = -(-packet.wire_size // DTP_DEFAULT_MTU)
+        return datagrams * 1000.0 / self._send_rate
+    
+    def dequeue(self, timeout: float = 0.0, max_bytes: Optional[int] = None) -> Optional[DTPPacket]:
+        """
+        Get next packet to send.
+        
+        With a positive `timeout`, block up to that many seconds until a
+        packet is enqueued instead of returning None straight away. With
+        `max_bytes`, return None and leave the next packet queued if its
+        wire size exceeds it.
+        """
+        until = time.monotonic() + timeout
         with self._lock:
-            while self._queue:
-                entry = heapq.heappop(self._queue)
-                packet = entry.packet
-                
-                if packet.header.is_expired():
-                    self._stats['dropped_expired'] += 1
-                    continue
-                
-                self._stats['dequeued'] += 1
-                return packet
-            
+            while True:
+                now = self._clock()
+                self._expire(now)
+                packet = self._dequeue_locked(now, max_bytes)
+                if packet is not None or self._occupied or not _wait(self._not_empty, until):
+                    self._publish_head()
+                    return packet
+    
+    def dequeue_batch(self, max_n: int, max_bytes: Optional[int] = None,
+                      timeout: float = 0.0) -> List[DTPPacket]:
+        """
+        Get up to `max_n` packets, in scheduling order, under a single lock acquisition.
+        
+        `max_bytes` caps the total wire size of the batch; the first packet
+        is always returned, even if it alone exceeds the cap. `timeout`
+        blocks for the first packet as in dequeue().
+        """
+        until = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = self._clock()
+                self._expire(now)
+                batch: List[DTPPacket] = []
+                budget = max_bytes
+                while len(batch) < max_n:
+                    packet = self._dequeue_locked(now, budget if batch else None)
+                    if packet is None:
+                        break
+                    batch.append(packet)
+                    if budget is not None:
+                        budget -= packet.wire_size
+                if batch or not _wait(self._not_empty, until):
+                    self._publish_head()
+                    return batch
+    
+    def head_key(self) -> Optional[tuple]:
+        """
+        Scheduling key of the next packet, or None if the queue is empty.
+        
+        Keys from schedulers with the same ordering compare the way their
+        packets would be served, so a caller can pick the most urgent head
+        across several queues.
+        """
+        with self._lock:
+            self._expire(self._clock())
+            return self._head_key_locked()
+    
+    def _head_key_locked(self) -> Optional[tuple]:
+        if not self._occupied:
             return None
+        cls = self._next_class()
+        key = self._head(cls).sort_key
+        if self._ordering in (OrderingMode.EDF, OrderingMode.LLF):
+            return key
+        return (cls,) + key
+    
+    def watch_head(self, callback: Optional[Callable[[Optional[tuple]], None]]):
+        """
+        Call `callback(head_key)` under the lock at the end of every enqueue,
+        fill, dequeue and clear, so a caller can follow the head without
+        taking the lock (None stops watching). Other calls may expire the
+        head without reporting it, so a reported key can be stale but a
+        queue that holds packets is never reported empty.
+        """
+        with self._lock:
+            self._on_head = callback
+            self._publish_head()
+    
+    def _publish_head(self):
+        if self._on_head is not None:
+            self._on_head(self._head_key_locked())
     
-    def _drop_lowest_priority(self):
-        """Drop lowest priority packet when queue is full."""
-        if not self._queue:
+    def _dequeue_locked(self, now: int, max_bytes: Optional[int] = None) -> Optional[DTPPacket]:
+        """Pop the next live packet, or None if empty or the next one exceeds `max_bytes`."""
+        one_way_ms = self._one_way_delay() if self._one_way_delay is not None else 0.0
+        while self._occupied:
+            cls = self._next_class()
+            entry = self._head(cls)
+            packet = entry.packet
+            
+            deadline = absolute_deadline(packet.header)
+            if now > deadline:
+                self._pop(cls)
+                self._record_expired(packet)
+                continue
+            if deadline - now < one_way_ms:
+                self._pop(cls)
+                self._stats['dropped_hopeless'] += 1
+                continue
+            codel = self._aqm[cls]
+            if codel is not None and codel.should_drop(now - entry.enqueue_time, now,
+                                                       self._class_sizes[cls]):
+                self._pop(cls)
+                self._stats['dropped_aqm'] += 1
+                continue
+            if max_bytes is not None and packet.wire_size > max_bytes:
+                return None
+            
+            self._pop(cls)
+            self._compact(cls)
+            if self._ordering == OrderingMode.DRR and self._class_sizes[cls]:
+                self._deficits[cls] -= packet.wire_size
+            self._stats['dequeued'] += 1
+            return packet
+        
+        return None
+    
+    def _expire(self, now: int):
+        """Drop every queued packet whose deadline has passed, via the timing wheel."""
+        if self._wheel is None:
             return
+        for entry in self._wheel.advance(now):
+            if entry.removed:
+                continue
+            entry.removed = True
+            self._record_expired(entry.packet)
+            self._release(entry)
+            self._compact(entry.queue_class)
+    
+    def _record_expired(self, packet: DTPPacket):
+        self._stats['dropped_expired'] += 1
+        self._expired_by_priority[packet.header.priority.name] += 1
+    
+    def _next_class(self) -> int:
+        """Class to serve next; the queue must not be empty."""
+        occupied = self._occupied
+        if self._ordering == OrderingMode.DRR:
+            return self._next_drr_class()
+        if self._ordering not in (OrderingMode.EDF, OrderingMode.LLF):
+            return (occupied & -occupied).bit_length() - 1
         
-        lowest_idx = -1
-        lowest_pri = -1
+        # Pure EDF/LLF: smallest head key among the non-empty classes
+        best, best_deadline = -1, _NO_DEADLINE
+        queues = self._queues
+        while occupied:
+            lowest = occupied & -occupied
+            occupied ^= lowest
+            cls = lowest.bit_length() - 1
+            queue = queues[cls]
+            while queue[0].removed:
+                heapq.heappop(queue)
+            deadline = queue[0].sort_key[0]
+            if best < 0 or deadline < best_deadline:
+                best, best_deadline = cls, deadline
+        return best
+    
+    def _next_drr_class(self) -> int:
+        """Class being visited in the DRR round once it has credit for its head packet."""
+        cls = self._drr_class
+        deficits = self._deficits
+        while True:
+            if self._class_sizes[cls]:
+                if not self._credited[cls]:
+                    self._credited[cls] = True
+                    deficits[cls] += self._quanta[cls]
+                if self._head(cls).packet.wire_size <= deficits[cls]:
+                    self._drr_class = cls
+                    return cls
+                # Out of credit: keep the remainder until the next visit
+                self._credited[cls] = False
+            
+            # Next backlogged class in class order, wrapping around
+            higher = self._occupied >> (cls + 1) << (cls + 1)
+            candidates = higher or self._occupied
+            cls = (candidates & -candidates).bit_length() - 1
+    
+    def _head(self, cls: int) -> QueueEntry:
+        queue = self._queues[cls]
+        while queue[0].removed:
+            heapq.heappop(queue)
+        return queue[0]
+    
+    def _pop(self, cls: int) -> QueueEntry:
+        self._head(cls)
+        entry = heapq.heappop(self._queues[cls])
+        entry.removed = True
+        self._release(entry)
+        return entry
+    
+    def _release(self, entry: QueueEntry):
+        """
+        Account for one live entry leaving its class. The entry may linger as
+        a tombstone in the heaps and the wheel, so it drops its packet here.
+        """
+        entry.packet = None
+        cls = entry.queue_class
+        self._size -= 1
+        self._bytes -= entry.size
+        self._class_sizes[cls] -= 1
+        self._class_bytes[cls] -= entry.size
+        if not self._class_sizes[cls]:
+            # Only tombstones remain; an idle class banks no DRR credit
+            self._occupied &= ~(1 << cls)
+            self._deficits[cls] = 0
+            self._credited[cls] = False
+            self._queues[cls].clear()
+            self._victims[cls].clear()
+        wheel = self._wheel
+        if wheel is not None and len(wheel) > 2 * self._size + 64:
+            wheel.purge(_is_removed)
+    
+    def _over_budget(self, cls: int, size: int, freed: int = 0, freed_bytes: int = 0,
+                     freed_class_bytes: int = 0) -> bool:
+        """Whether adding `size` bytes to `cls` breaks a limit, after the given evictions."""
+        if self._size - freed >= self._max_size:
+            return True
+        if self._max_bytes is not None and self._bytes - freed_bytes + size > self._max_bytes:
+            return True
+        limit = self._class_max_bytes[cls]
+        return limit is not None and self._class_bytes[cls] - freed_class_bytes + size > limit
+    
+    def _make_room(self, incoming_cls: int, incoming_key: tuple, size: int) -> bool:
+        """
+        Evict latest-deadline packets of the lowest non-empty classes until
+        a packet of `size` bytes fits; only the incoming class is searched
+        while its own byte budget is exceeded.
         
-        for i, entry in enumerate(self._queue):
-            pri = entry.packet.header.priority.value
-            if pri > lowest_pri:
-                lowest_pri = pri
-                lowest_idx = i
+        Returns False, evicting nothing, if the incoming packet (class
+        `incoming_cls`, eviction key `incoming_key`) would itself be a victim
+        before enough room is freed.
+        """
+        limit = self._class_max_bytes[incoming_cls]
+        if (self._max_bytes is not None and size > self._max_bytes) or (limit is not None and size > limit):
+            return False
         
-        if lowest_idx >= 0:
-            del self._queue[lowest_idx]
-            heapq.heapify(self._queue)
+        # Pick victims tentatively, then commit or put them back
+        taken: List[tuple] = []
+        taken_by_class = [0] * self._num_classes
+        freed_bytes = freed_class_bytes = 0
+        fits = True
+        while self._over_budget(incoming_cls, size, len(taken), freed_bytes, freed_class_bytes):
+            if limit is not None and self._class_bytes[incoming_cls] - freed_class_bytes + size > limit:
+                worst = incoming_cls
+            else:
+                worst = self._occupied.bit_length() - 1
+                while worst >= 0 and self._class_sizes[worst] == taken_by_class[worst]:
+                    worst -= 1
+            if worst < incoming_cls or self._class_sizes[worst] == taken_by_class[worst]:
+                fits = False
+                break
+            
+            victims = self._victims[worst]
+            while victims[0][1].removed:
+                heapq.heappop(victims)
+            if worst == incoming_cls and incoming_key < victims[0][0]:
+                fits = False
+                break
+            
+            victim = heapq.heappop(victims)
+            taken.append(victim)
+            taken_by_class[worst] += 1
+            freed_bytes += victim[1].size
+            if worst == incoming_cls:
+                freed_class_bytes += victim[1].size
+        
+        if not fits:
+            for victim in taken:
+                heapq.heappush(self._victims[victim[1].queue_class], victim)
+            return False
+        
+        for _, entry in taken:
+            entry.removed = True
+            self._release(entry)
             self._stats['dropped_full'] += 1
+            self._compact(entry.queue_class)
+        return True
+    
+    def _compact(self, cls: int):
+        """Rebuild a class's heaps once tombstones outnumber live entries (amortised O(1))."""
+        limit = 2 * self._class_sizes[cls] + 64
+        if len(self._queues[cls]) > limit:
+            self._queues[cls] = [e for e in self._queues[cls] if not e.removed]
+            heapq.heapify(self._queues[cls])
+        if len(self._victims[cls]) > limit:
+            self._victims[cls] = [v for v in self._victims[cls] if not v[1].removed]
+            heapq.heapify(self._victims[cls])
     
     def add_to_batch(self, packet: DTPPacket) -> Optional[List[DTPPacket]]:
-        """Add packet to current batch, return batch if ready."""
+        """
+        Add packet to current batch, return batch if ready.
+        
+        A batch is flushed when it reaches the target size, or at its flush
+        time: `batch_timeout_ms` after it was opened, or earlier if its most
+        urgent packet would otherwise come within BATCH_DEADLINE_GUARD_MS of
+        its deadline. The target size is the number of packets expected to
+        arrive before the flush time at the observed arrival rate (capped at
+        `batch_size`), so sparse traffic is not held back waiting for a
+        batch that will not fill.
+        """
         with self._lock:
+            now = self._clock()
+            if self._last_batch_arrival is not None:
+                gap = now - self._last_batch_arrival
+                self._batch_gap_ms = gap if self._batch_gap_ms is None else \
+                    0.875 * self._batch_gap_ms + 0.125 * gap
+            self._last_batch_arrival = now
+            
             if self._batch_start_time is None:
-                self._batch_start_time = now_ms()
+                self._batch_start_time = now
+                self._batch_flush_at = now + self._batch_timeout_ms
             
             self._current_batch.append(packet)
+            deadline = absolute_deadline(packet.header) - BATCH_DEADLINE_GUARD_MS
+            self._batch_flush_at = min(self._batch_flush_at, deadline)
             
-            batch_ready = (
-                len(self._current_batch) >= self._batch_size or
-                (now_ms() - self._batch_start_time) >= self._batch_timeout_ms
-            )
+            window = self._batch_flush_at - self._batch_start_time
+            if self._batch_gap_ms is None or window <= 0:
+                self._batch_target = 1
+            else:
+                expected = 1 + window / max(self._batch_gap_ms, 0.1)
+                self._batch_target = max(1, min(self._batch_size, int(expected)))
             
-            if batch_ready:
+            if len(self._current_batch) >= self._batch_target or now >= self._batch_flush_at:
                 return self._flush_batch()
             
             return None
     
+    def flush_due_batch(self) -> List[DTPPacket]:
+        """Flush the pending batch if its flush time has passed; called from the sender's timer."""
+        with self._lock:
+            if self._batch_flush_at is None or self._clock() < self._batch_flush_at:
+                return []
+            return self._flush_batch()
+    
+    def batch_flush_delay(self) -> Optional[float]:
+        """Seconds until the pending batch is due (0 if overdue), or None without one."""
+        with self._lock:
+            if self._batch_flush_at is None:
+                return None
+            return max(0.0, (self._batch_flush_at - self._clock()) / 1000.0)
+    
     def _flush_batch(self) -> List[DTPPacket]:
         """Flush current batch."""
         if not self._current_batch:
             return []
         
-        self._batch_id += 1
+        # batch_id is a 16-bit header field; 0 means "not batched".
+        self._batch_id = self._batch_id % 0xFFFF + 1
         batch = self._current_batch
         
         for pkt in batch:
@@ -145,6 +709,7 @@ class DTPScheduler:
         
         self._current_batch = []
         self._batch_start_time = None
+        self._batch_flush_at = None
         self._stats['batches_sent'] += 1
         
         return batch
@@ -162,17 +727,40 @@ class DTPScheduler:
         else:
             self._send_rate = min(1000, self._send_rate * 1.2)
     
+    def set_one_way_delay(self, one_way_delay: Optional[Callable[[], float]]):
+        """Enable (or, with None, disable) dropping packets that cannot arrive in time."""
+        with self._lock:
+            self._one_way_delay = one_way_delay
+    
     def clear(self):
         """Clear all queued packets."""
         with self._lock:
-            self._queue.clear()
+            for cls in range(self._num_classes):
+                self._queues[cls].clear()
+                self._victims[cls].clear()
+            self._class_sizes = [0] * self._num_classes
+            self._class_bytes = [0] * self._num_classes
+            self._occupied = 0
+            self._credited = [False] * self._num_classes
+            self._deficits = [0] * self._num_classes
+            for codel in self._aqm:
+                if codel is not None:
+                    codel.reset()
+            self._size = 0
+            self._bytes = 0
+            if self._wheel is not None:
+                self._wheel.clear()
             self._current_batch.clear()
             self._batch_start_time = None
+            self._batch_flush_at = None
+            self._publish_head()
+            self._not_empty.notify_all()
     
     @property
     def queue_size(self) -> int:
         with self._lock:
-            return len(self._queue)
+            self._expire(self._clock())
+            return self._size
     
     @property
     def send_rate(self) -> float:
@@ -182,11 +770,24 @@ class DTPScheduler:
     def is_congested(self) -> bool:
         return self._congested
     
+    @property
+    def ordering(self) -> OrderingMode:
+        return self._ordering
+    
     def get_stats(self) -> dict:
         with self._lock:
+            self._expire(self._clock())
             return {
                 **self._stats,
-                'queue_size': len(self._queue),
+                'expired_by_priority': dict(self._expired_by_priority),
+                'ordering': self._ordering.value,
+                'queue_size': self._size,
+                'queue_by_class': list(self._class_sizes),
+                'queue_bytes': self._bytes,
+                'queue_bytes_by_class': list(self._class_bytes),
+                'weights': list(self._weights),
+                'batch_target': self._batch_target,
+                'aqm': {cls: codel.get_stats() for cls, codel in enumerate(self._aqm) if codel is not None},
                 'send_rate': self._send_rate,
                 'congested': self._congested
             }
@@ -195,9 +796,12 @@ class DTPScheduler:
 class SimpleScheduler:
     """Simple FIFO scheduler for comparison (no priority awareness)."""
     
-    def __init__(self, queue_size: int = 1000):
-        self._queue: List[DTPPacket] = []
+    def __init__(self, queue_size: int = 1000, max_bytes: Optional[int] = None):
+        self._queue: Deque[DTPPacket] = deque()
+        self._bytes = 0
+        self._max_bytes = max_bytes
         self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
         self._max_size = queue_size
         self._send_rate = 500.0
         self._congested = False
@@ -208,24 +812,68 @@ class SimpleScheduler:
             'dropped': 0
         }
     
-    def enqueue(self, packet: DTPPacket) -> bool:
-        """Add packet to queue (FIFO)."""
+    def enqueue(self, packet: DTPPacket, flow: Optional[Hashable] = None) -> bool:
+        """Add packet to queue (FIFO); `flow` is ignored."""
         with self._lock:
-            if len(self._queue) >= self._max_size:
-                self._stats['dropped'] += 1
-                return False
-            
-            self._queue.append(packet)
-            self._stats['enqueued'] += 1
-            return True
+            accepted = self._enqueue_locked(packet)
+            if accepted:
+                self._not_empty.notify()
+            return accepted
     
-    def dequeue(self) -> Optional[DTPPacket]:
-        """Get next packet (FIFO order)."""
+    def enqueue_many(self, packets: List[DTPPacket], flow: Optional[Hashable] = None) -> int:
+        """Add several packets under a single lock acquisition; returns how many were accepted."""
         with self._lock:
-            if self._queue:
-                self._stats['dequeued'] += 1
-                return self._queue.pop(0)
-            return None
+            accepted = 0
+            for packet in packets:
+                accepted += self._enqueue_locked(packet)
+            if accepted:
+                self._not_empty.notify(accepted)
+            return accepted
+    
+    def _enqueue_locked(self, packet: DTPPacket) -> bool:
+        size = packet.wire_size
+        if len(self._queue) >= self._max_size or (
+                self._max_bytes is not None and self._bytes + size > self._max_bytes):
+            self._stats['dropped'] += 1
+            return False
+        
+        self._queue.append(packet)
+        self._bytes += size
+        self._stats['enqueued'] += 1
+        return True
+    
+    def dequeue(self, timeout: float = 0.0) -> Optional[DTPPacket]:
+        """Get next packet (FIFO order), blocking up to `timeout` seconds."""
+        until = time.monotonic() + timeout
+        with self._lock:
+            while not self._queue:
+                if not _wait(self._not_empty, until):
+                    return None
+            self._stats['dequeued'] += 1
+            packet = self._queue.popleft()
+            self._bytes -= packet.wire_size
+            return packet
+    
+    def dequeue_batch(self, max_n: int, max_bytes: Optional[int] = None,
+                      timeout: float = 0.0) -> List[DTPPacket]:
+        """Get up to `max_n` packets in FIFO order (see DTPScheduler.dequeue_batch)."""
+        until = time.monotonic() + timeout
+        with self._lock:
+            while not self._queue:
+                if not _wait(self._not_empty, until):
+                    return []
+            batch: List[DTPPacket] = []
+            budget = max_bytes
+            while self._queue and len(batch) < max_n:
+                size = self._queue[0].wire_size
+                if batch and budget is not None and size > budget:
+                    break
+                batch.append(self._queue.popleft())
+                self._bytes -= size
+                if budget is not None:
+                    budget -= size
+            self._stats['dequeued'] += len(batch)
+            return batch
     
     def set_congested(self, congested: bool):
         self._congested = congested
@@ -234,12 +882,15 @@ class SimpleScheduler:
         else:
             self._send_rate = min(1000, self._send_rate * 1.2)
     
-    def flush_all(self):
-        pass
+    def flush_all(self) -> List[DTPPacket]:
+        """Nothing is held back for batching."""
+        return []
     
     def clear(self):
         with self._lock:
             self._queue.clear()
+            self._bytes = 0
+            self._not_empty.notify_all()
     
     @property
     def queue_size(self) -> int:
@@ -259,6 +910,75 @@ class SimpleScheduler:
             return {
                 **self._stats,
                 'queue_size': len(self._queue),
+                'queue_bytes': self._bytes,
                 'send_rate': self._send_rate,
                 'congested': self._congested
             }
+
+
+@runtime_checkable
+class Scheduler(Protocol):
+    """
+    Interface the client sender loop drives; DTPScheduler and SimpleScheduler implement it.
+    
+    `flow` names the application stream a packet belongs to; schedulers
+    without per-flow state ignore it. `flush_all` hands back packets held
+    for batching and is empty for schedulers that do not batch.
+    """
+    
+    def enqueue(self, packet: DTPPacket, flow: Optional[Hashable] = None) -> bool: ...
+    
+    def enqueue_many(self, packets: List[DTPPacket], flow: Optional[Hashable] = None) -> int: ...
+    
+    def dequeue(self, timeout: float = 0.0) -> Optional[DTPPacket]: ...
+    
+    def dequeue_batch(self, max_n: int, max_bytes: Optional[int] = None,
+                      timeout: float = 0.0) -> List[DTPPacket]: ...
+    
+    def flush_all(self) -> List[DTPPacket]: ...
+    
+    def set_congested(self, congested: bool): ...
+    
+    def clear(self): ...
+    
+    @property
+    def queue_size(self) -> int: ...
+    
+    @property
+    def send_rate(self) -> float: ...
+    
+    def get_stats(self) -> dict: ...
+
+
+_SCHEDULERS: Dict[str, Callable[..., Scheduler]] = {}
+
+
+def register_scheduler(name: str, factory: Callable[..., Scheduler]):
+    """Register a scheduling policy under `name`; `factory(**kwargs)` builds a fresh instance."""
+    _SCHEDULERS[name] = factory
+
+
+def create_scheduler(name: str, **kwargs) -> Scheduler:
+    """Build the scheduler registered as `name`, passing `kwargs` to its factory."""
+    factory = _SCHEDULERS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown scheduler {name!r}; available: {', '.join(_SCHEDULERS)}")
+    return factory(**kwargs)
+
+
+def available_schedulers() -> List[str]:
+    return list(_SCHEDULERS)
+
+
+def _ordered(mode: OrderingMode) -> Callable[..., Scheduler]:
+    return lambda **kwargs: DTPScheduler(ordering=mode, **kwargs)
+
+
+register_scheduler('priority', _ordered(OrderingMode.PRIORITY_EDF))
+register_scheduler('edf', _ordered(OrderingMode.EDF))
+# OrderingMode.LLF is not registered: its transmit estimate only varies with
+# the number of datagrams, so for sub-MTU traffic it orders exactly like
+# 'edf'. Build DTPScheduler(ordering=OrderingMode.LLF) for multi-datagram
+# messages.
+register_scheduler('drr', _ordered(OrderingMode.DRR))
+register_scheduler('fifo', SimpleScheduler)
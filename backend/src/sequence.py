@@ -0,0 +1,172 @@
+"""
+DTP Sequence Tracking
+
+RFC 1982 serial-number arithmetic for wrapping sequence fields, and a
+per-flow tracker that reconstructs an extended (64-bit) sequence from the
+16-bit v1 field or the 32-bit v2 field. Loss, duplicate and reordering
+accounting therefore stays correct across wraparound, even at rates where
+the 16-bit space repeats within a second.
+"""
+
+import threading
+from typing import Dict, Hashable, Optional
+
+SEQ_BITS = 16
+SEQ_BITS_EXTENDED = 32
+DEFAULT_WINDOW = 1024
+
+
+def serial_diff(a: int, b: int, bits: int = SEQ_BITS) -> int:
+    """
+    Signed distance a - b in serial arithmetic (RFC 1982).
+
+    The result is in [-2^(bits-1), 2^(bits-1)); a positive value means
+    `a` is "after" `b` even if the counter wrapped in between.
+    """
+    half = 1 << (bits - 1)
+    return ((a - b + half) & ((1 << bits) - 1)) - half
+
+
+def serial_lt(a: int, b: int, bits: int = SEQ_BITS) -> bool:
+    """RFC 1982 'a < b' for sequence numbers of the given width."""
+    return serial_diff(a, b, bits) < 0
+
+
+def sequence_bits(version: int) -> int:
+    """Width of the on-wire sequence field for a header version (v2+ is 32-bit)."""
+    return SEQ_BITS_EXTENDED if version >= 2 else SEQ_BITS
+
+
+class SequenceTracker:
+    """
+    Per-flow sequence reconstruction and accounting.
+
+    Keeps the lowest and highest extended sequence seen plus a bitmap of the
+    last `window` sequence numbers, so each packet costs O(1):
+    - ahead of highest: gap is counted as (provisionally) lost
+    - inside the window, bit clear: late arrival (reordered, un-lose it)
+    - inside the window, below the lowest: late arrival from before the
+      first packet seen; the gap up to the lowest now counts as lost
+    - inside the window, bit set: duplicate
+    - behind the window: too old to classify, counted as stale
+    """
+
+    __slots__ = ('bits', 'window', '_mask', '_first', '_highest', '_bitmap',
+                 'received', 'duplicates', 'reordered', 'lost', 'stale')
+
+    def __init__(self, bits: int = SEQ_BITS, window: int = DEFAULT_WINDOW):
+        self.bits = bits
+        self.window = window
+        self._mask = (1 << window) - 1
+        self._first: Optional[int] = None
+        self._highest: Optional[int] = None
+        self._bitmap = 0
+
+        self.received = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.lost = 0
+        self.stale = 0
+
+    def extend(self, seq: int) -> int:
+        """Map a wire sequence number onto the extended sequence space."""
+        if self._highest is None:
+            return seq
+        modulus = 1 << self.bits
+        return self._highest + serial_diff(seq, self._highest % modulus, self.bits)
+
+    def observe(self, seq: int) -> int:
+        """
+        Account for one received packet.
+
+        Returns:
+            The reconstructed extended sequence number
+        """
+        extended = self.extend(seq)
+        self.received += 1
+
+        if self._highest is None:
+            self._first = self._highest = extended
+            self._bitmap = 1
+            return extended
+
+        ahead = extended - self._highest
+        if ahead > 0:
+            self.lost += ahead - 1
+            self._bitmap = ((self._bitmap << ahead) | 1) & self._mask if ahead < self.window else 1
+            self._highest = extended
+        else:
+            behind = -ahead
+            if behind >= self.window:
+                self.stale += 1
+            elif self._bitmap >> behind & 1:
+                self.duplicates += 1
+            else:
+                self._bitmap |= 1 << behind
+                self.reordered += 1
+                if extended < self._first:
+                    # Never counted lost; the positions it skips now are
+                    self.lost += self._first - extended - 1
+                    self._first = extended
+                else:
+                    self.lost -= 1
+
+        return extended
+
+    @property
+    def highest(self) -> Optional[int]:
+        return self._highest
+
+    def to_dict(self) -> dict:
+        return {
+            'received': self.received,
+            'highest': self._highest,
+            'duplicates': self.duplicates,
+            'reordered': self.reordered,
+            'lost': self.lost,
+            'stale': self.stale,
+        }
+
+
+class FlowSequenceRegistry:
+    """
+    Sequence trackers keyed by flow (e.g. peer address).
+
+    Bounded to `max_flows`; the oldest flow is forgotten when a new one
+    would exceed the limit.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, max_flows: int = 10000):
+        self._window = window
+        self._max_flows = max_flows
+        self._flows: Dict[Hashable, SequenceTracker] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, flow: Hashable, seq: int, bits: int = SEQ_BITS) -> int:
+        with self._lock:
+            tracker = self._flows.get(flow)
+            if tracker is None or tracker.bits != bits:
+                if tracker is None and len(self._flows) >= self._max_flows:
+                    del self._flows[next(iter(self._flows))]
+                tracker = self._flows[flow] = SequenceTracker(bits, self._window)
+            return tracker.observe(seq)
+
+    def get_flow(self, flow: Hashable) -> Optional[SequenceTracker]:
+        with self._lock:
+            return self._flows.get(flow)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            totals = {'flows': len(self._flows), 'received': 0, 'duplicates': 0,
+                      'reordered': 0, 'lost': 0, 'stale': 0}
+            for tracker in self._flows.values():
+                totals['received'] += tracker.received
+                totals['duplicates'] += tracker.duplicates
+                totals['reordered'] += tracker.reordered
+                totals['lost'] += tracker.lost
+                totals['stale'] += tracker.stale
+            return totals
+
+    def clear(self):
+        with self._lock:
+            self._flows.clear()
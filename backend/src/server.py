@@ -4,13 +4,16 @@ import socket
 import threading
 import time
 import random
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict
 
 from .protocol import (
-    DTPPacket, DTPHeader, Priority, PacketType, Flags,
-    DTP_DEFAULT_PORT, DTP_HEADER_SIZE, get_priority_emoji
+    DTPPacket, DTPPacketView, DTPHeader, Priority, PacketType, Flags,
+    DTP_DEFAULT_PORT, DTP_HEADER_SIZE, DTP_RECV_BUFFER_SIZE, DTP_VERSION, DTP_MAX_VERSION,
+    get_priority_emoji, iter_batch_frames
 )
 from .metrics import MetricsCollector
+from .sequence import FlowSequenceRegistry, sequence_bits
+from .fragmentation import ReassemblyBuffer
 
 
 class DTPServer:
@@ -20,13 +23,24 @@ class DTPServer:
                  host: str = '127.0.0.1',
                  port: int = DTP_DEFAULT_PORT,
                  metrics: Optional[MetricsCollector] = None,
-                 simulate_congestion: bool = True):
+                 simulate_congestion: bool = True,
+                 max_version: int = DTP_MAX_VERSION):
         self.host = host
         self.port = port
         self.metrics = metrics or MetricsCollector()
         self.simulate_congestion = simulate_congestion
+        self.max_version = max_version
+        
+        # Negotiated header version per peer address (v1 until a HELLO arrives)
+        self._peer_versions: Dict[tuple, int] = {}
+        
+        # Per-flow (peer address) loss/duplicate/reordering accounting
+        self._sequences = FlowSequenceRegistry()
+        self._reassembly = ReassemblyBuffer()
         
         self._socket: Optional[socket.socket] = None
+        self._recv_buffer = bytearray(DTP_RECV_BUFFER_SIZE)
+        self._recv_view = memoryview(self._recv_buffer)
         self._running = False
         self._thread: Optional[threading.Thread] = None
         
@@ -38,6 +52,7 @@ class DTPServer:
         
         self._packets_processed = 0
         self._packets_dropped = 0
+        self._batches_received = 0
     
     def set_on_packet_received(self, callback: Callable):
         self._on_packet_received = callback
@@ -81,19 +96,48 @@ class DTPServer:
     def _receive_loop(self):
         while self._running:
             try:
-                data, addr = self._socket.recvfrom(2048)
-                self._handle_packet(data, addr)
+                size, addr = self._socket.recvfrom_into(self._recv_buffer)
+                self._handle_packet(self._recv_view[:size], addr)
             except socket.timeout:
+                self._reassembly.evict_expired()
                 continue
             except Exception:
                 pass
     
-    def _handle_packet(self, data: bytes, addr: tuple):
+    def _handle_packet(self, data, addr: tuple):
+        try:
+            packet = DTPPacketView.from_buffer(data)
+            
+            if packet.packet_type == PacketType.HELLO:
+                self._handle_hello(packet, addr)
+                return
+            
+            if packet.packet_type == PacketType.BATCH:
+                self._batches_received += 1
+                for frame in iter_batch_frames(packet.payload):
+                    self._handle_data(DTPPacketView(frame), addr)
+                return
+            
+            self._handle_data(packet, addr)
+                
+        except Exception:
+            pass
+    
+    def _handle_data(self, packet: DTPPacketView, addr: tuple):
+        if packet.flags & Flags.FRAGMENT:
+            message = self._reassembly.add(packet, addr)
+            if message is not None:
+                self._process_packet(message, addr)
+            return
+        
+        self._process_packet(packet, addr)
+    
+    def _process_packet(self, packet: DTPPacketView, addr: tuple):
         try:
-            packet = DTPPacket.deserialize(data)
             packet.mark_received()
+            self._sequences.observe(addr, packet.sequence, sequence_bits(packet.version))
             
-            if packet.header.is_expired():
+            if packet.is_expired():
                 self._packets_dropped += 1
                 self.metrics.record_dropped(packet, "expired_on_arrival")
                 return
@@ -107,20 +151,29 @@ class DTPServer:
             if self._on_packet_received:
                 self._on_packet_received(packet)
             
-            if packet.header.flags & Flags.RELIABLE:
+            if packet.flags & Flags.RELIABLE:
                 self._send_ack(packet, addr)
                 
         except Exception:
             pass
     
-    def _simulate_processing(self, packet: DTPPacket):
+    def _handle_hello(self, packet: DTPPacketView, addr: tuple):
+        """Answer a version negotiation with the highest version both sides support."""
+        offered = packet.payload[0] if packet.payload else DTP_VERSION
+        version = max(DTP_VERSION, min(offered, self.max_version))
+        self._peer_versions[addr] = version
+        
+        reply = DTPPacket.create_hello(version)
+        self._socket.sendto(reply.serialize(), addr)
+    
+    def _simulate_processing(self, packet: DTPPacketView):
         if not self.simulate_congestion:
             return
         
         delay = self._base_processing_delay_ms
         
         if self._congestion_level > 0:
-            priority_factor = (packet.header.priority + 1) * 2
+            priority_factor = (packet.priority + 1) * 2
             congestion_delay = self._congestion_level * priority_factor * 10
             delay += congestion_delay
         
@@ -142,8 +195,9 @@ class DTPServer:
             if self._on_congestion_change:
                 self._on_congestion_change(self._congestion_level)
     
-    def _send_ack(self, packet: DTPPacket, addr: tuple):
-        ack = DTPPacket.create_ack(packet.header.sequence, packet.header.priority)
+    def _send_ack(self, packet: DTPPacketView, addr: tuple):
+        ack = DTPPacket.create_ack(packet.sequence, packet.priority)
+        ack.header.version = self._peer_versions.get(addr, DTP_VERSION)
         self._socket.sendto(ack.serialize(), addr)
     
     def set_congestion_level(self, level: float):
@@ -161,5 +215,8 @@ class DTPServer:
         return {
             'processed': self._packets_processed,
             'dropped': self._packets_dropped,
+            'batches': self._batches_received,
+            'sequence': self._sequences.get_stats(),
+            'reassembly': self._reassembly.get_stats(),
             'congestion_level': round(self._congestion_level, 2)
         }
@@ -0,0 +1,230 @@
+"""
+DTP Sharded Scheduler
+
+Splits one logical queue across N DTPScheduler shards, each with its own
+lock, so concurrent producers stop serialising on a single mutex:
+1. Producers hash a flow key onto a shard; without one, each producing
+   thread is given its own shard round robin. Capacity is global: a
+   producer whose shard is full spills to the next shard with room, and
+   only when every shard is full does its own shard's overflow policy apply
+2. A sender takes the most urgent head among the shards it owns. Each
+   shard reports its head key after every change (DTPScheduler.watch_head),
+   so choosing reads those reports and only the chosen shard is locked
+3. A sender whose own shards are empty steals the most urgent head from the
+   rest; without a worker id a sender owns every shard
+
+Ordering is exact per shard and best effort across shards: a head can
+change (or expire) between being reported and being popped.
+"""
+
+import functools
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+from .protocol import DTPPacket
+from .scheduler import DTPScheduler, register_scheduler
+
+DEFAULT_SHARDS = 4
+
+
+class ShardedScheduler:
+    """
+    Usage:
+        scheduler = ShardedScheduler(num_shards=4, num_workers=2)
+        scheduler.enqueue(packet, flow=addr)       # producers, any thread
+        packet = scheduler.dequeue(timeout=0.05, worker=0)
+    """
+
+    def __init__(self, num_shards: int = DEFAULT_SHARDS, num_workers: int = 1,
+                 queue_size: int = 1000, **shard_kwargs):
+        """
+        Args:
+            num_shards: Number of independent DTPScheduler shards
+            num_workers: Senders sharing the shards; worker w owns shards w, w + num_workers, ...
+            queue_size: Total capacity across all shards
+            shard_kwargs: Passed to every DTPScheduler shard (ordering, clock, ...)
+        """
+        if num_shards < 1 or num_workers < 1:
+            raise ValueError(f"num_shards and num_workers must be positive: {num_shards}, {num_workers}")
+
+        per_shard = max(1, -(-queue_size // num_shards))
+        self._shards = [DTPScheduler(queue_size=per_shard, **shard_kwargs) for _ in range(num_shards)]
+        # Shards to try from each home shard, itself first
+        self._spill = [[self._shards[(i + k) % num_shards] for k in range(num_shards)]
+                       for i in range(num_shards)]
+        self._homes = [list(range(w, num_shards, num_workers)) for w in range(num_workers)]
+        self._others = [[i for i in range(num_shards) if i not in home] for home in self._homes]
+        self._all = list(range(num_shards))
+        # Head key of each shard as last reported by the shard itself
+        self._heads: List[Optional[tuple]] = [None] * num_shards
+        for i, shard in enumerate(self._shards):
+            shard.watch_head(functools.partial(self._heads.__setitem__, i))
+        self._local = threading.local()
+        self._next_home = itertools.count()
+        # Set by producers, waited on by idle senders; never held while enqueueing
+        self._ready = threading.Event()
+
+        self._send_rate = 500.0
+        self._congested = False
+        self._steals = 0
+        self._steals_lock = threading.Lock()
+
+    def _home_for(self, flow: Optional[Hashable]) -> int:
+        if flow is not None:
+            return hash(flow) % len(self._shards)
+        # Thread idents are aligned addresses and hash onto few shards; assign instead
+        home = getattr(self._local, 'home', None)
+        if home is None:
+            home = self._local.home = next(self._next_home) % len(self._shards)
+        return home
+
+    def _signal(self):
+        if not self._ready.is_set():
+            self._ready.set()
+
+    def enqueue(self, packet: DTPPacket, flow: Optional[Hashable] = None) -> bool:
+        return self.enqueue_many([packet], flow) == 1
+
+    def enqueue_many(self, packets: List[DTPPacket], flow: Optional[Hashable] = None) -> int:
+        """Fill the home shard, spilling the rest to shards with room; returns how many were accepted."""
+        candidates = self._spill[self._home_for(flow)]
+        accepted = start = 0
+        for shard in candidates:
+            taken, queued = shard.fill(packets[start:] if start else packets)
+            accepted += queued
+            start += taken
+            if start == len(packets):
+                break
+        else:
+            # Every shard is full: the home shard's overflow policy decides
+            accepted += candidates[0].enqueue_many(packets[start:])
+        if accepted:
+            self._signal()
+        return accepted
+
+    def _best(self, indexes: List[int]) -> Optional[int]:
+        heads = self._heads
+        best, best_key = None, None
+        for i in indexes:
+            key = heads[i]
+            if key is not None and (best is None or key < best_key):
+                best, best_key = i, key
+        return best
+
+    def _take(self, worker: Optional[int], max_bytes: Optional[int] = None) -> Optional[DTPPacket]:
+        """Pop the most urgent head visible to `worker`, stealing if its own shards are empty."""
+        while True:
+            if worker is None:
+                index = self._best(self._all)
+            else:
+                index = self._best(self._homes[worker])
+                if index is None:
+                    index = self._best(self._others[worker])
+                    if index is not None:
+                        with self._steals_lock:
+                            self._steals += 1
+            if index is None:
+                return None
+
+            shard = self._shards[index]
+            packet = shard.dequeue(max_bytes=max_bytes)
+            if packet is not None:
+                return packet
+            if max_bytes is not None and self._heads[index] is not None:
+                return None   # head exceeds the byte cap
+            # Head was taken by another sender (or expired) in between; look again
+
+    def dequeue(self, timeout: float = 0.0, worker: Optional[int] = None) -> Optional[DTPPacket]:
+        """Get the next packet, blocking up to `timeout` seconds while every shard is empty."""
+        until = time.monotonic() + timeout
+        while True:
+            packet = self._take(worker)
+            if packet is not None:
+                return packet
+
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                return None
+            # Clear before the re-check so an enqueue racing with it still wakes us
+            self._ready.clear()
+            packet = self._take(worker)
+            if packet is not None:
+                return packet
+            self._ready.wait(remaining)
+
+    def dequeue_batch(self, max_n: int, max_bytes: Optional[int] = None,
+                      timeout: float = 0.0, worker: Optional[int] = None) -> List[DTPPacket]:
+        """Get up to `max_n` packets, most urgent head first (see DTPScheduler.dequeue_batch)."""
+        first = self.dequeue(timeout, worker)
+        if first is None:
+            return []
+
+        batch = [first]
+        budget = None if max_bytes is None else max_bytes - first.wire_size
+        while len(batch) < max_n:
+            packet = self._take(worker, budget)
+            if packet is None:
+                break
+            batch.append(packet)
+            if budget is not None:
+                budget -= packet.wire_size
+        return batch
+
+    def flush_all(self) -> List[DTPPacket]:
+        flushed: List[DTPPacket] = []
+        for shard in self._shards:
+            flushed.extend(shard.flush_all())
+        return flushed
+
+    def set_congested(self, congested: bool):
+        self._congested = congested
+        for shard in self._shards:
+            shard.set_congested(congested)
+        self._send_rate = self._shards[0].send_rate
+
+    def set_one_way_delay(self, one_way_delay: Optional[Callable[[], float]]):
+        """Enable (or, with None, disable) dropping hopeless packets in every shard."""
+        for shard in self._shards:
+            shard.set_one_way_delay(one_way_delay)
+
+    def clear(self):
+        for shard in self._shards:
+            shard.clear()
+        self._ready.set()
+
+    @property
+    def num_shards(self) -> int:
+        return len(self._shards)
+
+    @property
+    def queue_size(self) -> int:
+        return sum(shard.queue_size for shard in self._shards)
+
+    @property
+    def send_rate(self) -> float:
+        return self._send_rate
+
+    @property
+    def is_congested(self) -> bool:
+        return self._congested
+
+    def get_stats(self) -> dict:
+        shard_stats = [shard.get_stats() for shard in self._shards]
+        totals: Dict[str, int] = {}
+        for stats in shard_stats:
+            for key, value in stats.items():
+                if isinstance(value, int) and not isinstance(value, bool):
+                    totals[key] = totals.get(key, 0) + value
+        return {
+            **totals,
+            'num_shards': len(self._shards),
+            'queue_by_shard': [stats['queue_size'] for stats in shard_stats],
+            'steals': self._steals,
+            'send_rate': self._send_rate,
+            'congested': self._congested
+        }
+
+
+register_scheduler('sharded', ShardedScheduler)
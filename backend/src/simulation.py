@@ -3,13 +3,15 @@
 import threading
 import time
 import asyncio
-from typing import Optional, Callable, List
+from typing import Optional, Callable, List, Union
 from dataclasses import dataclass
 from enum import Enum
 
-from .protocol import Priority, reset_reference_time
+from .protocol import Priority, reset_reference_time, DTP_VERSION
 from .server import DTPServer
-from .client import DTPClient, ClientMode, TrafficProfile
+from .client import DTPClient, ClientMode, TrafficProfile, MODE_SCHEDULERS
+from .scheduler import create_scheduler
+from .async_client import AsyncDTPClient
 from .metrics import MetricsCollector
 
 
@@ -28,8 +30,19 @@ class SimulationConfig:
     high_count: int = 200
     medium_count: int = 500
     low_count: int = 1000
+    flows: int = 1                   # application streams the traffic is spread over
     simulate_congestion: bool = True
     congestion_level: float = 0.3
+    header_version: int = DTP_VERSION
+    scheduler: Optional[str] = None  # registered policy name; defaults to the mode's
+    drop_hopeless: bool = False      # drop packets whose slack is below the one-way delay
+    use_asyncio: bool = False        # AsyncDTPClient on the engine's event loop instead of threads
+    
+    def __post_init__(self):
+        if self.drop_hopeless:
+            name = self.scheduler or MODE_SCHEDULERS[self.mode]
+            if not hasattr(create_scheduler(name), 'set_one_way_delay'):
+                raise ValueError(f"drop_hopeless is not supported by the {name!r} scheduler")
 
 
 class SimulationEngine:
@@ -37,12 +50,15 @@ class SimulationEngine:
     
     def __init__(self, 
                  host: str = '127.0.0.1',
-                 port: int = 4433):
+                 port: int = 4433,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
         self.host = host
         self.port = port
+        # Event loop hosting the client when config.use_asyncio is set
+        self._loop = loop
         
         self._server: Optional[DTPServer] = None
-        self._client: Optional[DTPClient] = None
+        self._client: Optional[Union[DTPClient, AsyncDTPClient]] = None
         self._metrics: Optional[MetricsCollector] = None
         
         self._state = SimulationState.IDLE
@@ -92,19 +108,28 @@ class SimulationEngine:
         time.sleep(0.1)
         
         mode = self._config.mode
-        self._client = DTPClient(
+        client_class = DTPClient
+        if self._config.use_asyncio:
+            if self._loop is None:
+                raise ValueError("use_asyncio needs an event loop: SimulationEngine(loop=...)")
+            client_class = AsyncDTPClient
+        self._client = client_class(
             host=self.host,
             port=self.port,
             metrics=self._metrics,
-            mode=mode
+            mode=mode,
+            max_version=self._config.header_version,
+            scheduler=self._config.scheduler,
+            drop_hopeless=self._config.drop_hopeless
         )
-        self._client.start()
+        self._call_client(self._client.start)
         
         profile = TrafficProfile(
             critical_count=self._config.critical_count,
             high_count=self._config.high_count,
             medium_count=self._config.medium_count,
-            low_count=self._config.low_count
+            low_count=self._config.low_count,
+            flows=self._config.flows
         )
         
         self._running = True
@@ -114,7 +139,7 @@ class SimulationEngine:
         self._state = SimulationState.RUNNING
         self._notify_state_change()
         
-        self._client.run_simulation(profile)
+        self._call_client(self._client.run_simulation, profile)
         
         threading.Thread(target=self._monitor_completion, daemon=True).start()
     
@@ -122,7 +147,7 @@ class SimulationEngine:
         self._running = False
         
         if self._client:
-            self._client.stop()
+            self._call_client(self._client.stop)
             self._client = None
         
         if self._server:
@@ -134,16 +159,40 @@ class SimulationEngine:
     
     def pause(self):
         if self._client:
-            self._client.pause()
+            self._call_client(self._client.pause)
         self._state = SimulationState.PAUSED
         self._notify_state_change()
     
     def resume(self):
         if self._client:
-            self._client.resume()
+            self._call_client(self._client.resume)
         self._state = SimulationState.RUNNING
         self._notify_state_change()
     
+    def _call_client(self, method: Callable, *args):
+        """
+        Call a client method, on the event loop for an AsyncDTPClient.
+        
+        From another thread this waits for the result (awaiting coroutines);
+        on the loop thread itself only plain methods can be called.
+        """
+        if not isinstance(self._client, AsyncDTPClient):
+            return method(*args)
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            return method(*args)
+        
+        async def call():
+            result = method(*args)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+        
+        return asyncio.run_coroutine_threadsafe(call(), self._loop).result(timeout=5.0)
+    
     def _monitor_completion(self):
         while self._running and self._client:
             if self._client.is_sending:
@@ -153,11 +202,14 @@ class SimulationEngine:
                 self._state = SimulationState.COMPLETED
                 self._notify_state_change()
                 
-                mode_key = self._config.mode.value
-                self._results[mode_key] = self.get_results()
+                self._results[self._result_key()] = self.get_results()
                 
                 break
     
+    def _result_key(self) -> str:
+        """Mode name, or the scheduler name when a policy was picked explicitly."""
+        return self._config.scheduler or self._config.mode.value
+    
     def _update_loop(self):
         while self._running:
             if self._metrics and self._on_metrics_update:
@@ -175,6 +227,7 @@ class SimulationEngine:
         result = {
             'state': self._state.value,
             'mode': self._config.mode.value,
+            'scheduler': self._client.scheduler_name if self._client else self._config.scheduler,
             'stats': self._metrics.get_current_stats(),
             'latency_data': self._metrics.get_latency_data(),
             'throughput_data': self._metrics.get_throughput_data(),
@@ -196,6 +249,7 @@ class SimulationEngine:
         
         return {
             'mode': self._config.mode.value,
+            'scheduler': self._result_key(),
             'summary': self._metrics.get_comparison_summary(),
             'stats': self._metrics.get_current_stats(),
         }
@@ -204,6 +258,7 @@ class SimulationEngine:
         return {
             'dtp': self._results.get('dtp', {}),
             'udp_raw': self._results.get('udp_raw', {}),
+            **self._results,
         }
     
     def clear_results(self):
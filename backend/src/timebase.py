@@ -0,0 +1,30 @@
+"""
+DTP Time Base
+
+One monotonic clock, read in two resolutions:
+1. Precise (monotonic_ns / precise_ms) for latency and sojourn measurement
+2. Whole milliseconds (now_ms) for per-packet expiry and deadline checks
+
+coarse_now_ms is the name the expiry/deadline paths use for now_ms. Hot
+paths read it once per batch (e.g. DTPScheduler.enqueue_many and
+dequeue_batch).
+"""
+
+import time
+
+NS_PER_MS = 1_000_000
+
+monotonic_ns = time.monotonic_ns
+
+
+def now_ms() -> int:
+    """Current monotonic time in whole milliseconds."""
+    return time.monotonic_ns() // NS_PER_MS
+
+
+def precise_ms() -> float:
+    """Current monotonic time in milliseconds with sub-ms resolution."""
+    return time.monotonic_ns() / NS_PER_MS
+
+
+coarse_now_ms = now_ms
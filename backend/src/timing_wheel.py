@@ -0,0 +1,180 @@
+"""
+DTP Timing Wheel
+
+Hierarchical timing wheel (Varghese & Lauck) used as a deadline expiry index:
+1. Level 0 has one bucket per tick; each higher level covers `slots` times
+   the span of the level below
+2. Scheduling is O(1); advancing fires due buckets and cascades higher-level
+   buckets down as the wheel turns, amortised O(1) per item. A bitmap of
+   occupied buckets per level lets it jump straight to the next tick where
+   a bucket fires or cascades, so idle stretches cost nothing
+3. Cancellation is lazy: owners mark items dead and skip them when they
+   fire, and purge() them in bulk once they outnumber the live ones
+
+Items beyond the wheel horizon are parked in the last top-level bucket and
+rescheduled when it fires.
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+DEFAULT_SLOTS = 64
+DEFAULT_LEVELS = 4
+
+
+class TimingWheel:
+    """
+    Usage:
+        wheel = TimingWheel(start_tick=now)
+        wheel.schedule(item, expire_tick)
+        for item in wheel.advance(now):   # items whose tick is <= now
+            ...
+    """
+
+    def __init__(self, start_tick: int = 0, slots: int = DEFAULT_SLOTS, levels: int = DEFAULT_LEVELS):
+        """
+        Args:
+            start_tick: Current time in ticks
+            slots: Buckets per level (power of two)
+            levels: Number of levels; the horizon is slots ** levels ticks
+        """
+        if slots < 2 or slots & (slots - 1):
+            raise ValueError(f"slots must be a power of two >= 2: {slots}")
+        if levels < 1:
+            raise ValueError(f"levels must be positive: {levels}")
+
+        self._bits = slots.bit_length() - 1
+        self._slots = slots
+        self._mask = slots - 1
+        self._levels = levels
+        self._horizon = 1 << (self._bits * levels)
+        self._wheels: List[List[List[Tuple[int, Any]]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self._occupied = [0] * levels  # bit s of level l set <=> bucket s holds items
+        self._due: List[Tuple[int, Any]] = []
+        self._current = int(start_tick)
+        self._count = 0
+
+    def schedule(self, item: Any, tick: int):
+        """Fire `item` once the wheel reaches `tick`."""
+        self._count += 1
+        self._place(int(tick), item)
+
+    def _place(self, tick: int, item: Any):
+        delta = tick - self._current
+        if delta <= 0:
+            self._due.append((tick, item))
+            return
+        if delta >= self._horizon:
+            top = self._levels - 1
+            slot = ((self._current >> (self._bits * top)) - 1) & self._mask
+            self._wheels[top][slot].append((tick, item))
+            self._occupied[top] |= 1 << slot
+            return
+
+        level = (delta.bit_length() - 1) // self._bits
+        slot = (tick >> (self._bits * level)) & self._mask
+        self._wheels[level][slot].append((tick, item))
+        self._occupied[level] |= 1 << slot
+
+    def _take(self, level: int, slot: int) -> List[Tuple[int, Any]]:
+        bucket = self._wheels[level][slot]
+        if bucket:
+            self._wheels[level][slot] = []
+            self._occupied[level] &= ~(1 << slot)
+        return bucket
+
+    def _next_event(self) -> Optional[int]:
+        """First tick after the current one at which an occupied bucket fires or cascades."""
+        slots, mask = self._slots, self._mask
+        best = None
+        for level, occupied in enumerate(self._occupied):
+            if not occupied:
+                continue
+            # Level l visits slot (t >> l * bits) & mask at ticks t that are multiples of slots ** l
+            shift = self._bits * level
+            start = (self._current >> shift) + 1
+            offset = start & mask
+            rotated = ((occupied >> offset) | (occupied << (slots - offset))) & ((1 << slots) - 1)
+            tick = (start + (rotated & -rotated).bit_length() - 1) << shift
+            if best is None or tick < best:
+                best = tick
+        return best
+
+    def advance(self, now: int) -> List[Any]:
+        """Move the wheel to tick `now` and return every item due by then."""
+        now = int(now)
+        fired = []
+        if self._due:
+            fired.extend(item for _, item in self._due)
+            self._due = []
+
+        if self._count == len(fired):
+            # Nothing pending in the buckets: jump straight to now
+            self._current = max(self._current, now)
+            self._count = 0
+            return fired
+
+        bits, mask = self._bits, self._mask
+        while self._current < now:
+            # Skip the ticks at which no bucket fires or cascades
+            current = self._next_event()
+            if current is None or current > now:
+                self._current = now
+                break
+            self._current = current
+
+            # Cascade: when a lower level wraps, redistribute the next bucket above
+            level = 0
+            while level + 1 < self._levels and (current >> (bits * level)) & mask == 0:
+                level += 1
+                for tick, item in self._take(level, (current >> (bits * level)) & mask):
+                    self._place(tick, item)
+
+            for tick, item in self._take(0, current & mask):
+                if tick <= current:
+                    fired.append(item)
+                else:
+                    self._place(tick, item)
+            if self._due:
+                fired.extend(item for _, item in self._due)
+                self._due = []
+
+            if self._count == len(fired):
+                self._current = now
+                break
+
+        self._count -= len(fired)
+        return fired
+
+    def purge(self, dead: Callable[[Any], bool]) -> int:
+        """Drop every pending item for which `dead(item)` is true; returns how many."""
+        before = self._count
+        for level, wheel in enumerate(self._wheels):
+            for slot, bucket in enumerate(wheel):
+                if bucket:
+                    wheel[slot] = [pair for pair in bucket if not dead(pair[1])]
+                    self._count -= len(bucket) - len(wheel[slot])
+                    if not wheel[slot]:
+                        self._occupied[level] &= ~(1 << slot)
+        if self._due:
+            due = [pair for pair in self._due if not dead(pair[1])]
+            self._count -= len(self._due) - len(due)
+            self._due = due
+        return before - self._count
+
+    def clear(self):
+        for wheel in self._wheels:
+            for bucket in wheel:
+                bucket.clear()
+        self._occupied = [0] * self._levels
+        self._due.clear()
+        self._count = 0
+
+    @property
+    def current_tick(self) -> int:
+        return self._current
+
+    def __len__(self) -> int:
+        """Items scheduled and not yet fired (including lazily cancelled ones)."""
+        return self._count
@@ -2,13 +2,36 @@
 Tests for DTP Protocol
 """
 
+import asyncio
 import pytest
+import socket
+import threading
 import time
 from src.protocol import (
-    DTPHeader, DTPPacket, Priority, PacketType, Flags,
-    DTP_VERSION, DTP_HEADER_SIZE
+    DTPHeader, DTPPacket, DTPPacketView, Priority, PacketType, Flags,
+    DTP_VERSION, DTP_VERSION_COMPACT, DTP_HEADER_SIZE, DTP_MAX_DATAGRAM, iter_batch_frames
 )
-from src.scheduler import DTPScheduler, SimpleScheduler
+from src.timebase import now_ms, precise_ms, coarse_now_ms
+from src.compression import (
+    PayloadCompressor, compress_payload, decompress_payload, PRESET_DICTIONARIES,
+    build_dictionary, set_preset_dictionaries
+)
+from src.sequence import SequenceTracker, serial_diff, serial_lt
+from src.fragmentation import fragment_packet, ReassemblyBuffer, FRAGMENT_STRUCT
+from src.scheduler import (
+    DTPScheduler, SimpleScheduler, OrderingMode, DRR_QUANTUM_BYTES,
+    Scheduler, register_scheduler, create_scheduler, available_schedulers
+)
+from src.timing_wheel import TimingWheel
+from src.aqm import CoDel, CoDelConfig
+from src.rate_control import DelayEstimator
+from src.sharding import ShardedScheduler
+from src.flow_queue import FlowScheduler
+from src.server import DTPServer
+from src.simulation import SimulationConfig
+from src.metrics import MetricsCollector
+from src.client import DTPClient, DTPClientBase, TrafficProfile
+from src.async_client import AsyncScheduler, AsyncDTPClient
 
 
 class TestDTPHeader:
@@ -94,6 +117,76 @@ class TestDTPPacket:
         assert restored.header.deadline == 200
         assert restored.payload == b"Test payload"
     
+    def test_packet_serialize_into_buffer(self):
+        """Test zero-copy encode into a buffer and decode from a memoryview"""
+        original = DTPPacket.create_data(
+            payload=b"Buffered payload",
+            priority=Priority.HIGH,
+            sequence=77,
+            deadline_ms=300
+        )
+        
+        buffer = bytearray(DTP_MAX_DATAGRAM)
+        size = original.serialize_into(buffer, offset=8)
+        assert size == DTP_HEADER_SIZE + len(b"Buffered payload")
+        assert bytes(buffer[8:8 + size]) == original.serialize()
+        
+        view = memoryview(buffer)[8:8 + size]
+        restored = DTPPacket.deserialize(view)
+        assert restored.header.sequence == 77
+        assert restored.header.priority == Priority.HIGH
+        assert restored.payload == b"Buffered payload"
+        assert isinstance(restored.payload, bytes)
+    
+    def test_header_unpack_from_rejects_bad_magic(self):
+        """Test magic validation on the buffer decode path"""
+        buffer = bytearray(DTP_HEADER_SIZE)
+        DTPHeader(sequence=1).pack_into(buffer)
+        buffer[0] = 0x00
+        with pytest.raises(ValueError):
+            DTPHeader.unpack_from(memoryview(buffer))
+    
+    def test_packet_view_lazy_decode(self):
+        """Test view-backed packet decodes fields without building a header"""
+        original = DTPPacket.create_data(
+            payload=b"view",
+            priority=Priority.CRITICAL,
+            sequence=4321,
+            deadline_ms=250
+        )
+        
+        view = DTPPacketView.from_buffer(memoryview(original.serialize()))
+        assert view.priority == Priority.CRITICAL
+        assert view.deadline == 250
+        assert view.sequence == 4321
+        assert not view.is_expired()
+        assert view._header is None
+        
+        assert view.header.timestamp == original.header.timestamp
+        assert view.payload == b"view"
+        assert view.to_packet().serialize() == original.serialize()
+    
+    def test_metrics_record_view_without_header(self):
+        """Test received/dropped metrics read view fields without decoding the header"""
+        original = DTPPacket.create_data(b"m", Priority.HIGH, 77, deadline_ms=1500)
+        original.header.batch_id = 9
+        view = DTPPacketView(original.serialize())
+        assert view.batch_id == original.batch_id == 9
+        
+        metrics = MetricsCollector()
+        view.mark_received()
+        metrics.record_received(view)
+        metrics.record_dropped(view)
+        assert view._header is None
+        assert metrics._recent_packets[-1].batch_id == 9
+        assert metrics._recent_packets[-1].sequence == 77
+    
+    def test_packet_has_no_instance_dict(self):
+        """Test packets and headers are slotted"""
+        packet = DTPPacket.create_data(b"x", Priority.LOW, 1)
+        assert not hasattr(packet, '__dict__')
+        assert not hasattr(packet.header, '__dict__')
+    
     def test_packet_latency_calculation(self):
         """Test latency calculation"""
         packet = DTPPacket.create_data(
@@ -112,6 +205,463 @@ class TestDTPPacket:
         assert packet.latency_ms < 100  # Allow some tolerance
 
 
+class TestCompactHeader:
+    """Test v2 compact header and version negotiation"""
+    
+    def test_compact_roundtrip_is_smaller(self):
+        """Test v2 encodes the same fields in fewer bytes"""
+        packet = DTPPacket.create_data(b"ping", Priority.CRITICAL, 70000, deadline_ms=500)
+        packet.header.version = DTP_VERSION_COMPACT
+        
+        data = packet.serialize()
+        assert len(data) < DTP_HEADER_SIZE + 4
+        
+        restored = DTPPacket.deserialize(data)
+        assert restored.header.version == DTP_VERSION_COMPACT
+        assert restored.header.sequence == 70000
+        assert restored.header.deadline == 500
+        assert restored.header.timestamp == packet.header.timestamp
+        assert restored.payload == b"ping"
+        assert DTPPacketView(data).payload == b"ping"
+    
+    def test_compact_batch_id_only_when_batched(self):
+        """Test batch id costs bytes only when BATCHED is set"""
+        header = DTPHeader(version=DTP_VERSION_COMPACT, batch_id=300)
+        plain = header.pack()
+        header.flags |= Flags.BATCHED
+        batched = header.pack()
+        
+        assert len(batched) == len(plain) + 2
+        assert DTPHeader.unpack(plain).batch_id == 0
+        assert DTPHeader.unpack(batched).batch_id == 300
+    
+    def test_version_negotiation(self):
+        """Test v1/v2 peers agree on the highest common version"""
+        server = DTPServer(port=0, simulate_congestion=False)
+        server.start()
+        port = server._socket.getsockname()[1]
+        try:
+            compact = DTPClient(port=port, max_version=DTP_VERSION_COMPACT)
+            legacy = DTPClient(port=port)
+            compact.start()
+            legacy.start()
+            assert compact.get_stats()['header_version'] == DTP_VERSION_COMPACT
+            assert legacy.get_stats()['header_version'] == DTP_VERSION
+            compact.stop()
+            legacy.stop()
+        finally:
+            server.stop()
+
+
+class TestBatchFraming:
+    """Test multi-message datagram framing for BATCHED traffic"""
+    
+    def test_pack_batches_respects_mtu(self):
+        """Test a batch is split into containers that fit the MTU"""
+        packets = [
+            DTPPacket.create_data(b"x" * 100, Priority.LOW, i) for i in range(30)
+        ]
+        datagrams = DTPPacket.pack_batches(packets, batch_id=3, mtu=1400)
+        
+        assert 1 < len(datagrams) < len(packets)
+        assert all(len(d.serialize()) <= 1400 for d in datagrams)
+        
+        members = []
+        for datagram in datagrams:
+            assert datagram.header.packet_type == PacketType.BATCH
+            restored = DTPPacket.deserialize(datagram.serialize())
+            members.extend(DTPPacket.deserialize(f) for f in iter_batch_frames(restored.payload))
+        assert [m.header.sequence for m in members] == list(range(30))
+    
+    def test_server_unpacks_container(self):
+        """Test the server records every member of a container"""
+        server = DTPServer(simulate_congestion=False)
+        packets = [
+            DTPPacket.create_data(b"bulk", Priority.LOW, i) for i in range(5)
+        ]
+        container = DTPPacket.create_batch(packets, batch_id=1)
+        
+        server._handle_packet(memoryview(container.serialize()), ('127.0.0.1', 0))
+        
+        stats = server.get_stats()
+        assert stats['processed'] == 5
+        assert stats['batches'] == 1
+
+
+class TestCompression:
+    """Test COMPRESSED flag handling"""
+    
+    TELEMETRY = (b'{"ts":1700000000000,"seq":1,"type":"telemetry","host":"node-01",'
+                 b'"metric":"cpu","value":0.42,"unit":"percent"}')
+    
+    def test_compressed_roundtrip(self):
+        """Test client-side compression is undone by deserialize"""
+        packet = DTPPacket.create_data(self.TELEMETRY, Priority.LOW, 5)
+        assert PayloadCompressor().compress_packet(packet)
+        assert packet.header.flags & Flags.COMPRESSED
+        assert len(packet.payload) < len(self.TELEMETRY)
+        
+        data = packet.serialize()
+        restored = DTPPacket.deserialize(data)
+        assert restored.payload == self.TELEMETRY
+        assert not restored.header.flags & Flags.COMPRESSED
+        assert DTPPacketView(data).payload == self.TELEMETRY
+    
+    def test_small_or_ineligible_payloads_untouched(self):
+        """Test threshold and priority filters"""
+        compressor = PayloadCompressor(threshold=64)
+        small = DTPPacket.create_data(b"DTP-LOW-1", Priority.LOW, 1)
+        critical = DTPPacket.create_data(self.TELEMETRY, Priority.CRITICAL, 2)
+        
+        assert not compressor.compress_packet(small)
+        assert not compressor.compress_packet(critical)
+        assert small.payload == b"DTP-LOW-1"
+        assert not critical.header.flags & Flags.COMPRESSED
+    
+    def test_dictionaries_follow_the_payloads(self):
+        """Test the built-in dictionary fits generated payloads and can be replaced on both ends"""
+        generated = b"DTP-LOW-12345"
+        assert len(compress_payload(generated, Priority.LOW)) < len(generated)
+        
+        builtin = dict(PRESET_DICTIONARIES)
+        set_preset_dictionaries({int(Priority.LOW): build_dictionary([self.TELEMETRY.decode()] * 4)})
+        try:
+            packet = DTPPacket.create_data(self.TELEMETRY, Priority.LOW, 5)
+            assert PayloadCompressor().compress_packet(packet)
+            assert len(packet.payload) < 16
+            assert DTPPacket.deserialize(packet.serialize()).payload == self.TELEMETRY
+        finally:
+            set_preset_dictionaries(builtin)
+        assert PRESET_DICTIONARIES == builtin
+    
+    def test_decompression_size_limit(self):
+        """Test oversized payloads are rejected"""
+        bomb = compress_payload(b"\0" * 100000, Priority.LOW)
+        with pytest.raises(ValueError):
+            decompress_payload(bomb, Priority.LOW)
+
+
+class TestTimebase:
+    """Test coarse and precise clocks"""
+    
+    def test_coarse_clock_is_the_ms_clock(self):
+        """Test the coarse clock reads the current millisecond of the precise clock"""
+        assert coarse_now_ms is now_ms
+        before = precise_ms()
+        coarse = coarse_now_ms()
+        after = precise_ms()
+        assert int(before) <= coarse <= int(after)
+    
+    def test_sub_ms_latency(self):
+        """Test in-process packets get ns-resolution latency"""
+        packet = DTPPacket.create_data(b"fast", Priority.CRITICAL, 1)
+        packet.mark_received()
+        
+        assert packet.latency_ns is not None
+        assert 0 <= packet.latency_ns < 5_000_000
+        assert packet.latency_ms in (0, 1)
+
+
+class TestSequence:
+    """Test serial arithmetic and per-flow sequence tracking"""
+    
+    def test_serial_arithmetic_wraps(self):
+        """Test RFC 1982 comparison across the 16-bit wrap"""
+        assert serial_diff(2, 65534) == 4
+        assert serial_diff(65534, 2) == -4
+        assert serial_lt(65535, 0)
+        assert not serial_lt(0, 65535)
+        assert serial_lt(0xFFFFFFFF, 0, bits=32)
+    
+    def test_tracker_exact_across_wraps(self):
+        """Test loss/dup/reorder counts stay exact over many 16-bit wraps"""
+        tracker = SequenceTracker(bits=16)
+        total = 300_000
+        for ext in range(total):
+            if ext % 1000 == 7:
+                continue                      # lost
+            if ext % 1000 == 500:
+                continue                      # delivered late, below
+            tracker.observe(ext % 65536)
+            if ext % 1000 == 503:
+                tracker.observe((ext - 3) % 65536)   # reordered
+                tracker.observe((ext - 3) % 65536)   # and duplicated
+        
+        assert tracker.highest == total - 1
+        assert tracker.lost == total // 1000
+        assert tracker.reordered == total // 1000
+        assert tracker.duplicates == total // 1000
+    
+    def test_tracker_late_packets_before_first(self):
+        """Test packets older than the first one seen never make loss negative"""
+        tracker = SequenceTracker(bits=16)
+        for seq in [5, 0, 1, 2, 3, 4, 6]:
+            tracker.observe(seq)
+        assert tracker.lost == 0
+        assert tracker.reordered == 5
+        
+        tracker = SequenceTracker(bits=16)
+        for seq in [5, 2, 6]:
+            tracker.observe(seq)
+        assert tracker.lost == 2   # 3 and 4 are now known missing
+    
+    def test_extended_sequence_on_compact_header(self):
+        """Test v2 headers carry a 32-bit sequence"""
+        packet = DTPPacket.create_data(b"x", Priority.LOW, sequence=0xFFFFFFFF)
+        packet.header.version = DTP_VERSION_COMPACT
+        view = DTPPacketView(packet.serialize())
+        
+        assert view.version == DTP_VERSION_COMPACT
+        assert view.sequence == 0xFFFFFFFF
+    
+    def test_client_sequence_width(self):
+        """Test client sequence wraps at 16 bits on v1 and 32 bits on v2"""
+        client = DTPClient()
+        client._sequence = 65535
+        assert client._next_sequence() == 65535
+        assert client._next_sequence() == 0
+        
+        client._wire_version = DTP_VERSION_COMPACT
+        client._sequence = 65535
+        client._next_sequence()
+        assert client._next_sequence() == 65536
+
+
+class TestFragmentation:
+    """Test fragmentation and deadline-aware reassembly"""
+    
+    def test_fragment_roundtrip_out_of_order(self):
+        """Test fragments fit the MTU and reassemble in any order"""
+        payload = bytes(range(256)) * 400
+        packet = DTPPacket.create_data(payload, Priority.MEDIUM, 7, deadline_ms=5000)
+        fragments = fragment_packet(packet, mtu=1400)
+        
+        assert len(fragments) > 1
+        assert all(len(f.serialize()) <= 1400 for f in fragments)
+        
+        buffer = ReassemblyBuffer()
+        wire = [DTPPacketView(f.serialize()) for f in reversed(fragments)]
+        assert buffer.add(wire[1], flow="a") is None
+        results = [buffer.add(view, flow="a") for view in wire]
+        
+        message = results[-1]
+        assert all(r is None for r in results[:-1])
+        assert buffer.get_stats()['duplicates'] == 1
+        assert message.payload == payload
+        assert message.header.sequence == 7
+        assert not message.header.flags & Flags.FRAGMENT
+        assert buffer.get_stats()['pending_bytes'] == 0
+    
+    def test_compressed_message_fragments(self):
+        """Test a COMPRESSED message is inflated only after reassembly"""
+        payload = b'{"type":"telemetry","host":"node-01","metric":"cpu"}' * 2000
+        packet = DTPPacket.create_data(payload, Priority.LOW, 1, deadline_ms=5000)
+        packet.header.version = DTP_VERSION_COMPACT
+        assert PayloadCompressor().compress_packet(packet)
+        
+        buffer = ReassemblyBuffer()
+        message = None
+        for fragment in fragment_packet(packet, mtu=200):
+            message = buffer.add(DTPPacketView(fragment.serialize()), flow="a") or message
+        assert message.payload == payload
+    
+    def test_partial_evicted_at_deadline(self):
+        """Test a partial message is dropped once its deadline passes"""
+        packet = DTPPacket.create_data(b"x" * 5000, Priority.LOW, 1, deadline_ms=20)
+        first = fragment_packet(packet, mtu=1400)[0]
+        
+        buffer = ReassemblyBuffer()
+        assert buffer.add(first, flow="a") is None
+        assert buffer.pending == 1
+        
+        time.sleep(0.05)
+        assert buffer.evict_expired() == 1
+        assert buffer.pending == 0 and buffer.pending_bytes == 0
+    
+    def test_memory_bound_evicts_nearest_deadline(self):
+        """Test the byte budget evicts the partial closest to its deadline"""
+        buffer = ReassemblyBuffer(max_bytes=3000)
+        urgent = DTPPacket.create_data(b"u" * 2500, Priority.MEDIUM, 1, deadline_ms=1000)
+        relaxed = DTPPacket.create_data(b"r" * 2500, Priority.MEDIUM, 2, deadline_ms=5000)
+        newer = DTPPacket.create_data(b"n" * 2500, Priority.MEDIUM, 3, deadline_ms=5000)
+        
+        for packet in (relaxed, urgent, newer):
+            buffer.add(fragment_packet(packet, mtu=1400)[0], flow="a")
+        
+        stats = buffer.get_stats()
+        assert stats['evicted'] == 1
+        assert stats['pending'] == 2 and stats['pending_bytes'] <= 3000
+        assert buffer._partials.get(("a", 1)) is None
+    
+    def test_budget_counts_bytes_held(self):
+        """Test fragments that disagree with their claimed total are rejected"""
+        buffer = ReassemblyBuffer(max_bytes=10_000)
+        for sequence in range(999):
+            body = FRAGMENT_STRUCT.pack(0, 1000, 1) + b"x" * 1300
+            header = DTPHeader(sequence=sequence, flags=Flags.FRAGMENT, payload_length=len(body))
+            assert buffer.add(DTPPacket(header, body), flow="a") is None
+        
+        stats = buffer.get_stats()
+        assert stats['rejected'] == 999
+        assert stats['pending'] == 0 and stats['pending_bytes'] == 0
+        
+        packet = DTPPacket.create_data(b"y" * 5000, Priority.MEDIUM, 1, deadline_ms=5000)
+        fragments = fragment_packet(packet, mtu=1400)
+        buffer.add(fragments[0], flow="b")
+        assert buffer.pending_bytes == len(fragments[0].payload) - FRAGMENT_STRUCT.size
+    
+    def test_large_payload_over_loopback(self):
+        """Test a payload larger than the MTU and 16-bit length reaches the server"""
+        server = DTPServer(port=0, simulate_congestion=False)
+        received = []
+        server.set_on_packet_received(received.append)
+        server.start()
+        port = server._socket.getsockname()[1]
+        try:
+            client = DTPClient(port=port)
+            client.start()
+            payload = bytes(range(256)) * 300
+            client._send_packet(DTPPacket.create_data(payload, Priority.MEDIUM, 1, deadline_ms=5000))
+            
+            for _ in range(100):
+                if received:
+                    break
+                time.sleep(0.01)
+            client.stop()
+        finally:
+            server.stop()
+        
+        assert len(received) == 1
+        assert received[0].payload == payload
+
+
+class TestTimingWheel:
+    """Test the hierarchical timing wheel"""
+    
+    def test_fires_exactly_across_levels(self):
+        """Test items fire at their tick, including ones cascaded from upper levels"""
+        wheel = TimingWheel(start_tick=100, slots=4, levels=3)
+        ticks = [100, 101, 103, 117, 160, 163, 500]   # 500 is beyond the 64-tick horizon
+        for tick in ticks:
+            wheel.schedule(tick, tick)
+        
+        fired = {}
+        for now in range(100, 600):
+            for item in wheel.advance(now):
+                fired[item] = now
+        
+        assert fired == {tick: tick for tick in ticks}
+        assert len(wheel) == 0
+    
+    def test_idle_jump(self):
+        """Test an empty wheel jumps straight to the new time"""
+        wheel = TimingWheel(start_tick=0)
+        assert wheel.advance(10**9) == []
+        assert wheel.current_tick == 10**9
+    
+    def test_idle_gap_skips_to_next_bucket(self):
+        """Test advancing over a long gap visits only the ticks where a bucket fires or cascades"""
+        wheel = TimingWheel(start_tick=0)
+        wheel.schedule('tombstone', 5)
+        wheel.schedule('far', 3_000_000)
+        steps = []
+        next_event = wheel._next_event
+        wheel._next_event = lambda: steps.append(1) or next_event()
+        
+        assert wheel.advance(2_999_999) == ['tombstone']
+        assert wheel.current_tick == 2_999_999
+        assert len(steps) < 10
+        assert wheel.advance(3_000_000) == ['far']
+    
+    def test_purge_cancelled(self):
+        """Test purged items never fire and stop counting as pending"""
+        wheel = TimingWheel(start_tick=0, slots=4, levels=2)
+        for tick in range(40):
+            wheel.schedule(tick, tick)
+        
+        assert wheel.purge(lambda item: item % 2) == 20
+        assert len(wheel) == 20
+        assert wheel.advance(100) == list(range(0, 40, 2))
+        assert len(wheel) == 0
+
+
+class TestCoDel:
+    """Test CoDel active queue management"""
+    
+    def test_drops_only_after_persistent_delay(self):
+        """Test no drops below target or before a full interval above it"""
+        codel = CoDel(CoDelConfig(target_ms=5, interval_ms=100))
+        assert not any(codel.should_drop(4, now, 10) for now in range(0, 1000))
+        assert not any(codel.should_drop(50, now, 10) for now in range(1000, 1100))
+        assert codel.should_drop(50, 1100, 10)
+        assert codel.dropping
+        assert not codel.should_drop(50, 1101, 1)   # never drops the last packet
+        assert not codel.dropping
+    
+    def test_drop_rate_increases(self):
+        """Test drops are spaced interval / sqrt(count) apart while delay persists"""
+        codel = CoDel(CoDelConfig(target_ms=5, interval_ms=100))
+        drops = [now for now in range(0, 2000) if codel.should_drop(50, now, 10)]
+        gaps = [b - a for a, b in zip(drops, drops[1:])]
+        assert drops[0] == 100
+        assert gaps[:4] == [100, 71, 58, 50]   # 100 / sqrt(count), on a 1 ms clock
+        assert max(gaps[-5:]) < 20
+        assert codel.get_stats()['drops'] == len(drops)
+
+
+class TestDelayEstimator:
+    """Test the online one-way delay estimate"""
+
+    def test_smoothed_round_trip(self):
+        """Test samples are smoothed with gain 1/8 and halved for one way"""
+        estimator = DelayEstimator()
+        assert estimator() == 0.0
+        estimator.observe_rtt(80)
+        assert estimator.one_way_ms == 40
+        estimator.observe_rtt(160)
+        assert estimator.get_stats()['srtt_ms'] == 90
+        assert estimator() == 45
+        estimator.observe_rtt(-5)   # clock step, ignored
+        assert estimator.get_stats()['samples'] == 2
+
+    def test_client_tracks_acks_of_sent_packets(self):
+        """Test only sent RELIABLE packets await an ACK, and the ACK gives an RTT sample"""
+        client = DTPClient(port=9)
+        reliable = DTPPacket.create_data(b"r", Priority.HIGH, 1)
+        reliable.header.flags |= Flags.RELIABLE
+        client._send_packet(reliable)   # no socket yet: the send fails
+        assert client._ack_pending == {}
+
+        client._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for seq in range(2, 6):
+                packet = DTPPacket.create_data(b"r", Priority.HIGH, seq)
+                packet.header.flags |= Flags.RELIABLE
+                client._send_packet(packet)
+        finally:
+            client._socket.close()
+        assert sorted(client._ack_pending) == [2, 3, 4, 5]
+
+        client._handle_response(DTPPacket.create_ack(3).serialize())
+        assert 3 not in client._ack_pending
+        assert client.delay_estimator.get_stats()['samples'] == 1
+
+    def test_drop_hopeless_samples_rtt(self):
+        """Test drop_hopeless marks a sample of urgent packets RELIABLE and needs a scheduler that can drop"""
+        client = DTPClient(port=9, scheduler='sharded', drop_hopeless=True)
+        packets = [client._make_packet(Priority.HIGH) for _ in range(64)]
+        assert sum(1 for p in packets if p.header.flags & Flags.RELIABLE) == 4
+        assert not any(client._make_packet(Priority.LOW).header.flags & Flags.RELIABLE for _ in range(64))
+        assert not any(p.header.flags & Flags.RELIABLE
+                       for p in (DTPClient(port=9)._make_packet(Priority.HIGH) for _ in range(64)))
+
+        for name in ('fq', 'fifo'):
+            with pytest.raises(ValueError):
+                DTPClient(port=9, scheduler=name, drop_hopeless=True)
+            with pytest.raises(ValueError):
+                SimulationConfig(scheduler=name, drop_hopeless=True)
+
+
 class TestDTPScheduler:
     """Test DTP scheduler"""
     
@@ -188,6 +738,534 @@ class TestDTPScheduler:
         # Low priority should be skipped
         second = scheduler.dequeue()
         assert second is None or second.header.priority != Priority.LOW
+    
+    def test_edf_uses_absolute_deadline(self):
+        """Test an older packet with less remaining time goes before a newer one"""
+        clock = [10_000]
+        scheduler = DTPScheduler(clock=lambda: clock[0])
+        
+        older = DTPPacket.create_data(b"older", Priority.MEDIUM, 1, deadline_ms=1000)
+        older.header.timestamp = 9_500                  # due at 10_500
+        newer = DTPPacket.create_data(b"newer", Priority.MEDIUM, 2, deadline_ms=800)
+        newer.header.timestamp = 10_000                 # due at 10_800
+        
+        scheduler.enqueue(newer)
+        scheduler.enqueue(older)
+        assert scheduler.dequeue().header.sequence == 1
+        assert scheduler.dequeue().header.sequence == 2
+    
+    def test_ordering_modes_across_classes(self):
+        """Test strict-priority EDF vs pure EDF across classes"""
+        def make():
+            high = DTPPacket.create_data(b"high", Priority.HIGH, 1, deadline_ms=1000)
+            low = DTPPacket.create_data(b"low", Priority.LOW, 2, deadline_ms=100)
+            high.header.timestamp = low.header.timestamp = 5_000
+            return high, low
+        
+        for mode, first_seq in ((OrderingMode.PRIORITY_EDF, 1), (OrderingMode.EDF, 2)):
+            scheduler = DTPScheduler(ordering=mode, clock=lambda: 5_000)
+            for packet in make():
+                scheduler.enqueue(packet)
+            assert scheduler.dequeue().header.sequence == first_seq
+    
+    def test_full_queue_evicts_lowest_priority_latest_deadline(self):
+        """Test overflow evicts the worst queued packet, or rejects a worse newcomer"""
+        scheduler = DTPScheduler(queue_size=3, clock=lambda: 0)
+        scheduler.enqueue(DTPPacket.create_data(b"", Priority.HIGH, 1, deadline_ms=100))
+        scheduler.enqueue(DTPPacket.create_data(b"", Priority.MEDIUM, 2, deadline_ms=100))
+        scheduler.enqueue(DTPPacket.create_data(b"", Priority.MEDIUM, 3, deadline_ms=900))
+        
+        assert scheduler.enqueue(DTPPacket.create_data(b"", Priority.CRITICAL, 4))
+        assert not scheduler.enqueue(DTPPacket.create_data(b"", Priority.MEDIUM, 5, deadline_ms=500))
+        
+        assert scheduler.queue_size == 3
+        assert scheduler.get_stats()['dropped_full'] == 2
+        assert [scheduler.dequeue().header.sequence for _ in range(3)] == [4, 1, 2]
+        assert scheduler.dequeue() is None
+    
+    def test_tombstones_stay_bounded(self):
+        """Test heaps are compacted when enqueue/dequeue leave stale entries"""
+        scheduler = DTPScheduler(queue_size=10, clock=lambda: 0)
+        for i in range(5000):
+            scheduler.enqueue(DTPPacket.create_data(b"", Priority(i % 4), i))
+            if i % 2:
+                scheduler.dequeue()
+        
+        assert scheduler.queue_size == 9   # full, then one final dequeue
+        assert all(len(q) <= 2 * 10 + 64 for q in scheduler._queues)
+        assert all(len(v) <= 2 * 10 + 64 for v in scheduler._victims)
+    
+    def test_custom_classes(self):
+        """Test a 16-class taxonomy via a classifier, served lowest class first"""
+        scheduler = DTPScheduler(num_classes=16, classifier=lambda p: p.header.sequence % 16,
+                                 clock=lambda: 0)
+        for seq in (15, 3, 9, 0, 12):
+            scheduler.enqueue(DTPPacket.create_data(b"", Priority.LOW, seq))
+        
+        assert scheduler.get_stats()['queue_by_class'][9] == 1
+        assert [scheduler.dequeue().header.sequence for _ in range(5)] == [0, 3, 9, 12, 15]
+        assert scheduler._occupied == 0
+        
+        with pytest.raises(ValueError):
+            DTPScheduler(num_classes=2).enqueue(DTPPacket.create_data(b"", Priority.LOW, 1))
+    
+    def test_proactive_expiry_frees_capacity(self):
+        """Test dead packets leave the queue at their deadline, not at dequeue"""
+        clock = [1_000]
+        scheduler = DTPScheduler(queue_size=4, clock=lambda: clock[0])
+        for seq in range(3):
+            low = DTPPacket.create_data(b"", Priority.LOW, seq, deadline_ms=50)
+            low.header.timestamp = 1_000
+            scheduler.enqueue(low)
+        live = DTPPacket.create_data(b"", Priority.HIGH, 9, deadline_ms=5000)
+        live.header.timestamp = 1_000
+        scheduler.enqueue(live)
+        
+        clock[0] = 1_051
+        assert scheduler.queue_size == 1
+        for seq in range(3):
+            fresh = DTPPacket.create_data(b"", Priority.MEDIUM, 10 + seq, deadline_ms=5000)
+            fresh.header.timestamp = 1_051
+            assert scheduler.enqueue(fresh)
+        
+        stats = scheduler.get_stats()
+        assert stats['dropped_full'] == 0
+        assert stats['expired_by_priority']['LOW'] == 3
+        assert scheduler.dequeue().header.sequence == 9
+    
+    def test_dequeued_entries_release_packets(self):
+        """Test dequeued packets are not kept alive by the expiry wheel"""
+        scheduler = DTPScheduler()
+        for seq in range(5000):
+            scheduler.enqueue(DTPPacket.create_data(b"x" * 1024, Priority.LOW, seq))
+            assert scheduler.dequeue(timeout=0).header.sequence == seq
+        
+        assert scheduler.queue_size == 0
+        assert len(scheduler._wheel) <= 64
+    
+    def test_bulk_enqueue_and_dequeue(self):
+        """Test enqueue_many/dequeue_batch keep scheduling order and byte caps"""
+        scheduler = DTPScheduler(clock=lambda: 0)
+        packets = [DTPPacket.create_data(b"x" * 100, Priority(i % 4), i) for i in range(8)]
+        assert scheduler.enqueue_many(packets) == 8
+        
+        first = scheduler.dequeue_batch(3)
+        assert [p.header.priority for p in first] == [Priority.CRITICAL, Priority.CRITICAL, Priority.HIGH]
+        
+        capped = scheduler.dequeue_batch(10, max_bytes=2 * 124)
+        assert len(capped) == 2
+        assert len(scheduler.dequeue_batch(10, max_bytes=1)) == 1   # first packet always fits
+        assert len(scheduler.dequeue_batch(10)) == 2
+        assert scheduler.get_stats()['dequeued'] == 8
+    
+    def test_blocking_dequeue_wakes_on_enqueue(self):
+        """Test dequeue(timeout) returns as soon as another thread enqueues"""
+        scheduler = DTPScheduler()
+        assert scheduler.dequeue(timeout=0.02) is None
+        
+        packet = DTPPacket.create_data(b"urgent", Priority.CRITICAL, 1)
+        timer = threading.Timer(0.05, scheduler.enqueue, args=(packet,))
+        start = time.monotonic()
+        timer.start()
+        
+        assert scheduler.dequeue_batch(4, timeout=2.0) == [packet]
+        assert time.monotonic() - start < 1.0
+        timer.join()
+    
+    def test_dequeue_skips_expired(self):
+        """Test packets past their absolute deadline are dropped on dequeue"""
+        clock = [1_000]
+        scheduler = DTPScheduler(clock=lambda: clock[0])
+        packet = DTPPacket.create_data(b"late", Priority.HIGH, 1, deadline_ms=100)
+        packet.header.timestamp = 1_000
+        scheduler.enqueue(packet)
+        
+        clock[0] = 1_101
+        assert scheduler.dequeue() is None
+        assert scheduler.get_stats()['dropped_expired'] == 1
+
+    def test_drr_no_starvation_under_critical_flood(self):
+        """Test DRR keeps serving LOW while CRITICAL stays backlogged"""
+        for mode, low_served in ((OrderingMode.PRIORITY_EDF, False), (OrderingMode.DRR, True)):
+            scheduler = DTPScheduler(queue_size=10_000, ordering=mode, clock=lambda: 0)
+            for seq in range(200):
+                scheduler.enqueue(DTPPacket.create_data(b"", Priority.LOW, seq))
+
+            served = []
+            for seq in range(2000):
+                # Adversary: refill CRITICAL faster than it can drain
+                scheduler.enqueue(DTPPacket.create_data(b"", Priority.CRITICAL, seq))
+                scheduler.enqueue(DTPPacket.create_data(b"", Priority.CRITICAL, seq))
+                served.append(scheduler.dequeue().header.priority)
+            assert (Priority.LOW in served) == low_served
+
+        # Bounded wait: one CRITICAL quantum (plus carried credit) between LOW services
+        per_round = DRR_QUANTUM_BYTES * 4 // DTPPacket.create_data(b"", Priority.LOW, 0).wire_size
+        gaps = "".join("L" if p == Priority.LOW else "C" for p in served).split("L")[1:-1]
+        assert max(len(gap) for gap in gaps) <= per_round + 1
+
+    def test_drr_weighted_share(self):
+        """Test byte share follows the configured weights, EDF within each class"""
+        scheduler = DTPScheduler(queue_size=10_000, ordering=OrderingMode.DRR,
+                                 weights=[1, 1, 2, 4], clock=lambda: 0)
+        for seq in range(1000):
+            for priority in Priority:
+                packet = DTPPacket.create_data(b"x" * 100, priority, seq,
+                                               deadline_ms=100_000 - seq)
+                packet.header.timestamp = 1
+                scheduler.enqueue(packet)
+
+        served = scheduler.dequeue_batch(1600)
+        counts = {p: sum(1 for s in served if s.header.priority == p) for p in Priority}
+        assert counts[Priority.LOW] == pytest.approx(2 * counts[Priority.MEDIUM], rel=0.1)
+        assert counts[Priority.MEDIUM] == pytest.approx(2 * counts[Priority.CRITICAL], rel=0.1)
+        lows = [s.header.sequence for s in served if s.header.priority == Priority.LOW]
+        assert lows == sorted(lows, reverse=True)   # latest sequence has the earliest deadline
+
+        with pytest.raises(ValueError):
+            DTPScheduler(weights=[1, 2, 0, 1])
+
+    def test_llf_accounts_for_transmit_time(self):
+        """Test LLF sends a large message before a small one with slightly more laxity"""
+        scheduler = DTPScheduler(ordering=OrderingMode.LLF, clock=lambda: 1_000)
+        small = DTPPacket.create_data(b"x", Priority.HIGH, 1, deadline_ms=100)
+        large = DTPPacket.create_data(b"x" * 20_000, Priority.LOW, 2, deadline_ms=110)
+        small.header.timestamp = large.header.timestamp = 1_000
+        scheduler.enqueue(small)
+        scheduler.enqueue(large)
+
+        # 15 datagrams at 500 pkt/s take 30 ms: large has 80 ms of laxity, small 98 ms
+        assert scheduler.dequeue().header.sequence == 2
+
+    def test_feasibility_admission(self):
+        """Test packets that cannot finish behind the backlog are rejected at enqueue"""
+        def make(priority, seq, deadline_ms):
+            packet = DTPPacket.create_data(b"", priority, seq, deadline_ms=deadline_ms)
+            packet.header.timestamp = 1_000
+            return packet
+
+        scheduler = DTPScheduler(clock=lambda: 1_000, feasibility_admission=True)
+        for seq in range(50):   # 100 ms of HIGH backlog at 500 pkt/s
+            assert scheduler.enqueue(make(Priority.HIGH, seq, 100))
+
+        assert not scheduler.enqueue(make(Priority.HIGH, 50, 100))
+        assert scheduler.enqueue(make(Priority.HIGH, 51, 20))      # EDF puts it first
+        assert not scheduler.enqueue(make(Priority.LOW, 52, 60))
+        assert scheduler.enqueue(make(Priority.CRITICAL, 53, 50))   # nothing ahead of it
+        assert scheduler.enqueue(make(Priority.MEDIUM, 54, 200))
+
+        stats = scheduler.get_stats()
+        assert stats['rejected_infeasible'] == 2
+        assert stats['dropped_expired'] == 0
+        assert scheduler.queue_size == 53
+
+        # Pure EDF: earlier deadlines of any class are ahead, later ones are not
+        scheduler = DTPScheduler(clock=lambda: 1_000, ordering=OrderingMode.EDF,
+                                 feasibility_admission=True)
+        for seq in range(50):
+            assert scheduler.enqueue(make(Priority.LOW, seq, 100))
+        assert not scheduler.enqueue(make(Priority.CRITICAL, 50, 100))
+        assert scheduler.enqueue(make(Priority.CRITICAL, 51, 50))
+
+        default = DTPScheduler(clock=lambda: 1_000)
+        for seq in range(40):
+            default.enqueue(make(Priority.HIGH, seq, 1000))
+        assert default.enqueue(make(Priority.HIGH, 40, 50))
+
+    def test_drop_hopeless_below_one_way_delay(self):
+        """Test dequeue drops packets whose slack is below the one-way delay estimate"""
+        def make(priority, seq, deadline_ms):
+            packet = DTPPacket.create_data(b"", priority, seq, deadline_ms=deadline_ms)
+            packet.header.timestamp = 1_000
+            return packet
+
+        estimator = DelayEstimator()
+        scheduler = DTPScheduler(clock=lambda: 1_100, one_way_delay=estimator)
+        scheduler.enqueue(make(Priority.CRITICAL, 1, 130))   # 30 ms left
+        scheduler.enqueue(make(Priority.HIGH, 2, 200))       # 100 ms left
+        assert scheduler.get_stats()['dropped_hopeless'] == 0
+
+        estimator.observe_rtt(80)   # 40 ms one way
+        assert scheduler.dequeue().header.sequence == 2
+        stats = scheduler.get_stats()
+        assert stats['dropped_hopeless'] == 1
+        assert stats['dropped_expired'] == 0
+
+        plain = DTPScheduler(clock=lambda: 1_100)
+        plain.enqueue(make(Priority.CRITICAL, 1, 130))
+        assert plain.dequeue().header.sequence == 1
+
+    def test_codel_drains_standing_queue(self):
+        """Test a managed class sheds a standing queue while other classes are untouched"""
+        clock = [0]
+        scheduler = DTPScheduler(queue_size=10_000, clock=lambda: clock[0],
+                                 aqm={Priority.LOW: CoDelConfig(target_ms=10, interval_ms=100)})
+        for seq in range(1000):
+            scheduler.enqueue(DTPPacket.create_data(b"", Priority.LOW, seq))
+            scheduler.enqueue(DTPPacket.create_data(b"", Priority.MEDIUM, seq))
+        
+        sent = {Priority.LOW: 0, Priority.MEDIUM: 0}
+        while scheduler.queue_size:
+            clock[0] += 1
+            sent[scheduler.dequeue().header.priority] += 1
+        
+        stats = scheduler.get_stats()
+        assert stats['dropped_aqm'] > 0
+        assert stats['aqm'][Priority.LOW]['drops'] == stats['dropped_aqm']
+        assert sent == {Priority.LOW: 1000 - stats['dropped_aqm'], Priority.MEDIUM: 1000}
+        
+        with pytest.raises(ValueError):
+            DTPScheduler(num_classes=2, aqm={3: CoDelConfig()})
+
+    def test_batch_size_adapts_to_arrival_rate(self):
+        """Test dense traffic fills batches while sparse traffic is not held back"""
+        clock = [0]
+        scheduler = DTPScheduler(batch_size=10, batch_timeout_ms=50, clock=lambda: clock[0])
+
+        flushed = []
+        for _ in range(40):         # one packet per ms: 50 would arrive per timeout
+            clock[0] += 1
+            flushed.append(scheduler.add_to_batch(DTPPacket.create_data(b"", Priority.LOW, 1)))
+        assert [len(b) for b in flushed if b][-2:] == [10, 10]
+
+        sparse = []
+        for _ in range(20):         # one packet per 200 ms: a batch would never fill
+            clock[0] += 200
+            sparse.append(scheduler.add_to_batch(DTPPacket.create_data(b"", Priority.LOW, 2)))
+        assert all(b is not None and len(b) == 1 for b in sparse[-5:])
+        assert scheduler.get_stats()['batch_target'] == 1
+
+    def test_batch_timer_flush_and_deadline_slack(self):
+        """Test a partial batch is flushed by the timer, early for an urgent member"""
+        clock = [1_000]
+        scheduler = DTPScheduler(batch_size=10, batch_timeout_ms=50, clock=lambda: clock[0])
+        clock[0] += 1
+        assert len(scheduler.add_to_batch(DTPPacket.create_data(b"", Priority.LOW, 0))) == 1   # no rate yet
+        for _ in range(3):
+            clock[0] += 1
+            assert scheduler.add_to_batch(DTPPacket.create_data(b"", Priority.LOW, 1)) is None
+        assert scheduler.batch_flush_delay() == pytest.approx(0.048)
+        assert scheduler.flush_due_batch() == []
+
+        urgent = DTPPacket.create_data(b"", Priority.LOW, 2, deadline_ms=30)
+        urgent.header.timestamp = clock[0]
+        assert scheduler.add_to_batch(urgent) is None
+        assert scheduler.batch_flush_delay() == pytest.approx(0.02)   # deadline - guard
+
+        clock[0] += 20
+        batch = scheduler.flush_due_batch()
+        assert len(batch) == 4 and all(p.header.flags & Flags.BATCHED for p in batch)
+        assert scheduler.batch_flush_delay() is None
+
+    def test_byte_budget_evicts_by_size(self):
+        """Test a byte budget evicts as many outranked packets as a large newcomer needs"""
+        small = DTPPacket.create_data(b"x" * 76, Priority.LOW, 0).wire_size   # 100 bytes
+        scheduler = DTPScheduler(max_bytes=10 * small, clock=lambda: 0)
+        for seq in range(8):
+            assert scheduler.enqueue(DTPPacket.create_data(b"x" * 76, Priority.LOW, seq))
+        scheduler.enqueue(DTPPacket.create_data(b"x" * 76, Priority.HIGH, 8))
+
+        big = DTPPacket.create_data(b"x" * (4 * small - 24), Priority.MEDIUM, 9)
+        assert scheduler.enqueue(big)
+        stats = scheduler.get_stats()
+        assert stats['dropped_full'] == 3
+        assert stats['queue_bytes'] == 10 * small
+        assert stats['queue_bytes_by_class'] == [0, small, 4 * small, 5 * small]
+
+        # A LOW jumbo outranks nothing, so it is rejected without evicting anything
+        assert not scheduler.enqueue(DTPPacket.create_data(b"x" * 500, Priority.LOW, 10))
+        assert scheduler.get_stats()['queue_bytes'] == 10 * small
+
+    def test_class_byte_budget(self):
+        """Test a per-class budget only evicts within that class"""
+        scheduler = DTPScheduler(class_max_bytes={Priority.MEDIUM: 300}, clock=lambda: 0)
+        for seq in range(3):
+            packet = DTPPacket.create_data(b"x" * 76, Priority.MEDIUM, seq, deadline_ms=1000 + seq)
+            packet.header.timestamp = 1
+            assert scheduler.enqueue(packet)
+        scheduler.enqueue(DTPPacket.create_data(b"x" * 76, Priority.LOW, 3))
+
+        urgent = DTPPacket.create_data(b"x" * 76, Priority.MEDIUM, 4, deadline_ms=500)
+        urgent.header.timestamp = 1
+        assert scheduler.enqueue(urgent)
+        assert [scheduler.dequeue().header.sequence for _ in range(4)] == [4, 0, 1, 3]
+
+        fifo = SimpleScheduler(max_bytes=250)
+        assert fifo.enqueue_many([DTPPacket.create_data(b"x" * 76, Priority.LOW, i) for i in range(3)]) == 2
+        assert fifo.get_stats()['queue_bytes'] == 200
+
+
+class TestSchedulerRegistry:
+    """Test pluggable scheduling policies"""
+
+    def test_builtin_policies(self):
+        """Test every registered policy builds a working Scheduler"""
+        assert {'priority', 'edf', 'drr', 'fifo'} <= set(available_schedulers())
+        for name in available_schedulers():
+            scheduler = create_scheduler(name, queue_size=10)
+            assert isinstance(scheduler, Scheduler)
+            assert scheduler.enqueue(DTPPacket.create_data(b"x", Priority.LOW, 1))
+            assert scheduler.dequeue_batch(4)[0].header.sequence == 1
+            assert scheduler.flush_all() == []
+
+        with pytest.raises(ValueError):
+            create_scheduler("round-robin")
+
+    def test_register_and_select_from_client(self):
+        """Test a custom policy can be registered and picked by name"""
+        register_scheduler('test-edf-small', lambda **kw: DTPScheduler(queue_size=5))
+        client = DTPClient(scheduler='test-edf-small')
+        assert client.get_stats()['policy'] == 'test-edf-small'
+        assert client.get_stats()['scheduler']['ordering'] == OrderingMode.PRIORITY_EDF.value
+
+        client.set_scheduler('fifo')
+        assert isinstance(client._scheduler, SimpleScheduler)
+
+
+class TestShardedScheduler:
+    """Test the sharded multi-lock scheduler"""
+
+    def test_global_head_and_work_stealing(self):
+        """Test senders take the most urgent head across shards and steal when idle"""
+        scheduler = ShardedScheduler(num_shards=4, num_workers=2, clock=lambda: 0)
+        for flow, priority in enumerate([Priority.LOW, Priority.HIGH, Priority.CRITICAL, Priority.MEDIUM]):
+            scheduler.enqueue(DTPPacket.create_data(b"", priority, flow), flow=flow)
+        assert scheduler.get_stats()['queue_by_shard'] == [1, 1, 1, 1]
+
+        assert scheduler.dequeue().header.priority == Priority.CRITICAL
+        assert scheduler.dequeue(worker=1).header.priority == Priority.HIGH   # owns shards 1 and 3
+        assert scheduler.dequeue(worker=1).header.priority == Priority.MEDIUM
+        assert scheduler.dequeue(worker=1).header.priority == Priority.LOW    # stolen from shard 0
+        assert scheduler.get_stats()['steals'] == 1
+        assert scheduler.dequeue(worker=1) is None
+
+    def test_concurrent_producers(self):
+        """Test packets from many producer threads are all delivered exactly once"""
+        scheduler = create_scheduler('sharded', num_shards=4, queue_size=10_000)
+
+        def produce(base):
+            scheduler.enqueue_many([DTPPacket.create_data(b"", Priority(i % 4), base + i)
+                                    for i in range(500)])
+
+        threads = [threading.Thread(target=produce, args=(base,)) for base in range(0, 4000, 500)]
+        for thread in threads:
+            thread.start()
+        received = []
+        while len(received) < 4000:
+            batch = scheduler.dequeue_batch(64, timeout=1.0)
+            assert batch
+            received.extend(p.header.sequence for p in batch)
+        for thread in threads:
+            thread.join()
+
+        assert sorted(received) == list(range(4000))
+        assert scheduler.get_stats()['dequeued'] == 4000
+
+    def test_capacity_is_global(self):
+        """Test one producer can fill the whole capacity by spilling to other shards"""
+        scheduler = create_scheduler('sharded', queue_size=1000, clock=lambda: 0)
+        packets = [DTPPacket.create_data(b"", Priority.LOW, i) for i in range(1000)]
+        assert scheduler.enqueue_many(packets[:600]) == 600
+        assert sum(scheduler.enqueue(packet) for packet in packets[600:]) == 400
+
+        stats = scheduler.get_stats()
+        assert stats['queue_by_shard'] == [250, 250, 250, 250]
+        assert stats['dropped_full'] == 0
+        assert not scheduler.enqueue(DTPPacket.create_data(b"", Priority.LOW, 1000))
+
+    def test_dequeue_locks_only_the_chosen_shard(self):
+        """Test heads are read from the shards' reports, so only the shard popped from is locked"""
+        scheduler = ShardedScheduler(num_shards=4, clock=lambda: 0)
+        for flow in range(4):
+            scheduler.enqueue(DTPPacket.create_data(b"", Priority(flow), flow), flow=flow)
+        shards = scheduler._shards
+        urgent = next(i for i, shard in enumerate(shards) if shard.queue_size and
+                      shard.head_key()[0] == Priority.CRITICAL)
+
+        class Locked:
+            def __enter__(self):
+                raise AssertionError("locked a shard it did not take from")
+        for i, shard in enumerate(shards):
+            if i != urgent:
+                shard._lock = Locked()
+        assert scheduler.dequeue().header.sequence == 0
+        assert scheduler._heads[urgent] is None
+
+
+class TestFlowScheduler:
+    """Test per-flow queueing"""
+
+    def test_noisy_flow_cannot_starve_others(self):
+        """Test a flooding flow is capped and quiet flows share the class fairly"""
+        scheduler = FlowScheduler(queue_size=100, flow_limit=50, clock=lambda: 0)
+        noisy = [DTPPacket.create_data(b"x" * 200, Priority.LOW, i) for i in range(500)]
+        assert scheduler.enqueue_many(noisy, flow='noisy') == 50
+        for flow in range(10):
+            assert scheduler.enqueue_many(
+                [DTPPacket.create_data(b"x" * 200, Priority.LOW, 1000 + flow * 5 + i) for i in range(5)],
+                flow=flow) == 5
+        # Full queue: the fattest flow pays for a new critical packet
+        assert scheduler.enqueue(DTPPacket.create_data(b"", Priority.CRITICAL, 9999), flow=3)
+        assert scheduler.flow_stats('noisy') == {'queued': 49, 'sent': 0, 'dropped': 451}
+
+        assert scheduler.dequeue().header.sequence == 9999
+        first = [scheduler.dequeue() for _ in range(60)]
+        quiet = sum(1 for p in first if p.header.sequence >= 1000)
+        assert quiet == 50  # all quiet packets go out within the first rounds
+        assert scheduler.get_stats()['dropped_flow_limit'] == 450
+
+    def test_overflow_evicts_least_urgent_class(self):
+        """Test a full queue never gives up a more urgent packet for a less urgent one"""
+        scheduler = FlowScheduler(queue_size=4, clock=lambda: 0)
+        for seq in range(3):
+            scheduler.enqueue(DTPPacket.create_data(b"", Priority.CRITICAL, seq), flow='a')
+        scheduler.enqueue(DTPPacket.create_data(b"", Priority.LOW, 3), flow='b')
+
+        assert not scheduler.enqueue(DTPPacket.create_data(b"", Priority.LOW, 4), flow='c')
+        assert scheduler.get_stats()['queue_by_class'] == [3, 0, 0, 1]
+
+        assert scheduler.enqueue(DTPPacket.create_data(b"", Priority.HIGH, 5), flow='c')
+        assert scheduler.get_stats()['queue_by_class'] == [3, 1, 0, 0]
+        assert scheduler.flow_stats('b') == {'queued': 0, 'sent': 0, 'dropped': 1}
+
+    def test_idle_flows_reclaimed_lru(self):
+        """Test flow state stays bounded with many short-lived flows"""
+        scheduler = create_scheduler('fq', max_flows=100, clock=lambda: 0)
+        for flow in range(20_000):
+            scheduler.enqueue(DTPPacket.create_data(b"", Priority.MEDIUM, flow % 65536), flow=flow)
+            if flow % 2:
+                scheduler.dequeue_batch(2)
+        scheduler.enqueue(DTPPacket.create_data(b"", Priority.MEDIUM, 0), flow=19_950)  # touch
+
+        stats = scheduler.get_stats()
+        assert stats['flows'] == 100
+        assert stats['flows_reclaimed'] == 19_900
+        assert scheduler.flow_stats(0) is None
+        assert scheduler.flow_stats(19_950) == {'queued': 1, 'sent': 1, 'dropped': 0}
+
+    def test_client_traffic_spread_over_flows(self):
+        """Test a client run puts the profile's streams in separate flows"""
+        server = DTPServer(port=0, simulate_congestion=False)
+        server.start()
+        port = server._socket.getsockname()[1]
+        profile = TrafficProfile(critical_count=8, high_count=8, medium_count=8, low_count=8, flows=4)
+
+        async def scenario():
+            client = AsyncDTPClient(port=port, scheduler='fq')
+            await client.start()
+            assert client.send(DTPPacket.create_data(b"", Priority.HIGH, 100, deadline_ms=5000), flow='extra')
+            await client.run_simulation(profile)
+            client.stop()
+            return client._scheduler
+
+        try:
+            scheduler = asyncio.run(scenario())
+        finally:
+            server.stop()
+
+        assert [scheduler.flow_stats(flow)['sent'] for flow in range(4)] == [8, 8, 8, 8]
+        assert scheduler.flow_stats(None) is None
+        assert scheduler.flow_stats('extra')['sent'] == 1
 
 
 class TestSimpleScheduler:
@@ -209,6 +1287,119 @@ class TestSimpleScheduler:
         
         out2 = scheduler.dequeue()
         assert out2.header.sequence == 2
+    
+    def test_simple_scheduler_bulk(self):
+        """Test FIFO bulk APIs"""
+        scheduler = SimpleScheduler(queue_size=3)
+        packets = [DTPPacket.create_data(b"x", Priority.LOW, i) for i in range(4)]
+        
+        assert scheduler.enqueue_many(packets) == 3
+        assert [p.header.sequence for p in scheduler.dequeue_batch(2)] == [0, 1]
+        assert [p.header.sequence for p in scheduler.dequeue_batch(5)] == [2]
+
+
+
+class TestAsyncClient:
+    """Test the asyncio scheduler front end and client"""
+    
+    def test_awaitable_scheduler(self):
+        """Test getters wait for packets, get them in scheduling order and end on close"""
+        async def scenario():
+            scheduler = AsyncScheduler(DTPScheduler())
+            getter = asyncio.ensure_future(scheduler.get())
+            await asyncio.sleep(0)
+            assert not getter.done()
+            
+            scheduler.put(DTPPacket.create_data(b"", Priority.LOW, 1))
+            assert (await getter).header.sequence == 1
+            
+            scheduler.put_many([DTPPacket.create_data(b"", Priority.LOW, 2),
+                                DTPPacket.create_data(b"", Priority.CRITICAL, 3)])
+            scheduler.close()
+            batch = await scheduler.get_batch(10)
+            assert [p.header.sequence for p in batch] == [3, 2]
+            assert await scheduler.get() is None
+        
+        asyncio.run(scenario())
+    
+    def test_logical_senders_over_loopback(self):
+        """Test many sender coroutines share one client without extra threads"""
+        server = DTPServer(port=0, simulate_congestion=False)
+        received = []
+        server.set_on_packet_received(received.append)
+        server.start()
+        port = server._socket.getsockname()[1]
+        threads = threading.active_count()
+        
+        async def sender(client, base):
+            for i in range(2):
+                assert client.send(DTPPacket.create_data(b"x", Priority.HIGH, base + i, deadline_ms=5000))
+                await asyncio.sleep(0.001)
+        
+        async def scenario():
+            client = AsyncDTPClient(port=port)
+            await client.start()
+            await asyncio.gather(*(sender(client, base) for base in range(0, 200, 2)))
+            assert threading.active_count() == threads
+            for _ in range(200):
+                if len(received) == 200:
+                    break
+                await asyncio.sleep(0.01)
+            client.stop()
+        
+        try:
+            asyncio.run(scenario())
+        finally:
+            server.stop()
+        
+        assert sorted(p.sequence for p in received) == list(range(200))
+    
+    def test_send_errors_do_not_escape(self):
+        """Test a failing send in a batch flush neither raises nor cuts the batch short"""
+        class FailingTransport:
+            attempts = 0
+            
+            def sendto(self, data):
+                self.attempts += 1
+                raise OSError("network unreachable")
+        
+        client = AsyncDTPClient(mtu=200)
+        client._transport = FailingTransport()
+        batch = [DTPPacket.create_data(b"x" * 100, Priority.LOW, i) for i in range(3)]
+        assert client._send_batch(batch) == 0
+        assert client._transport.attempts == 3
+        client._send_packet(DTPPacket.create_data(b"x", Priority.HIGH, 3))
+        assert client.get_stats()['datagrams'] == 0
+    
+    def test_batch_reports_only_datagrams_that_left(self):
+        """Test members of a failed batch datagram are neither reported sent nor await an ACK"""
+        class FlakyTransport:
+            calls = 0
+            
+            def sendto(self, data):
+                self.calls += 1
+                if self.calls == 2:
+                    raise OSError("no buffer space")
+        
+        client = AsyncDTPClient(mtu=300)
+        client._transport = FlakyTransport()
+        reported = []
+        client.set_on_packet_sent(reported.append)
+        batch = [DTPPacket.create_data(b"x" * 100, Priority.LOW, i) for i in range(6)]
+        for packet in batch:
+            packet.header.flags |= Flags.RELIABLE
+        groups = DTPPacket.batch_groups(batch, 300)
+        assert [len(group) for group in groups] == [2, 2, 2]
+        
+        assert client._send_batch(batch) == 4
+        assert [p.header.sequence for p in reported] == [0, 1, 4, 5]
+        assert sorted(client._ack_pending) == [0, 1, 4, 5]
+    
+    def test_client_base_is_abstract(self):
+        """Test the shared client base needs a transport before it can be built"""
+        with pytest.raises(TypeError):
+            DTPClientBase()
+
 
 
 if __name__ == "__main__":